@@ -0,0 +1,220 @@
+"""Vectorized watcher analytics over the snapshot history.
+
+The history is loaded as a ``symbols x days`` matrix (the last count of each
+UTC day, carried forward over days without a new row) and every statistic is
+computed for all symbols at once:
+
+- ``dod`` / ``wow``: day-over-day and week-over-week growth;
+- ``zscore``: today's log change against the mean and spread of the
+  previous ``window`` days' changes;
+- ``rank`` / ``rank_change``: position by watcher count (1 = most watched)
+  and places gained since the day before;
+- ``breakout``: z-score and weekly growth both above their thresholds.
+
+Results are written back into the store as ``analytics/<day>/`` partitions
+next to the raw counts, replacing earlier results for the same days.
+
+    python analytics.py --days 365 --top 20
+"""
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from watcher_store import PartitionedTable, WatcherStore, day_of
+
+DAY = 86400
+ANALYTICS_COLUMNS = {
+    'sym': np.int32, 'count': np.int64, 'dod': np.float32, 'wow': np.float32,
+    'zscore': np.float32, 'rank': np.int32, 'rank_change': np.int32, 'breakout': np.int8,
+}
+
+
+@dataclass
+class WatcherMatrix:
+    sym_ids: np.ndarray
+    days: list
+    counts: np.ndarray
+
+
+@dataclass
+class Analytics:
+    sym_ids: np.ndarray
+    days: list
+    counts: np.ndarray
+    dod: np.ndarray
+    wow: np.ndarray
+    zscore: np.ndarray
+    rank: np.ndarray
+    rank_change: np.ndarray
+    breakout: np.ndarray
+
+
+def _day_range(start_day, end_day):
+    start = datetime.strptime(start_day, '%Y%m%d')
+    count = (datetime.strptime(end_day, '%Y%m%d') - start).days + 1
+    return [(start + timedelta(days=i)).strftime('%Y%m%d') for i in range(count)]
+
+
+def _forward_fill(matrix):
+    valid = ~np.isnan(matrix)
+    index = np.where(valid, np.arange(matrix.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return matrix[np.arange(matrix.shape[0])[:, None], index]
+
+
+def load_matrix(store, symbols=None, days=365, end=None):
+    """Daily ``symbols x days`` watcher counts ending at ``end`` (default: now)."""
+    end = time.time() if end is None else end
+    calendar = _day_range(day_of(end - (days - 1) * DAY), day_of(end))
+    column = {day: j for j, day in enumerate(calendar)}
+    matrix = np.full((len(store.symbols.symbols), len(calendar)), np.nan)
+
+    for day in store.table.days(calendar[0], calendar[-1]):
+        cols = store.table.read(day, ('sym', 'count'))
+        sym = np.asarray(cols['sym'])
+        # Last row per symbol in the day (rows are appended in time order)
+        last = len(sym) - 1 - np.unique(sym[::-1], return_index=True)[1]
+        matrix[sym[last], column[day]] = cols['count'][last]
+
+    # Counts from before the window carry into its first day
+    start = datetime.strptime(calendar[0], '%Y%m%d').replace(tzinfo=timezone.utc).timestamp()
+    before = store.latest(before=start - 1)
+    if before:
+        ids = store.symbols.lookup(before)
+        first = matrix[ids, 0]
+        matrix[ids, 0] = np.where(np.isnan(first), list(before.values()), first)
+    matrix = _forward_fill(matrix)
+
+    ids = store.symbols.lookup(symbols) if symbols is not None else np.arange(len(matrix))
+    ids = ids[~np.isnan(matrix[ids]).all(axis=1)]
+    return WatcherMatrix(ids.astype(np.int32), calendar, matrix[ids])
+
+
+def _growth(counts, lag):
+    growth = np.full(counts.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth[:, lag:] = counts[:, lag:] / counts[:, :-lag] - 1.0
+    growth[~np.isfinite(growth)] = np.nan
+    return growth
+
+
+def _trailing_zscore(changes, window, min_std=1e-3):
+    """z-score of each column against the ``window`` columns before it."""
+    valid = ~np.isnan(changes)
+    values = np.where(valid, changes, 0.0)
+    rows, cols = changes.shape
+    # Running sums with a leading zero column, so [lo, t) sums are differences
+    s1 = np.zeros((rows, cols + 1))
+    s2 = np.zeros((rows, cols + 1))
+    n = np.zeros((rows, cols + 1))
+    np.cumsum(values, axis=1, out=s1[:, 1:])
+    np.cumsum(values * values, axis=1, out=s2[:, 1:])
+    np.cumsum(valid, axis=1, out=n[:, 1:])
+
+    def trailing(sums):
+        out = sums[:, :cols].copy()
+        out[:, window:] -= sums[:, :cols - window]
+        return out
+
+    count = trailing(n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = trailing(s1) / count
+        var = trailing(s2) / count - mean * mean
+        # A flat history has no spread; the floor keeps a jump out of it finite
+        z = (changes - mean) / np.maximum(np.sqrt(np.maximum(var, 0.0)), min_std)
+    # Too little history says nothing
+    z[(count < max(3, window // 3)) | ~np.isfinite(z)] = np.nan
+    return z
+
+
+def _ranks(counts):
+    # Sorted per day, so work on the transposed (days x symbols) copy where
+    # each day is contiguous; symbols without a count rank last
+    by_day = np.where(np.isnan(counts), np.inf, -counts).T.copy()
+    order = np.argsort(by_day, axis=1)
+    ranks = np.empty(order.shape, dtype=np.int32)
+    ranks[np.arange(len(order))[:, None], order] = np.arange(1, order.shape[1] + 1, dtype=np.int32)
+    return ranks.T
+
+
+def analyze(matrix, window=30, z_threshold=3.0, wow_threshold=0.05):
+    counts = matrix.counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_counts = np.log(np.where(counts > 0, counts, np.nan))
+    changes = np.full(counts.shape, np.nan)
+    changes[:, 1:] = np.diff(log_counts, axis=1)
+
+    zscore = _trailing_zscore(changes, window)
+    wow = _growth(counts, 7)
+    rank = _ranks(counts)
+    rank_change = np.zeros(rank.shape, dtype=np.int32)
+    rank_change[:, 1:] = rank[:, :-1] - rank[:, 1:]
+    breakout = (np.nan_to_num(zscore) >= z_threshold) & (np.nan_to_num(wow) >= wow_threshold)
+    return Analytics(matrix.sym_ids, matrix.days, counts, _growth(counts, 1), wow, zscore,
+                     rank, rank_change, breakout)
+
+
+def analytics_table(store):
+    return PartitionedTable(store.root / 'analytics', ANALYTICS_COLUMNS)
+
+
+def write_analytics(store, result, last_days=None):
+    """Store the results of the last ``last_days`` days (all by default)."""
+    table = analytics_table(store)
+    columns = range(len(result.days))[-last_days:] if last_days else range(len(result.days))
+    for j in columns:
+        present = ~np.isnan(result.counts[:, j])
+        table.replace(
+            result.days[j],
+            sym=result.sym_ids[present],
+            count=result.counts[present, j].astype(np.int64),
+            dod=result.dod[present, j], wow=result.wow[present, j], zscore=result.zscore[present, j],
+            rank=result.rank[present, j], rank_change=result.rank_change[present, j],
+            breakout=result.breakout[present, j],
+        )
+    return len(columns)
+
+
+def read_analytics(store, day):
+    """One day of stored results as a DataFrame indexed by symbol."""
+    cols = analytics_table(store).read(day)
+    df = pd.DataFrame({name: np.asarray(values) for name, values in cols.items()})
+    df.index = pd.Index(store.symbols.names(df.pop('sym')), name='Symbol')
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watcher growth, z-scores, ranks and breakouts')
+    parser.add_argument('symbols', nargs='*')
+    parser.add_argument('--days', type=int, default=365, help='days of history to analyze')
+    parser.add_argument('--window', type=int, default=30, help='z-score lookback in days')
+    parser.add_argument('--z', type=float, default=3.0, help='z-score a breakout needs')
+    parser.add_argument('--wow', type=float, default=0.05, help='week-over-week growth a breakout needs')
+    parser.add_argument('--write-days', type=int, default=1,
+                        help='store results for the last N days (0: all, to backfill)')
+    parser.add_argument('--top', type=int, default=20, help='rows to print for the latest day')
+    args = parser.parse_args(argv)
+
+    store = WatcherStore()
+    start = time.perf_counter()
+    result = analyze(load_matrix(store, args.symbols or None, args.days), args.window, args.z, args.wow)
+    written = write_analytics(store, result, args.write_days or None)
+    logging.info('Analyzed %d symbols x %d days and wrote %d days in %.3fs', len(result.sym_ids),
+                 len(result.days), written, time.perf_counter() - start)
+
+    if len(result.sym_ids):
+        df = read_analytics(store, result.days[-1])
+        print(f"\nBreakouts on {result.days[-1]}:")
+        print(df[df['breakout'] == 1].sort_values('zscore', ascending=False).head(args.top))
+        print("\nBiggest weekly growth:")
+        print(df.sort_values('wow', ascending=False).head(args.top))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
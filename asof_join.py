@@ -0,0 +1,218 @@
+"""As-of join of Bloomberg company sentiment against watcher snapshots.
+
+Sentiment scores (``StructuredScore`` from ``//blp/mktnews-content/analytics``)
+arrive story by story, watcher counts once per scrape, so the two are matched
+by time rather than by equal timestamps: every left row gets the right row of
+the same ticker that is
+
+- ``backward``: the last one at or before it (the watcher count when the
+  story came out),
+- ``forward``: the first one at or after it (the count after the story),
+- ``nearest``: whichever of the two is closer,
+
+optionally no further than ``tolerance`` seconds away.
+
+Both inputs are streams of DataFrame chunks sorted by time (a day partition
+of the watcher store, a block of rows from a sentiment file) and are merged
+like a sorted-merge join: right chunks are read only as far as the current
+left chunk needs and dropped once no later left row can match them. Memory
+is bounded by one chunk of each side plus one carried row per ticker.
+
+The watcher store only writes counts that changed, so a ``backward`` match is
+the last *change*; a tolerance there also drops counts that were still
+current. ``forward`` and ``nearest`` need a tolerance to stay bounded.
+
+    python asof_join.py sentiment_2025.csv --direction backward --output joined.csv
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from watcher_store import STORE_DIR, WatcherStore, day_bounds
+
+DIRECTIONS = ('backward', 'forward', 'nearest')
+# Columns of the Company Sentiment CSV feed used here; the per-ticker fields
+# hold semicolon-delimited lists, one entry per ticker of the story
+SENTIMENT_CSV_COLUMNS = ['SUID', 'TimeOfArrival', 'AnalyticsType', 'WireName',
+                         'DerivedTickersId', 'Score', 'Confidence']
+PER_TICKER_COLUMNS = ['DerivedTickersId', 'Score', 'Confidence']
+
+
+def normalize_tickers(tickers):
+    """News tickers (``X``, ``X@US``, ``X US Equity``) as StockTwits symbols.
+
+    Tickers listed on other exchanges come back as ``None``, so ``VOD@LN``
+    does not match the US symbol ``VOD``.
+    """
+    parts = pd.Series(tickers, dtype='string').str.strip().str.upper().str.extract(
+        r'^([A-Z0-9.\-]+?)(?:[@ /]([A-Z0-9]+))?(?: EQUITY)?$')
+    us = parts[1].isna() | (parts[1] == 'US')
+    return parts[0].where(us).astype(object).where(lambda s: s.notna(), None)
+
+
+def sentiment_csv_chunks(paths, chunksize=200_000, analytics_type=None):
+    """Sentiment rows from Company Sentiment CSV files, one row per ticker.
+
+    Files are read ``chunksize`` stories at a time and must be in time order.
+    """
+    for path in paths:
+        for chunk in pd.read_csv(path, usecols=lambda c: c in SENTIMENT_CSV_COLUMNS,
+                                 dtype=str, chunksize=chunksize):
+            if analytics_type:
+                chunk = chunk[chunk['AnalyticsType'] == analytics_type]
+            for column in PER_TICKER_COLUMNS:
+                chunk[column] = chunk[column].fillna('').str.split(';')
+            chunk = chunk.explode(PER_TICKER_COLUMNS, ignore_index=True)
+            yield pd.DataFrame({
+                'Timestamp': pd.to_datetime(chunk['TimeOfArrival'], utc=True, format='ISO8601'),
+                'SUID': chunk['SUID'],
+                'Ticker': chunk['DerivedTickersId'],
+                'Symbol': normalize_tickers(chunk['DerivedTickersId']).to_numpy(),
+                'Score': pd.to_numeric(chunk['Score'], errors='coerce').astype('Int8'),
+                'Confidence': pd.to_numeric(chunk['Confidence'], errors='coerce').astype('Int16'),
+            }).sort_values('Timestamp', kind='stable', ignore_index=True)
+
+
+def watcher_chunks(store, start=None, end=None):
+    """Watcher rows one day partition at a time: ``Timestamp``, ``sym``, ``Watchers``."""
+    for day in store.table.days(*day_bounds(start, end)):
+        cols = store.table.read(day)
+        mask = np.ones(len(cols['ts']), dtype=bool)
+        if start is not None:
+            mask &= cols['ts'] >= start
+        if end is not None:
+            mask &= cols['ts'] <= end
+        ts = np.asarray(cols['ts'][mask])
+        order = np.argsort(ts, kind='stable')
+        yield pd.DataFrame({
+            'Timestamp': pd.to_datetime(ts[order], unit='s', utc=True),
+            'sym': np.asarray(cols['sym'][mask])[order],
+            'Watchers': np.asarray(cols['count'][mask])[order],
+        })
+
+
+def with_symbol_ids(chunks, symbols):
+    """Add the watcher store's ``sym`` id (-1 if unknown) for a ``Symbol`` column."""
+    for chunk in chunks:
+        chunk['sym'] = chunk['Symbol'].map(symbols.ids).fillna(-1).astype(np.int32)
+        yield chunk
+
+
+def _check_sorted(chunk, on, previous, side):
+    times = chunk[on]
+    if len(times) and ((previous is not None and times.iloc[0] < previous)
+                       or not times.is_monotonic_increasing):
+        raise ValueError(f"{side} input must be sorted by {on}")
+    return times.iloc[-1] if len(times) else previous
+
+
+def asof_join(left, right, by, on='Timestamp', direction='backward', tolerance=None,
+              suffix='_right'):
+    """Stream the as-of join of two time-ordered chunk iterators.
+
+    Yields one joined DataFrame per left chunk: the left columns plus the
+    right ones (``on`` of the match as ``on + suffix``), empty where nothing
+    matched. ``tolerance`` is in seconds.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {DIRECTIONS}")
+    if tolerance is None and direction != 'backward':
+        raise ValueError(f"a {direction} join needs a tolerance")
+    window = pd.Timedelta(seconds=tolerance) if tolerance is not None else None
+
+    right = iter(right)
+    pending = []
+    exhausted = False
+    right_last = None
+    left_last = None
+    # Last row per key of the rows already dropped (backward, no tolerance)
+    carry = None
+    empty = pd.DataFrame({on: pd.Series(dtype='datetime64[ns, UTC]'), by: pd.Series(dtype=np.int64)})
+
+    def retire(frame):
+        # Rows no later left row can match, except as a key's last value
+        nonlocal carry
+        if window is None:
+            frames = [carry, frame] if carry is not None else [frame]
+            carry = pd.concat(frames, ignore_index=True).drop_duplicates(by, keep='last')
+
+    for chunk in left:
+        left_last = _check_sorted(chunk, on, left_last, 'left')
+        if chunk.empty:
+            continue
+        first, last = chunk[on].iloc[0], chunk[on].iloc[-1]
+        # Right rows before ``oldest`` cannot match this chunk or a later one
+        oldest = first - window if window is not None else first
+        horizon = last if window is None or direction == 'backward' else last + window
+        if pending:
+            buffer = pd.concat(pending, ignore_index=True)
+            keep = buffer[on] >= oldest
+            retire(buffer[~keep])
+            pending = [buffer[keep]]
+
+        # Read right chunks until they reach past the horizon
+        while not exhausted and (right_last is None or right_last <= horizon):
+            try:
+                part = next(right)
+            except StopIteration:
+                exhausted = True
+                break
+            right_last = _check_sorted(part, on, right_last, 'right')
+            if part.empty:
+                continue
+            part = part.assign(**{on + suffix: part[on]})
+            empty = part.iloc[:0]
+            if right_last < oldest:
+                retire(part)
+            else:
+                pending.append(part)
+
+        frames = ([carry] if carry is not None else []) + pending
+        buffer = pd.concat(frames, ignore_index=True) if frames else empty
+        buffer = buffer.astype({on: chunk[on].dtype, by: chunk[by].dtype})
+        yield pd.merge_asof(chunk, buffer, on=on, by=by, direction=direction, tolerance=window,
+                            suffixes=('', suffix))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='As-of join of sentiment scores with watcher counts')
+    parser.add_argument('paths', nargs='+', help='Company Sentiment CSV files, in time order')
+    parser.add_argument('--direction', choices=DIRECTIONS, default='backward')
+    parser.add_argument('--tolerance', type=float, help='seconds; required for forward and nearest')
+    parser.add_argument('--analytics-type', choices=['SENTIMENT', 'SENTIMENT_SMEDIA'],
+                        help='only news or only social media scores')
+    parser.add_argument('--chunksize', type=int, default=200_000, help='stories per chunk')
+    parser.add_argument('--store', default=str(STORE_DIR))
+    parser.add_argument('--output', default='stock_data/sentiment_watchers.csv')
+    args = parser.parse_args(argv)
+    if args.direction != 'backward' and args.tolerance is None:
+        parser.error(f'--direction {args.direction} needs --tolerance')
+
+    store = WatcherStore(args.store)
+    left = with_symbol_ids(sentiment_csv_chunks(args.paths, args.chunksize, args.analytics_type),
+                           store.symbols)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.unlink(missing_ok=True)
+
+    started = time.perf_counter()
+    rows = matched = 0
+    for joined in asof_join(left, watcher_chunks(store), by='sym', direction=args.direction,
+                            tolerance=args.tolerance, suffix='_watchers'):
+        joined = joined.drop(columns='sym')
+        if 'Watchers' in joined:
+            joined['Watchers'] = joined['Watchers'].astype('Int64')
+        joined.to_csv(output, mode='a', header=rows == 0, index=False)
+        rows += len(joined)
+        matched += int(joined['Watchers'].notna().sum()) if 'Watchers' in joined else 0
+    logging.info('Joined %d sentiment rows (%d with a watcher count) in %.1fs: %s', rows, matched,
+                 time.perf_counter() - started, output)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
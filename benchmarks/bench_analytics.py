@@ -0,0 +1,68 @@
+"""Time the analytics passes on a synthetic store.
+
+Builds a throwaway store with one row per symbol per day (random-walk counts
+with a few injected breakouts), then times loading the matrix, computing the
+statistics and writing them back. Run from the repository root:
+
+    python -m benchmarks.bench_analytics --symbols 5000 --days 365
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from analytics import analyze, load_matrix, write_analytics
+from watcher_store import WatcherStore, day_of
+
+DAY = 86400
+
+
+def build_store(root, n_symbols, n_days, end, seed=0):
+    rng = np.random.default_rng(seed)
+    store = WatcherStore(root)
+    ids = store.symbols.intern([f'S{i:05d}' for i in range(n_symbols)])
+    steps = rng.normal(0.001, 0.01, (n_symbols, n_days))
+    # A handful of symbols jump 30% on the last day
+    steps[rng.choice(n_symbols, max(1, n_symbols // 500), replace=False), -1] = 0.3
+    counts = (rng.integers(100, 1_000_000, n_symbols)[:, None] * np.exp(np.cumsum(steps, axis=1))).astype(np.int64)
+    for j in range(n_days):
+        ts = end - (n_days - 1 - j) * DAY
+        store.table.append(day_of(ts), ts=np.full(n_symbols, ts, dtype=np.int64), sym=ids, count=counts[:, j])
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    end = int(time.time())
+    with tempfile.TemporaryDirectory() as root:
+        store = build_store(root, args.symbols, args.days, end)
+        print(f"{args.symbols:,} symbols x {args.days} days")
+        best = {}
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            matrix = load_matrix(store, days=args.days, end=end)
+            t1 = time.perf_counter()
+            result = analyze(matrix)
+            t2 = time.perf_counter()
+            write_analytics(store, result, last_days=1)
+            t3 = time.perf_counter()
+            for stage, seconds in (('load', t1 - t0), ('analyze', t2 - t1), ('write last day', t3 - t2),
+                                   ('total', t3 - t0)):
+                best[stage] = min(best.get(stage, seconds), seconds)
+        for stage, seconds in best.items():
+            print(f"{stage:<16} {seconds * 1000:>9.1f} ms")
+        print(f"breakouts on the last day: {int(result.breakout[:, -1].sum())}")
+
+        t0 = time.perf_counter()
+        write_analytics(store, result)
+        print(f"{'write all days':<16} {(time.perf_counter() - t0) * 1000:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
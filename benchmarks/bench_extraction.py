@@ -0,0 +1,73 @@
+"""Compare full-page regex extraction with the streaming and __NEXT_DATA__ extractors.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_extraction
+"""
+import argparse
+import json
+import time
+
+from benchmarks.pages import load_recorded_page, symbol_page
+from extractors import (NextDataStream, extract_from_chunks, extract_symbol_stats,
+                        extract_watchers, find_next_data)
+
+
+def chunked(page, chunk_size):
+    view = memoryview(page)
+    for start in range(0, len(page), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+def bench(label, fn, iterations):
+    bytes_read = 0
+    start = time.process_time()
+    for _ in range(iterations):
+        value, read = fn()
+        bytes_read += read
+    cpu = time.process_time() - start
+    print(f"{label:<28} {value:>10,} {bytes_read / iterations:>12,.0f} B "
+          f"{cpu / iterations * 1e6:>10.1f} us")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--chunk-sizes', default='4096,16384,65536')
+    args = parser.parse_args(argv)
+
+    # AMZN also has a trending record and a quote in the recorded page, so
+    # the multi-field extractor has real price/volume data to pick up
+    page = symbol_page('AMZN', 656657, load_recorded_page(), sentiment=61.0, messageVolume=1824)
+    print(f"page size: {len(page):,} bytes")
+    print(f"{'method':<28} {'watchers':>10} {'read/symbol':>14} {'cpu/symbol':>13}")
+
+    # Full read: the whole body is downloaded and decoded, then searched
+    bench('full read + regex',
+          lambda: (extract_watchers(page.decode('utf-8')), len(page)), args.iterations)
+
+    for chunk_size in (int(size) for size in args.chunk_sizes.split(',')):
+        def stream():
+            extractor = extract_from_chunks(chunked(page, chunk_size))
+            return extractor.found['watchers'], extractor.bytes_read
+        bench(f'stream, {chunk_size // 1024} KiB chunks', stream, args.iterations)
+
+    # Multi-field: one pass over __NEXT_DATA__ instead of one regex per field
+    def next_data():
+        stream = NextDataStream()
+        for chunk in chunked(page, 16384):
+            if stream.feed(chunk):
+                break
+        stats = extract_symbol_stats(stream.page, 'AMZN')
+        return stats.watchers, stream.bytes_read
+    bench('__NEXT_DATA__ stats record', next_data, args.iterations)
+
+    # Reference point for the lazy subtree decode: parse the whole payload
+    bench('__NEXT_DATA__ full json.loads',
+          lambda: (json.loads(find_next_data(page))['props']['pageProps']['symbol']['watchlistCount'],
+                   len(page)), args.iterations)
+    print(f"\nrecord: {extract_symbol_stats(page, 'AMZN')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Compare the streaming ContentT decoder with DOM and ElementTree parsing.
+
+Uses the Curated Twitter Feed XML example from ``CursorDocs``; every method
+extracts the same fields (SUID, event, metadata, topics, hot level). Run from
+the repository root:
+
+    python -m benchmarks.bench_mktnews --iterations 20000
+"""
+import argparse
+import re
+import time
+import xml.dom.minidom
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from mktnews import ContentDecoder, epoch_ms
+
+DOCS = Path(__file__).resolve().parent.parent / 'CursorDocs'
+TWITTER_DOCS = DOCS / 'Bloomberg Twitter Feed Docs.txt'
+MESSAGES_PER_DAY = 500_000
+
+_XML_EXAMPLE = re.compile(r'<\?xml[^>]*>\s*<ContentT.*?</ContentT>', re.S)
+
+
+def load_examples(path=TWITTER_DOCS):
+    """The ContentT XML messages quoted in a feed documentation file."""
+    return [m.group(0).encode('utf-8') for m in _XML_EXAMPLE.finditer(path.read_text(encoding='utf-8'))]
+
+
+def _dom_text(node, tag):
+    found = node.getElementsByTagName(tag)
+    return found[0].firstChild.data if found and found[0].firstChild else None
+
+
+def _dom_entities(node, tag):
+    found = node.getElementsByTagName(tag)
+    if not found:
+        return ()
+    return tuple((_dom_text(entity, 'Id'), int(_dom_text(entity, 'Score')))
+                 for entity in found[0].getElementsByTagName('ScoredEntity'))
+
+
+def dom_decode(message):
+    doc = xml.dom.minidom.parseString(message)
+    story = doc.getElementsByTagName('Story')[0]
+    metadata = story.getElementsByTagName('Metadata')[0]
+    return {
+        'suid': _dom_text(doc, 'SUID'),
+        'event': _dom_text(doc, 'Event'),
+        'wire_name': _dom_text(metadata, 'WireName'),
+        'headline': _dom_text(metadata, 'Headline'),
+        'time_of_arrival': epoch_ms(_dom_text(metadata, 'TimeOfArrival')),
+        'hot_level': int(_dom_text(story, 'HotLevel')),
+        'assigned_topics': _dom_entities(story, 'AssignedTopics'),
+        'derived_topics': _dom_entities(story, 'DerivedTopics'),
+    }
+
+
+def _etree_entities(story, tag):
+    return tuple((entity.findtext('Id'), int(entity.findtext('Score')))
+                 for entity in story.iterfind(f'{tag}/ScoredEntity'))
+
+
+def etree_decode(message):
+    content = ET.fromstring(message).find('StoryContent')
+    story = content.find('Story')
+    return {
+        'suid': content.findtext('Id/SUID'),
+        'event': content.findtext('Event'),
+        'wire_name': story.findtext('Metadata/WireName'),
+        'headline': story.findtext('Metadata/Headline'),
+        'time_of_arrival': epoch_ms(story.findtext('Metadata/TimeOfArrival')),
+        'hot_level': int(story.findtext('HotLevel')),
+        'assigned_topics': _etree_entities(story, 'AssignedTopics'),
+        'derived_topics': _etree_entities(story, 'DerivedTopics'),
+    }
+
+
+# One per mode, reused across messages as a subscription would
+_DECODERS = {False: ContentDecoder(), True: ContentDecoder(body=True)}
+
+
+def pull_decode(message, body=False):
+    story = _DECODERS[body].decode(message)[0]
+    return {
+        'suid': story.suid,
+        'event': story.event,
+        'wire_name': story.wire_name,
+        'headline': story.headline,
+        'time_of_arrival': story.time_of_arrival,
+        'hot_level': story.hot_level,
+        'assigned_topics': tuple((e.id, e.score) for e in story.assigned_topics),
+        'derived_topics': tuple((e.id, e.score) for e in story.derived_topics),
+    }
+
+
+METHODS = {
+    'minidom (DOM)': dom_decode,
+    'ElementTree.fromstring': etree_decode,
+    'pull decoder': pull_decode,
+    'pull decoder + body': lambda message: pull_decode(message, body=True),
+}
+
+
+def bench(methods, iterations, repeat):
+    """Best CPU seconds per message of each ``name: (fn, messages)`` method.
+
+    Rounds interleave the methods, so a CPU that speeds up or slows down
+    during the run affects them alike.
+    """
+    best = {}
+    for _ in range(repeat):
+        for name, (fn, messages) in methods.items():
+            start = time.process_time()
+            for i in range(iterations):
+                fn(messages[i % len(messages)])
+            seconds = (time.process_time() - start) / iterations
+            best[name] = min(seconds, best.get(name, seconds))
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    messages = load_examples()
+    reference = [dom_decode(message) for message in messages]
+    for name, fn in METHODS.items():
+        if [fn(message) for message in messages] != reference:
+            raise SystemExit(f"{name} disagrees with the DOM parse")
+
+    print(f"{len(messages)} example message(s), {sum(map(len, messages)) / len(messages):,.0f} bytes each")
+    print(f"{'method':<24} {'us/msg':>9} {'msgs/s':>10} {'CPU s/day':>10}")
+    for name, seconds in bench({name: (fn, messages) for name, fn in METHODS.items()}, args.iterations, args.repeat).items():
+        print(f"{name:<24} {seconds * 1e6:>9.1f} {1 / seconds:>10,.0f} {seconds * MESSAGES_PER_DAY:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
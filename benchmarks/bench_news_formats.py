@@ -0,0 +1,81 @@
+"""Compare XML and JSON payloads for the mktnews score projection.
+
+Takes the documented example messages (Curated Twitter Feed news, Company
+Sentiment and Market Moving News analytics), renders each one in the JSON
+layout ``JsonScoresDecoder`` assumes for ``?format=json`` subscriptions (one
+key per element, lists for repeated elements) and times decoding the same
+``StoryScores`` from either form. The docs show no JSON payload, so the
+rendering is built from that assumption and the agreement check below only
+shows the two decoders are consistent with it. Run from the repository root:
+
+    python -m benchmarks.bench_news_formats --iterations 20000
+"""
+import argparse
+import json
+import time
+import xml.etree.ElementTree as ET
+
+from benchmarks.bench_mktnews import DOCS, TWITTER_DOCS, bench, load_examples
+from mktnews import JsonScoresDecoder, XmlScoresDecoder
+
+EXAMPLES = {
+    'twitter news': TWITTER_DOCS,
+    'company sentiment': DOCS / 'Company Sentiment Docs.txt',
+    'market moving news': DOCS / 'Market Moving News Docs.txt',
+}
+MESSAGES_PER_DAY = 500_000
+
+
+def _to_json(elem):
+    if len(elem) == 0:
+        return (elem.text or '').strip()
+    obj = {}
+    for child in elem:
+        value = _to_json(child)
+        if child.tag not in obj:
+            obj[child.tag] = value
+        elif isinstance(obj[child.tag], list):
+            obj[child.tag].append(value)
+        else:
+            obj[child.tag] = [obj[child.tag], value]
+    return obj
+
+
+def to_json(message):
+    """The JSON rendering of an XML message."""
+    root = ET.fromstring(message)
+    return json.dumps({root.tag: _to_json(root)}).encode('utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    xml_decoder = XmlScoresDecoder()
+    json_decoder = JsonScoresDecoder()
+    keys_only = JsonScoresDecoder(fields=('suid', 'time_of_arrival'))
+    methods = {
+        'XML': (xml_decoder.decode, False),
+        'JSON': (json_decoder.decode, True),
+        'JSON suid+time only': (keys_only.decode, True),
+        'json.loads alone': (json.loads, True),
+    }
+    print(f"{'example':<20} {'method':<20} {'bytes':>7} {'us/msg':>9} {'msgs/s':>10} {'CPU s/day':>10}")
+    for name, path in EXAMPLES.items():
+        xml_messages = load_examples(path)
+        json_messages = [to_json(message) for message in xml_messages]
+        if [xml_decoder.decode(m) for m in xml_messages] != [json_decoder.decode(m) for m in json_messages]:
+            raise SystemExit(f"{name}: XML and JSON decoders disagree")
+        inputs = {method: (fn, json_messages if uses_json else xml_messages)
+                  for method, (fn, uses_json) in methods.items()}
+        for method, seconds in bench(inputs, args.iterations, args.repeat).items():
+            messages = inputs[method][1]
+            size = sum(map(len, messages)) / len(messages)
+            print(f"{name:<20} {method:<20} {size:>7,.0f} {seconds * 1e6:>9.1f} {1 / seconds:>10,.0f} "
+                  f"{seconds * MESSAGES_PER_DAY:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""End-to-end scraper throughput against the local fake server.
+
+Starts :mod:`benchmarks.fake_server` in its own process, runs each engine
+against it in a fresh process and reports symbols/sec, request latency
+percentiles, CPU time and peak RSS. Each run is appended as one JSON line to
+``benchmarks/results/scraper.jsonl`` for regression tracking. Run from the
+repository root:
+
+    python -m benchmarks.bench_scraper --symbols 500 --latency-ms 80 --rate-429 0.02
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+RESULTS_FILE = Path(__file__).resolve().parent / 'results' / 'scraper.jsonl'
+
+# name -> keyword arguments for watcher_engine.fetch_all
+ENGINES = {
+    'http': {},
+    'http-stats': {'stats': True},
+}
+
+
+def run_engine(engine, symbols, base_url, concurrency, rate, max_retries):
+    """One trial, meant to run in a fresh process so CPU and RSS are its own."""
+    import asyncio
+    import logging
+
+    from benchmarks.fake_server import watchers_for
+    from rate_limiter import RateController
+    from watcher_engine import fetch_all
+
+    # Per-symbol log lines would dominate the CPU numbers
+    logging.getLogger().setLevel(logging.ERROR)
+    latencies = []
+    congestion = []
+
+    class RecordingController(RateController):
+        def on_success(self, latency=None):
+            latencies.append(latency)
+            super().on_success(latency)
+
+        def on_congestion(self, retry_after=None):
+            congestion.append(retry_after)
+            super().on_congestion(retry_after)
+
+    controller = RecordingController(rate=rate, initial_concurrency=min(4, concurrency),
+                                     max_concurrency=concurrency, backoff_base=0.1, backoff_cap=2.0)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    results = asyncio.run(fetch_all(symbols, base_url=base_url, concurrency=concurrency,
+                                    max_retries=max_retries, controller=controller,
+                                    **ENGINES[engine]))
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+
+    values = {symbol: getattr(value, 'watchers', value) for symbol, value in results.items()}
+    latency_ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'engine': engine,
+        'symbols': len(symbols),
+        'resolved': len(results),
+        'wrong': sum(value != watchers_for(symbol) for symbol, value in values.items()),
+        'seconds': round(elapsed, 3),
+        'symbols_per_sec': round(len(results) / elapsed, 2),
+        'latency_p50_ms': round(float(np.percentile(latency_ms, 50)), 2),
+        'latency_p99_ms': round(float(np.percentile(latency_ms, 99)), 2),
+        'congestion_events': len(congestion),
+        'final_concurrency': controller.aimd.limit,
+        'cpu_seconds': round(after.ru_utime + after.ru_stime - usage.ru_utime - usage.ru_stime, 3),
+        # ru_maxrss is KiB on Linux
+        'peak_rss_mb': round(after.ru_maxrss / 1024, 1),
+    }
+
+
+def start_server(args):
+    cmd = [sys.executable, '-m', 'benchmarks.fake_server',
+           '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+           '--error-rate', str(args.error_rate), '--rate-429', str(args.rate_429),
+           '--retry-after', str(args.retry_after)]
+    if args.seed is not None:
+        cmd += ['--seed', str(args.seed)]
+    server = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    base_url = server.stdout.readline().strip()
+    if not base_url:
+        server.kill()
+        raise RuntimeError("fake server did not start")
+    return server, base_url
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help=f"comma-separated, from {', '.join(ENGINES)}")
+    parser.add_argument('--symbols', type=int, default=200, help='number of synthetic symbols')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=1000.0, help='client requests/sec cap')
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE)
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(',')
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+    symbols = [f'SYM{i:05d}' for i in range(args.symbols)]
+
+    server, base_url = start_server(args)
+    trials = []
+    try:
+        for engine in engines:
+            # A fresh spawned process per trial keeps peak RSS and CPU separate
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                trial = pool.submit(run_engine, engine, symbols, base_url, args.concurrency,
+                                    args.rate, args.max_retries).result()
+            trials.append(trial)
+            print(f"{engine:<12} {trial['resolved']:>6}/{trial['symbols']} ok "
+                  f"{trial['symbols_per_sec']:>9.1f} sym/s  p50 {trial['latency_p50_ms']:>7.1f} ms  "
+                  f"p99 {trial['latency_p99_ms']:>7.1f} ms  cpu {trial['cpu_seconds']:>6.2f} s  "
+                  f"rss {trial['peak_rss_mb']:>6.1f} MB")
+    finally:
+        server.terminate()
+        server.wait()
+
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'config': {key: vars(args)[key] for key in (
+            'symbols', 'concurrency', 'rate', 'max_retries', 'latency_ms', 'jitter_ms',
+            'error_rate', 'rate_429', 'retry_after', 'seed')},
+        'results': trials,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"\nresults appended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Local stand-in for stocktwits.com serving synthesized symbol pages.
+
+Every ``/symbol/<SYMBOL>`` request gets the recorded page with a symbol
+record spliced in (see :mod:`benchmarks.pages`). Latency, server errors and
+429 responses can be injected to see how the engines behave under load:
+
+    python -m benchmarks.fake_server --port 8765 --latency-ms 80 --rate-429 0.05
+    python stocktwits.py --mode http --base-url http://127.0.0.1:8765
+
+``/api/2/streams/symbol/<SYMBOL>.json`` serves a synthetic message stream
+(``messages_per_minute`` new messages per symbol) with ``since``/``max``
+cursors, for the stream ingester. ``/stats`` returns the request counters.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+from benchmarks.pages import load_recorded_page, symbol_page
+
+
+def watchers_for(symbol):
+    """Deterministic watcher count, so results can be checked after a run."""
+    return int.from_bytes(hashlib.md5(symbol.encode('utf-8')).digest()[:4], 'big') % 1_000_000
+
+
+class FakeStockTwits:
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, rate_429=0.0, retry_after=1.0,
+                 chunk_size=16384, seed=None, messages_per_minute=6.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        # Bodies go out in chunks so early-exit readers actually save bytes
+        self.chunk_size = chunk_size
+        self.random = random.Random(seed)
+        self.messages_per_minute = messages_per_minute
+        self.started = time.time()
+        self.template = load_recorded_page()
+        self.pages = {}
+        self.stats = {'requests': 0, 'ok': 0, 'not_modified': 0, 'errors': 0, 'throttled': 0,
+                      'in_flight': 0, 'max_in_flight': 0}
+
+    def page(self, symbol):
+        if symbol not in self.pages:
+            self.pages[symbol] = symbol_page(symbol, watchers_for(symbol), self.template)
+        return self.pages[symbol]
+
+    async def handle_symbol(self, request):
+        stats = self.stats
+        stats['requests'] += 1
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        try:
+            await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+            roll = self.random.random()
+            if roll < self.rate_429:
+                stats['throttled'] += 1
+                return web.Response(status=429, headers={'Retry-After': str(self.retry_after)})
+            if roll < self.rate_429 + self.error_rate:
+                stats['errors'] += 1
+                return web.Response(status=503)
+
+            body = self.page(request.match_info['symbol'].upper())
+            # Pages never change here, so a validator always revalidates
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if request.headers.get('If-None-Match') == etag:
+                stats['not_modified'] += 1
+                return web.Response(status=304, headers={'ETag': etag})
+            response = web.StreamResponse(headers={'Content-Type': 'text/html; charset=utf-8', 'ETag': etag})
+            response.content_length = len(body)
+            await response.prepare(request)
+            stats['ok'] += 1
+            try:
+                for start in range(0, len(body), self.chunk_size):
+                    await response.write(body[start:start + self.chunk_size])
+                await response.write_eof()
+            except ConnectionResetError:
+                # The client stopped reading once it had what it needed
+                pass
+            return response
+        finally:
+            stats['in_flight'] -= 1
+
+    def stream(self, symbol, since=0, max_id=None, limit=30):
+        """Newest ``limit`` message ids in ``(since, max_id]``, newest first."""
+        # Message n of a symbol has id n * 1000 + k, so ids are unique across
+        # symbols and grow over time like the real ones
+        k = watchers_for(symbol) % 1000
+        count = 100 + int((time.time() - self.started) * self.messages_per_minute / 60)
+        top = count - 1 if max_id is None else min(count - 1, (max_id - k) // 1000)
+        bottom = max(0, (since - k) // 1000 + 1) if since else 0
+        return [n * 1000 + k for n in range(top, max(bottom, top - limit + 1) - 1, -1)], top - limit + 1 > bottom
+
+    async def handle_stream(self, request):
+        self.stats['requests'] += 1
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        if self.random.random() < self.rate_429:
+            self.stats['throttled'] += 1
+            return web.Response(status=429, headers={'Retry-After': str(self.retry_after)})
+        symbol = request.match_info['symbol'].upper()
+        since = int(request.query.get('since', 0))
+        max_id = int(request.query['max']) if 'max' in request.query else None
+        ids, more = self.stream(symbol, since, max_id)
+        messages = [{
+            'id': i,
+            'body': f'${symbol} message {i}',
+            # Message n was posted (n - 100) intervals after the server started
+            'created_at': datetime.fromtimestamp(
+                self.started + (i // 1000 - 100) * 60 / self.messages_per_minute, tz=timezone.utc
+            ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'user': {'id': i % 7919, 'username': f'user{i % 7919}'},
+            'entities': {'sentiment': {'basic': ('Bullish', 'Bearish')[i % 3]} if i % 3 < 2 else None},
+            'symbols': [{'symbol': symbol}],
+        } for i in ids]
+        self.stats['ok'] += 1
+        return web.json_response({
+            'response': {'status': 200},
+            'symbol': {'symbol': symbol},
+            'cursor': {'more': more, 'since': ids[0] if ids else since, 'max': ids[-1] - 1 if ids else None},
+            'messages': messages,
+        })
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/symbol/{symbol}', self.handle_symbol)
+        app.router.add_get('/api/2/streams/symbol/{symbol}.json', self.handle_stream)
+        app.router.add_get('/stats', self.handle_stats)
+        return app
+
+
+async def serve(server, host='127.0.0.1', port=0):
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    # The benchmark runner reads the chosen port from the first line
+    print(f"http://{host}:{port}", flush=True)
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fake StockTwits server for offline benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='0 picks a free port')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='mean time to first byte')
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help='uniform +/- spread around it')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 503 responses')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='fraction of 429 responses')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After sent with 429s')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    server = FakeStockTwits(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate,
+                            args.rate_429, args.retry_after, seed=args.seed)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Synthetic StockTwits symbol pages built from the recorded HTML fixture."""
+import json
+from pathlib import Path
+
+RECORDED_PAGE = Path(__file__).resolve().parent.parent / 'CursorDocs' / 'Stocktwits-html-structure.txt'
+
+_PAGE_PROPS = b'"pageProps":{'
+
+
+def load_recorded_page():
+    return RECORDED_PAGE.read_bytes()
+
+
+def symbol_page(symbol, watchers, template=None, **fields):
+    """Return the recorded page with a symbol record spliced into __NEXT_DATA__.
+
+    The recorded page is the home page, so it carries no ``watchlistCount``;
+    the record is inserted at the start of ``pageProps`` where a symbol page
+    keeps its own data. Extra keyword ``fields`` are added to the record.
+    """
+    if template is None:
+        template = load_recorded_page()
+    record = json.dumps(
+        {'symbol': symbol, 'watchlistCount': watchers, **fields}, separators=(',', ':')
+    ).encode('utf-8')
+    return template.replace(_PAGE_PROPS, _PAGE_PROPS + b'"symbol":' + record + b',', 1)
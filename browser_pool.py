@@ -0,0 +1,192 @@
+"""Pool of headless Chrome workers for symbols that need JS rendering.
+
+Every worker thread owns its own driver and pulls symbols from one shared
+queue. Drivers are recycled after a fixed number of pages to cap Chrome's
+memory growth, and a crashed driver or worker is replaced without losing the
+symbol it was holding.
+"""
+import logging
+import queue
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from rate_limiter import Backoff
+from extractors import extract_watchers
+from metrics import METRICS
+from watcher_engine import BASE_URL, symbol_url
+
+
+class ChromeWorkerPool:
+    def __init__(self, driver_factory, workers=4, pages_per_driver=50, page_wait=3,
+                 max_retries=3, backoff=None, bucket=None, max_restarts=None, base_url=BASE_URL,
+                 on_result=None, archive=None):
+        self.driver_factory = driver_factory
+        self.workers = workers
+        self.pages_per_driver = pages_per_driver
+        self.page_wait = page_wait
+        self.max_retries = max_retries
+        self.backoff = backoff if backoff is not None else Backoff(base=5.0, cap=120.0)
+        # Optional TokenBucket shared by all workers to cap page loads per second
+        self.bucket = bucket
+        # How many times dead worker threads may be replaced during one run
+        self.max_restarts = workers * 3 if max_restarts is None else max_restarts
+        self.base_url = base_url
+        # Called as on_result(symbol, watchers) from the worker thread
+        self.on_result = on_result
+        # Optional PageArchive that keeps every rendered page
+        self.archive = archive
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._results = {}
+        self._remaining = 0
+        self._timers = []
+
+    def run(self, symbols):
+        """Scrape every symbol and return ``{symbol: watchers}`` in input order."""
+        symbols = list(dict.fromkeys(symbols))
+        self._results = {}
+        self._remaining = len(symbols)
+        for symbol in symbols:
+            self._queue.put((symbol, 0))
+
+        threads = [self._start_worker(i) for i in range(min(self.workers, len(symbols)))]
+        restarts = 0
+        try:
+            while self._pending():
+                for i, thread in enumerate(threads):
+                    if thread.is_alive() or not self._pending():
+                        continue
+                    if restarts >= self.max_restarts:
+                        continue
+                    restarts += 1
+                    logging.warning('Chrome worker %d died, restarting (%d/%d)', i, restarts, self.max_restarts)
+                    threads[i] = self._start_worker(i)
+
+                if not any(thread.is_alive() for thread in threads):
+                    logging.error('All Chrome workers are down, giving up on %d symbols', self._remaining)
+                    break
+                time.sleep(0.5)
+        finally:
+            with self._lock:
+                self._remaining = 0
+            for timer in self._timers:
+                timer.cancel()
+            for thread in threads:
+                thread.join()
+
+        return {symbol: self._results[symbol] for symbol in symbols if symbol in self._results}
+
+    def _start_worker(self, worker_id):
+        thread = threading.Thread(
+            target=self._worker, args=(worker_id,), name=f"chrome-worker-{worker_id}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _pending(self):
+        with self._lock:
+            return self._remaining > 0
+
+    def _finish(self, symbol, watchers=None):
+        with self._lock:
+            if watchers is not None:
+                self._results[symbol] = watchers
+            self._remaining -= 1
+
+    def _retry(self, symbol, attempt, error):
+        attempt += 1
+        if attempt >= self.max_retries:
+            METRICS.inc('failures', symbol)
+            logging.error('Failed to get data for %s after %d attempts', symbol, self.max_retries,
+                          extra={'symbol': symbol})
+            self._finish(symbol)
+            return
+
+        METRICS.inc('retries', symbol)
+        wait_time = self.backoff.delay(attempt - 1)
+        logging.warning('Attempt %d failed for %s: %s', attempt, symbol, error, extra={'symbol': symbol})
+        logging.info('Requeueing %s in %.1f seconds...', symbol, wait_time, extra={'symbol': symbol})
+        # Park the symbol on a timer so the worker can move on to the next one
+        timer = threading.Timer(wait_time, self._queue.put, args=((symbol, attempt),))
+        timer.daemon = True
+        with self._lock:
+            self._timers.append(timer)
+        timer.start()
+
+    def _worker(self, worker_id):
+        driver = None
+        pages = 0
+        try:
+            while self._pending():
+                try:
+                    symbol, attempt = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                if driver is None:
+                    try:
+                        driver = self.driver_factory()
+                    except Exception:
+                        # Hand the symbol back untouched before this worker dies
+                        self._queue.put((symbol, attempt))
+                        raise
+                    pages = 0
+
+                try:
+                    logging.info('[worker %d] Processing %s...', worker_id, symbol, extra={'symbol': symbol})
+                    if self.bucket is not None:
+                        self.bucket.acquire()
+                    with METRICS.time('fetch', symbol):
+                        driver.get(symbol_url(symbol, self.base_url))
+                    with METRICS.time('render_wait', symbol):
+                        time.sleep(self.page_wait)
+                    pages += 1
+
+                    page = driver.page_source
+                    if self.archive is not None:
+                        self.archive.append(symbol, page)
+                    with METRICS.time('extract', symbol):
+                        watchers = extract_watchers(page)
+                    if watchers is None:
+                        raise ValueError("Watchers count not found in page source")
+                    logging.info('Found %d watchers for %s', watchers, symbol,
+                                 extra={'symbol': symbol, 'watchers': watchers})
+
+                except WebDriverException as e:
+                    # The browser itself is unhealthy; start a fresh one next time
+                    self._quit(driver)
+                    driver = None
+                    self._retry(symbol, attempt, e)
+                except Exception as e:
+                    self._retry(symbol, attempt, e)
+                else:
+                    # A failing callback must not send a scraped symbol back for a retry
+                    if self.on_result is not None:
+                        try:
+                            self.on_result(symbol, watchers)
+                        except Exception as e:
+                            logging.error('Result handler failed for %s: %s', symbol, e,
+                                          extra={'symbol': symbol})
+                    self._finish(symbol, watchers)
+
+                if driver is not None and pages >= self.pages_per_driver:
+                    logging.info('[worker %d] Recycling Chrome after %d pages', worker_id, pages)
+                    self._quit(driver)
+                    driver = None
+        except Exception as e:
+            # Let the thread end; run() notices and starts a replacement
+            logging.error('[worker %d] Crashed: %s', worker_id, e)
+        finally:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,147 @@
+"""Snapshot deltas: what moved since the last run.
+
+After each scrape the new snapshot is joined on symbol against the baseline
+(the count last emitted for every symbol) and only rows whose change passes
+an absolute or a relative threshold are emitted, together with symbols never
+seen before. Comparing against the last *emitted* count rather than the last
+scraped one means slow drifts are reported once they add up.
+
+Emitted rows go to a compact binary file per run under ``stock_data/deltas``::
+
+    header   magic b'STWD', uint16 version, int64 epoch seconds, uint32 rows
+    rows     int32 symbol id, int64 watchers, int64 change (little-endian)
+
+Symbol ids are those of the watcher store's ``symbols.json``. The snapshot
+itself is written to the store with ``changes_only`` so the store, too, grows
+with the number of changes rather than with the size of the universe.
+``python deltas.py show FILE`` prints a delta file.
+"""
+import argparse
+import logging
+import os
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from watcher_store import STORE_DIR, WatcherStore
+
+DELTA_DIR = Path('stock_data') / 'deltas'
+MAGIC = b'STWD'
+VERSION = 1
+HEADER = struct.Struct('<4sHqI')
+RECORD = np.dtype([('sym', '<i4'), ('watchers', '<i8'), ('change', '<i8')])
+
+
+def compute_delta(previous, current, abs_threshold=50, rel_threshold=0.01):
+    """Rows of ``current`` that moved enough since ``previous``.
+
+    Both are ``{symbol: watchers}`` mappings. Returns a frame with Symbol,
+    Previous, Watchers and Change; new symbols have Previous NaN and Change
+    equal to their count.
+    """
+    cur = pd.DataFrame({'Symbol': list(current), 'Watchers': np.fromiter(current.values(), np.int64)})
+    prev = pd.DataFrame({'Symbol': list(previous), 'Previous': np.fromiter(previous.values(), np.int64)})
+    df = cur.merge(prev, on='Symbol', how='left')
+
+    change = df['Watchers'] - df['Previous'].fillna(0)
+    relative = change.abs() / df['Previous'].where(df['Previous'] > 0)
+    moved = (df['Previous'].isna()
+             | (change.abs() >= abs_threshold)
+             | (relative >= rel_threshold)
+             | ((df['Previous'] == 0) & (change != 0)))
+    df['Change'] = change.astype('int64')
+    return df.loc[moved, ['Symbol', 'Previous', 'Watchers', 'Change']].reset_index(drop=True)
+
+
+def write_delta(path, ts, sym_ids, watchers, change):
+    records = np.empty(len(sym_ids), dtype=RECORD)
+    records['sym'] = sym_ids
+    records['watchers'] = watchers
+    records['change'] = change
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, int(ts), len(records)))
+        records.tofile(f)
+    os.replace(tmp, path)
+    return path
+
+
+def read_delta(path):
+    """Return ``(ts, records)`` with ``records`` a structured array of ``RECORD``."""
+    with open(path, 'rb') as f:
+        magic, version, ts, rows = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} delta file")
+        records = np.fromfile(f, dtype=RECORD, count=rows)
+    return ts, records
+
+
+class DeltaStage:
+    def __init__(self, store=None, output_dir=DELTA_DIR, abs_threshold=50, rel_threshold=0.01):
+        self.store = store or WatcherStore()
+        self.output_dir = Path(output_dir)
+        self.abs_threshold = abs_threshold
+        self.rel_threshold = rel_threshold
+        # Last emitted count per store symbol id, -1 where nothing was emitted yet
+        self.baseline_path = self.output_dir / 'baseline.npy'
+
+    def _baseline(self):
+        baseline = np.load(self.baseline_path) if self.baseline_path.exists() else np.empty(0, np.int64)
+        missing = len(self.store.symbols.symbols) - len(baseline)
+        if missing > 0:
+            baseline = np.concatenate([baseline, np.full(missing, -1, dtype=np.int64)])
+        return baseline
+
+    def run(self, dict_stocks, ts=None):
+        """Store ``dict_stocks`` and write its delta file; returns the emitted rows."""
+        ts = int(time.time() if ts is None else ts)
+        stored = self.store.append_snapshot(dict_stocks, ts=ts, changes_only=True)
+
+        baseline = self._baseline()
+        ids = self.store.symbols.lookup(dict_stocks)
+        known = baseline[ids] >= 0
+        previous = dict(zip(self.store.symbols.names(ids[known]), baseline[ids[known]].tolist()))
+        delta = compute_delta(previous, dict_stocks, self.abs_threshold, self.rel_threshold)
+
+        delta_ids = self.store.symbols.lookup(delta['Symbol'])
+        baseline[delta_ids] = delta['Watchers'].to_numpy()
+        name = f"stocktwits_delta_{datetime.fromtimestamp(ts).strftime('%Y%m%d_%H%M%S')}.bin"
+        path = write_delta(self.output_dir / name, ts, delta_ids,
+                           delta['Watchers'].to_numpy(), delta['Change'].to_numpy())
+        tmp = self.baseline_path.with_suffix('.tmp.npy')
+        np.save(tmp, baseline)
+        os.replace(tmp, self.baseline_path)
+
+        logging.info('Delta: %d/%d symbols moved, %d rows stored, written to %s', len(delta),
+                     len(dict_stocks), stored, path)
+        return delta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Snapshot delta files')
+    sub = parser.add_subparsers(dest='command', required=True)
+    show = sub.add_parser('show', help='print a delta file')
+    show.add_argument('path')
+    show.add_argument('--store', default=str(STORE_DIR))
+    args = parser.parse_args(argv)
+
+    store = WatcherStore(args.store)
+    ts, records = read_delta(args.path)
+    df = pd.DataFrame({
+        'Symbol': store.symbols.names(records['sym']),
+        'Watchers': records['watchers'],
+        'Change': records['change'],
+    })
+    print(f"Delta at {datetime.fromtimestamp(ts)}: {len(df)} rows")
+    print(df.to_string(index=False))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,118 @@
+"""Pluggable snapshot exporters.
+
+Formats register themselves with ``@exporter(name)`` and are run
+concurrently by :func:`run_exporters`, each one timed in the log. Expensive
+formats are registered ``lazy`` and skipped by default; they can be produced
+later from the watcher store, e.g. ``python exporters.py xlsx``.
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from metrics import METRICS
+from watcher_store import WatcherStore
+
+OUTPUT_DIR = Path('stock_data')
+
+# name -> (function(df, path), file extension, lazy)
+EXPORTERS = {}
+
+
+def exporter(name, extension=None, lazy=False):
+    def register(fn):
+        EXPORTERS[name] = (fn, extension or name, lazy)
+        return fn
+    return register
+
+
+@exporter('csv')
+def export_csv(df, path):
+    df.to_csv(path)
+
+
+@exporter('json')
+def export_json(df, path):
+    df.to_json(path, indent=4, orient='index')
+
+
+@exporter('xlsx', lazy=True)
+def export_xlsx(df, path):
+    # openpyxl is by far the slowest writer, hence lazy
+    df.to_excel(path)
+
+
+def default_formats():
+    return [name for name, (_, _, lazy) in EXPORTERS.items() if not lazy]
+
+
+def snapshot_frame(dict_stocks):
+    df = pd.DataFrame.from_dict(dict_stocks, orient='index', columns=['Watchers'])
+    df.index.name = 'Symbol'
+    return df
+
+
+def _run_one(name, df, path):
+    fn = EXPORTERS[name][0]
+    start = time.perf_counter()
+    fn(df, path)
+    elapsed = time.perf_counter() - start
+    METRICS.observe('export', elapsed)
+    logging.info('Data exported to %s in %.3fs: %s', name.upper(), elapsed, path)
+    return path
+
+
+def run_exporters(df, formats=None, output_dir=OUTPUT_DIR, timestamp=None, suffix=''):
+    """Write ``df`` in every requested format concurrently; returns ``{name: path}``."""
+    formats = default_formats() if formats is None else list(formats)
+    unknown = [name for name in formats if name not in EXPORTERS]
+    if unknown:
+        raise ValueError(f"Unknown export formats: {', '.join(unknown)} (have {', '.join(EXPORTERS)})")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(exist_ok=True)
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    paths = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(formats)), thread_name_prefix='export') as pool:
+        futures = {
+            name: pool.submit(_run_one, name, df,
+                              output_dir / f'stocktwits_watchers_{timestamp}{suffix}.{EXPORTERS[name][1]}')
+            for name in formats
+        }
+        for name, future in futures.items():
+            try:
+                paths[name] = future.result()
+            except Exception as e:
+                logging.error('Error exporting %s: %s', name, e)
+    return paths
+
+
+def export_from_store(formats, ts=None, store=None, output_dir=OUTPUT_DIR):
+    """Produce exports on demand from a stored snapshot (the latest by default)."""
+    store = store or WatcherStore()
+    ts, dict_stocks = store.snapshot(ts)
+    if not dict_stocks:
+        logging.error("No snapshot in the watcher store to export")
+        return {}
+    timestamp = datetime.fromtimestamp(ts).strftime('%Y%m%d_%H%M%S')
+    return run_exporters(snapshot_frame(dict_stocks), formats, output_dir, timestamp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export a stored watcher snapshot')
+    parser.add_argument('formats', nargs='+', choices=sorted(EXPORTERS))
+    parser.add_argument('--at', help='snapshot time as YYYYmmdd_HHMMSS (default: latest)')
+    args = parser.parse_args(argv)
+
+    ts = datetime.strptime(args.at, '%Y%m%d_%H%M%S').timestamp() if args.at else None
+    export_from_store(args.formats, ts)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
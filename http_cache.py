@@ -0,0 +1,159 @@
+"""Disk-backed HTTP cache with conditional revalidation.
+
+Response bodies are stored as files under ``stock_data/http_cache/bodies``
+and their validators (``ETag``, ``Last-Modified``), store time, last access
+and size in a small SQLite index. A lookup is either
+
+- fresh: younger than the TTL of its endpoint, served without a request;
+- stale: revalidated with ``If-None-Match`` / ``If-Modified-Since``, where a
+  304 answer reuses the stored body and only resets its age.
+
+TTLs are configured per URL path prefix (the longest matching prefix wins).
+The cache is bounded in bytes and evicts least recently used entries.
+
+The scrapers stop reading a page once they have what they need, so a stored
+body may be only the prefix that was read; a 304 still vouches for it.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+CACHE_DIR = Path('stock_data') / 'http_cache'
+
+# URL path prefix -> seconds a response is served without revalidation
+DEFAULT_TTLS = {
+    '/symbol/': 15 * 60,
+    '/api/2/': 30,
+}
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    size: int
+
+
+class HttpCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=512 * 1024 * 1024, ttls=None, default_ttl=0):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        (self.root / 'bodies').mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.root / 'index.sqlite', check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, '
+            'stored_at REAL, accessed_at REAL, size INTEGER)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at)')
+        self._lock = threading.Lock()
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        # The limit may have been lowered since the last run
+        self._evict()
+
+    def _path(self, url):
+        return self.root / 'bodies' / (hashlib.sha1(url.encode('utf-8')).hexdigest() + '.bin')
+
+    def ttl_for(self, url):
+        path = urlsplit(url).path
+        matches = [prefix for prefix in self.ttls if path.startswith(prefix)]
+        return self.ttls[max(matches, key=len)] if matches else self.default_ttl
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._db.execute('SELECT url, etag, last_modified, stored_at, size FROM entries '
+                                   'WHERE url = ?', (url,)).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def is_fresh(self, entry, now=None):
+        now = time.time() if now is None else now
+        return now - entry.stored_at < self.ttl_for(entry.url)
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def load(self, entry):
+        """The stored body for ``entry``, or ``None`` if it has gone missing."""
+        try:
+            body = self._path(entry.url).read_bytes()
+        except FileNotFoundError:
+            self.delete(entry.url)
+            return None
+        with self._lock:
+            self._db.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (time.time(), entry.url))
+        return body
+
+    def store(self, url, body, headers):
+        """Keep ``body`` if the response carried something to revalidate with."""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return
+        if not (etag or last_modified or self.ttl_for(url)):
+            return
+
+        path = self._path(url)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                             (url, etag, last_modified, now, now, len(body)))
+            self._size += len(body) - (previous[0] if previous else 0)
+        self._evict()
+
+    def refresh(self, url, headers=None):
+        """Mark a stored entry as just validated (after a 304)."""
+        now = time.time()
+        headers = headers or {}
+        with self._lock:
+            self._db.execute(
+                'UPDATE entries SET stored_at = ?, accessed_at = ?, '
+                'etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?',
+                (now, now, headers.get('ETag'), headers.get('Last-Modified'), url)
+            )
+
+    def delete(self, url):
+        with self._lock:
+            row = self._db.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+            if row:
+                self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+                self._size -= row[0]
+        self._path(url).unlink(missing_ok=True)
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            with self._lock:
+                rows = self._db.execute('SELECT url FROM entries ORDER BY accessed_at LIMIT 64').fetchall()
+            if not rows:
+                break
+            for (url,) in rows:
+                self.delete(url)
+                if self._size <= self.max_bytes:
+                    break
+
+    @property
+    def size(self):
+        return self._size
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,192 @@
+"""Scrape instrumentation: stage timers, latency histograms and counters.
+
+Code under measurement records into the module-level :data:`METRICS`:
+
+    with METRICS.time('fetch', symbol):
+        ...
+    METRICS.inc('retries', symbol)
+
+Stages used by the scrapers are ``fetch`` (request or ``driver.get``),
+``render_wait`` (the fixed Chrome wait), ``extract`` and ``export``. Each
+stage feeds an HDR-style histogram (log-spaced buckets with a bounded
+relative error, so p99 stays exact to ~1% across microseconds to minutes),
+and the last duration per symbol and stage is kept as a gauge. Everything is
+rendered in the Prometheus text format, either to a textfile for the node
+exporter's textfile collector or from a local ``/metrics`` endpoint.
+"""
+import contextlib
+import logging
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+PREFIX = 'stocktwits'
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """Fixed-memory histogram of durations in seconds.
+
+    Bucket ``i`` covers ``lowest * (1 + precision) ** i`` up to the next
+    bound, so any recorded value is reported within ``precision`` of itself.
+    Values outside ``[lowest, highest]`` are clamped into the end buckets.
+    """
+
+    def __init__(self, lowest=1e-5, highest=3600.0, precision=0.01):
+        self.lowest = lowest
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.counts = np.zeros(int(math.log(highest / lowest) / self._log_base) + 2, dtype=np.int64)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def _index(self, value):
+        if value <= self.lowest:
+            return 0
+        return min(len(self.counts) - 1, int(math.log(value / self.lowest) / self._log_base) + 1)
+
+    def record(self, value):
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding quantile ``q`` (0..1)."""
+        with self._lock:
+            if self.total == 0:
+                return 0.0
+            rank = max(1, math.ceil(q * self.total))
+            index = int(np.searchsorted(np.cumsum(self.counts), rank))
+            maximum = self.max
+        return min(maximum, self.lowest * (1 + self.precision) ** index)
+
+
+def _labels(**labels):
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels.items() if value is not None)
+    return f'{{{pairs}}}' if pairs else ''
+
+
+class Metrics:
+    def __init__(self):
+        self.histograms = {}
+        # (name, symbol) -> count
+        self.counters = {}
+        # (symbol, stage) -> last seconds
+        self.last = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = LatencyHistogram()
+            return self.histograms[stage]
+
+    def observe(self, stage, seconds, symbol=None):
+        self.histogram(stage).record(seconds)
+        if symbol is not None:
+            with self._lock:
+                self.last[(symbol, stage)] = seconds
+
+    @contextlib.contextmanager
+    def time(self, stage, symbol=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, symbol)
+
+    def inc(self, name, symbol=None, value=1):
+        with self._lock:
+            self.counters[(name, symbol)] = self.counters.get((name, symbol), 0) + value
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+            last = dict(self.last)
+
+        if histograms:
+            name = f'{PREFIX}_stage_seconds'
+            lines.append(f'# HELP {name} Time spent per scrape stage.')
+            lines.append(f'# TYPE {name} summary')
+            for stage, histogram in sorted(histograms.items()):
+                for q in QUANTILES:
+                    lines.append(f'{name}{_labels(stage=stage, quantile=q)} {histogram.percentile(q):.6g}')
+                lines.append(f'{name}_sum{_labels(stage=stage)} {histogram.sum:.6g}')
+                lines.append(f'{name}_count{_labels(stage=stage)} {histogram.total}')
+
+        for counter in sorted({name for name, _ in counters}):
+            name = f'{PREFIX}_{counter}_total'
+            lines.append(f'# TYPE {name} counter')
+            for (key, symbol), value in sorted(counters.items(), key=lambda item: str(item[0])):
+                if key == counter:
+                    lines.append(f'{name}{_labels(symbol=symbol)} {value}')
+
+        if last:
+            name = f'{PREFIX}_symbol_stage_seconds'
+            lines.append(f'# HELP {name} Duration of the last run of each stage per symbol.')
+            lines.append(f'# TYPE {name} gauge')
+            for (symbol, stage), seconds in sorted(last.items()):
+                lines.append(f'{name}{_labels(symbol=symbol, stage=stage)} {seconds:.6g}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """Write atomically, as the node exporter's textfile collector expects."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(self.render())
+        os.replace(tmp, path)
+
+    def start_textfile_writer(self, path, interval=15.0):
+        """Rewrite ``path`` every ``interval`` seconds from a daemon thread."""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.write_textfile(path)
+                except OSError as e:
+                    logging.error('Error writing metrics to %s: %s', path, e)
+
+        threading.Thread(target=loop, name='metrics-textfile', daemon=True).start()
+        return stop
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve ``/metrics`` from a daemon thread; returns the server."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        logging.info('Serving metrics on http://%s:%d/metrics', host, server.server_address[1])
+        return server
+
+
+METRICS = Metrics()
@@ -0,0 +1,633 @@
+"""Streaming decoder for ``//blp/mktnews-content`` ContentT XML messages.
+
+The Curated Twitter Feed alone delivers about half a million
+``ContentT/StoryContent`` messages a day, so instead of building a DOM per
+message the decoder pulls ``end`` events from an incremental parser and
+fills a flat, typed :class:`NewsStory` as elements close:
+
+- tag names are interned module constants and fields are dispatched from
+  one table keyed by them;
+- repeated values (topic and ticker ids, wire names, events) are interned,
+  so a day of stories shares one copy of each;
+- ``Body``, ``SocialMediaInfo`` and ``Indicators`` are cut out of the byte
+  stream before it reaches the parser, so they are never tokenized (bodies
+  are most of a message, and Dow Jones HTML bodies are not even well-formed
+  XML); with ``body=True`` the raw body text is kept and attached.
+
+Consumers that only need the keys and numbers (SUID, arrival time, tickers,
+sentiment scores) use the :class:`StoryScores` projection instead, decoded
+from XML messages by :class:`XmlScoresDecoder` (the same dispatch, over a
+smaller table) or from a ``?format=json`` payload by
+:class:`JsonScoresDecoder`; both cover ``StoryContent`` and ``StoryAnalytics``
+messages.
+
+Feed a decoder one whole message at a time (``decode``) or arbitrary chunks
+of an archive file (``feed``)::
+
+    python mktnews.py archive.xml --limit 5
+"""
+import argparse
+import json
+import re
+import sys
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+from xml.sax.saxutils import unescape
+
+# Tag names
+CONTENT_T = sys.intern('ContentT')
+STORY_CONTENT = sys.intern('StoryContent')
+SUID = sys.intern('SUID')
+EVENT = sys.intern('Event')
+BODY = sys.intern('Body')
+BODY_TEXT_TYPE = sys.intern('BodyTextType')
+VERSION = sys.intern('Version')
+WIRE_ID = sys.intern('WireId')
+CLASS_NUM = sys.intern('ClassNum')
+WIRE_NAME = sys.intern('WireName')
+HEADLINE = sys.intern('Headline')
+TIME_OF_ARRIVAL = sys.intern('TimeOfArrival')
+TIME_OF_UPDATE = sys.intern('TimeOfUpdate')
+HEADLINE_CLUSTER_ID = sys.intern('HeadlineClusterId')
+TOPIC_CLUSTER_ID = sys.intern('TopicClusterId')
+LANGUAGE_ID = sys.intern('LanguageId')
+LANGUAGE_STRING = sys.intern('LanguageString')
+HOT_LEVEL = sys.intern('HotLevel')
+SCORED_ENTITY = sys.intern('ScoredEntity')
+ID = sys.intern('Id')
+SCORE = sys.intern('Score')
+BLOOMBERG_ENTITY_ID = sys.intern('BloombergEntityId')
+SECURITY_FIGI = sys.intern('SecurityFigi')
+ASSIGNED_TICKERS = sys.intern('AssignedTickers')
+DERIVED_TICKERS = sys.intern('DerivedTickers')
+ASSIGNED_TOPICS = sys.intern('AssignedTopics')
+DERIVED_TOPICS = sys.intern('DerivedTopics')
+STORY = sys.intern('Story')
+METADATA = sys.intern('Metadata')
+STORY_ANALYTICS = sys.intern('StoryAnalytics')
+STRUCTURED_SCORE_LIST = sys.intern('StructuredScoreList')
+STRUCTURED_SCORE = sys.intern('StructuredScore')
+ANALYTICS_TYPE = sys.intern('AnalyticsType')
+CONFIDENCE = sys.intern('Confidence')
+ENTITY_ID = sys.intern('EntityId')
+ENTITY_TYPE = sys.intern('EntityType')
+
+
+class ScoredEntity(NamedTuple):
+    id: str
+    score: Optional[int] = None
+    bloomberg_entity_id: Optional[str] = None
+    security_figi: Optional[str] = None
+
+
+class NewsStory(NamedTuple):
+    suid: str
+    event: Optional[str] = None
+    version: Optional[str] = None
+    wire_id: Optional[int] = None
+    wire_name: Optional[str] = None
+    class_num: Optional[int] = None
+    headline: Optional[str] = None
+    # Epoch milliseconds, UTC
+    time_of_arrival: Optional[int] = None
+    time_of_update: Optional[int] = None
+    language_id: Optional[int] = None
+    language: Optional[str] = None
+    hot_level: Optional[int] = None
+    headline_cluster_id: Optional[str] = None
+    topic_cluster_id: Optional[str] = None
+    assigned_tickers: Tuple[ScoredEntity, ...] = ()
+    derived_tickers: Tuple[ScoredEntity, ...] = ()
+    assigned_topics: Tuple[ScoredEntity, ...] = ()
+    derived_topics: Tuple[ScoredEntity, ...] = ()
+    body_text_type: Optional[str] = None
+    body: Optional[str] = None
+
+
+class StructuredScore(NamedTuple):
+    entity_id: str
+    score: Optional[int] = None
+    # 0-100 for company sentiment, a probability for market moving news
+    confidence: Optional[float] = None
+    entity_type: Optional[str] = None
+    bloomberg_entity_id: Optional[str] = None
+    security_figi: Optional[str] = None
+    language_id: Optional[int] = None
+    analytics_type: Optional[str] = None
+
+
+class StoryScores(NamedTuple):
+    """The slim projection of a story or analytics message (see ``SCORE_FIELDS``)."""
+    suid: str
+    time_of_arrival: Optional[int] = None
+    # Assigned tickers, then derived ones
+    tickers: Tuple[ScoredEntity, ...] = ()
+    scores: Tuple[StructuredScore, ...] = ()
+    # Story identity for de-duplication (news messages only)
+    event: Optional[str] = None
+    time_of_update: Optional[int] = None
+    headline_cluster_id: Optional[str] = None
+    topic_cluster_id: Optional[str] = None
+
+
+# Decoded by default; ``DEDUP_FIELDS`` on request
+SCORE_FIELDS = ('suid', 'time_of_arrival', 'tickers', 'scores')
+DEDUP_FIELDS = ('event', 'time_of_update', 'headline_cluster_id', 'topic_cluster_id')
+
+
+def epoch_ms(text):
+    return int(round(datetime.fromisoformat(text).timestamp() * 1000))
+
+
+# Leaf tag -> (NewsStory field, conversion of the element text)
+_FIELDS = {
+    SUID: ('suid', str),
+    EVENT: ('event', sys.intern),
+    VERSION: ('version', sys.intern),
+    WIRE_ID: ('wire_id', int),
+    CLASS_NUM: ('class_num', int),
+    WIRE_NAME: ('wire_name', sys.intern),
+    HEADLINE: ('headline', str),
+    TIME_OF_ARRIVAL: ('time_of_arrival', epoch_ms),
+    TIME_OF_UPDATE: ('time_of_update', epoch_ms),
+    LANGUAGE_ID: ('language_id', int),
+    LANGUAGE_STRING: ('language', sys.intern),
+    HOT_LEVEL: ('hot_level', int),
+    HEADLINE_CLUSTER_ID: ('headline_cluster_id', str),
+    TOPIC_CLUSTER_ID: ('topic_cluster_id', str),
+    BODY_TEXT_TYPE: ('body_text_type', sys.intern),
+}
+# Container tag -> NewsStory field holding its ScoredEntity children
+_ENTITY_LISTS = {
+    ASSIGNED_TICKERS: 'assigned_tickers',
+    DERIVED_TICKERS: 'derived_tickers',
+    ASSIGNED_TOPICS: 'assigned_topics',
+    DERIVED_TOPICS: 'derived_topics',
+}
+# Everything the decoder reacts to, in one table: ``end`` events for any
+# other tag cost a single dict miss
+_BODY_END, _STORY_END, _MESSAGE_END = 0, 1, 2
+_ACTIONS = {**_FIELDS, **_ENTITY_LISTS, BODY: _BODY_END, STORY_CONTENT: _STORY_END, CONTENT_T: _MESSAGE_END}
+
+# Subtrees none of the fields live in; cut from the bytes before parsing
+SKIPPED = (BODY, sys.intern('SocialMediaInfo'), sys.intern('Indicators'))
+_BODY_CLOSE = b'</Body>'
+
+
+class _Cutter:
+    """Removes ``skipped`` elements from a chunked XML byte stream.
+
+    A cut ``Body`` leaves an empty ``<Body/>`` behind; with ``keep_body`` its
+    raw text is queued in document order for the decoder to pick up.
+    """
+
+    def __init__(self, keep_body=False, skipped=SKIPPED):
+        self.keep_body = keep_body
+        self._open = re.compile(rb'<(' + b'|'.join(t.encode() for t in skipped) + rb')[\s/>]')
+        self._longest = max(map(len, skipped)) + 2
+        self.bodies = deque()
+        self.reset()
+
+    def reset(self):
+        self.bodies.clear()
+        self._tail = b''
+        # Closing tag of the element being cut, or None outside one
+        self._closing = None
+        self._parts = []
+
+    def feed(self, data):
+        data = self._tail + data
+        self._tail = b''
+        out = []
+        pos = 0
+        size = len(data)
+        while pos < size:
+            if self._closing is None:
+                match = self._open.search(data, pos)
+                if match is None:
+                    # Hold back what may be the start of a skipped tag
+                    held = data.rfind(b'<', max(pos, size - self._longest))
+                    end = held if held >= 0 else size
+                    out.append(data[pos:end])
+                    self._tail = data[end:]
+                    break
+                start = match.start()
+                close = data.find(b'>', match.end() - 1)
+                if close < 0:
+                    out.append(data[pos:start])
+                    self._tail = data[start:]
+                    break
+                if data[close - 1:close] == b'/':
+                    # Already empty
+                    out.append(data[pos:close + 1])
+                    pos = close + 1
+                    continue
+                out.append(data[pos:start])
+                self._closing = b'</' + match.group(1) + b'>'
+                pos = close + 1
+            else:
+                keep = self.keep_body and self._closing == _BODY_CLOSE
+                end = data.find(self._closing, pos)
+                if end < 0:
+                    held = max(pos, size - len(self._closing) + 1)
+                    if keep:
+                        self._parts.append(data[pos:held])
+                    self._tail = data[held:]
+                    break
+                if self._closing == _BODY_CLOSE:
+                    if keep:
+                        self._parts.append(data[pos:end])
+                        self.bodies.append(b''.join(self._parts))
+                        self._parts = []
+                    # Only now, so the decoder never sees a Body before its text
+                    out.append(b'<Body/>')
+                pos = end + len(self._closing)
+                self._closing = None
+        return b''.join(out)
+
+    def close(self):
+        tail, self._tail = self._tail, b''
+        return tail if self._closing is None else b''
+
+
+def _body_text(raw):
+    text = raw.decode('utf-8', errors='replace').strip()
+    if text.startswith('<![CDATA[') and text.endswith(']]>'):
+        return text[9:-3]
+    return unescape(text, {'&apos;': "'", '&quot;': '"'})
+
+
+def _scored_entities(container):
+    entities = []
+    # find* with a plain tag name stays in C
+    for elem in container.findall(SCORED_ENTITY):
+        entity_id = elem.findtext(ID)
+        if entity_id is None:
+            continue
+        score = elem.findtext(SCORE)
+        bloomberg_id = elem.findtext(BLOOMBERG_ENTITY_ID)
+        figi = elem.findtext(SECURITY_FIGI)
+        entities.append(ScoredEntity(
+            sys.intern(entity_id.strip()),
+            int(score) if score else None,
+            sys.intern(bloomberg_id.strip()) if bloomberg_id else None,
+            sys.intern(figi.strip()) if figi else None,
+        ))
+    return tuple(entities)
+
+
+class _PullDecoder:
+    """``end`` events of an incremental parser, dispatched by ``_collect``.
+
+    ``feed``/``close`` take an archive or any byte chunks of one; ``decode``
+    takes one complete message at a time, each with a fresh parser. An
+    instance serves one mode or the other.
+    """
+
+    # Subtrees cut from the bytes before parsing
+    _skipped = SKIPPED
+
+    def __init__(self, keep_body=False):
+        self._cutter = _Cutter(keep_body, self._skipped)
+        self._parser = ET.XMLPullParser(events=('end',))
+
+    def feed(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._parser.feed(self._cutter.feed(data))
+        return self._collect(self._parser)
+
+    def close(self):
+        self._parser.feed(self._cutter.close())
+        self._parser.close()
+        return self._collect(self._parser)
+
+    def decode(self, message):
+        """The stories of one complete message."""
+        self._cutter.reset()
+        self._reset()
+        self._parser = ET.XMLPullParser(events=('end',))
+        return self.feed(message) + self.close()
+
+
+class ContentDecoder(_PullDecoder):
+    """Incremental ContentT decoder; ``feed`` returns the stories completed so far.
+
+    Accepts a single message, an ``<Archive>`` of many, or any byte chunks of
+    either; for a stream of separate messages call ``decode`` on each.
+    Messages without ``StoryContent`` (e.g. ``StoryAnalytics``) are skipped.
+    """
+
+    def __init__(self, body=False):
+        super().__init__(keep_body=body)
+        self.body = body
+        self._fields = {}
+
+    def _reset(self):
+        self._fields = {}
+        self._cutter.bodies.clear()
+
+    def _collect(self, parser):
+        stories = []
+        fields = self._fields
+        actions = _ACTIONS
+        for _, elem in parser.read_events():
+            action = actions.get(elem.tag)
+            if action is None:
+                continue
+            if type(action) is tuple:
+                text = elem.text
+                if text is not None:
+                    fields[action[0]] = action[1](text)
+            elif type(action) is str:
+                fields[action] = _scored_entities(elem)
+            elif action == _BODY_END:
+                if self.body and self._cutter.bodies:
+                    fields['body'] = _body_text(self._cutter.bodies.popleft())
+            else:
+                if action == _STORY_END and 'suid' in fields:
+                    stories.append(NewsStory(**fields))
+                # Anything collected outside a StoryContent belongs to no story
+                fields = self._fields = {}
+                elem.clear()
+        return stories
+
+
+def decode(message, body=False):
+    """All stories in one complete message (usually exactly one).
+
+    For a stream of messages keep one :class:`ContentDecoder` and call its
+    ``decode`` instead.
+    """
+    decoder = ContentDecoder(body)
+    return decoder.feed(message) + decoder.close()
+
+
+def iter_file(path, body=False, chunk_size=1 << 16):
+    """Stories from an XML file (an ``<Archive>`` or a single message), streamed."""
+    decoder = ContentDecoder(body)
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+def _score_fields(fields):
+    fields = frozenset(fields)
+    if not fields <= set(StoryScores._fields):
+        raise ValueError(f"fields must be among {StoryScores._fields}")
+    return fields
+
+
+def _structured_scores(score_list):
+    analytics_type = score_list.findtext(ANALYTICS_TYPE)
+    analytics_type = sys.intern(analytics_type.strip()) if analytics_type else None
+    scores = []
+    for elem in score_list.findall(STRUCTURED_SCORE):
+        entity_id = elem.findtext(ENTITY_ID)
+        if not entity_id:
+            continue
+        score = elem.findtext(SCORE)
+        confidence = elem.findtext(CONFIDENCE)
+        entity_type = elem.findtext(ENTITY_TYPE)
+        bloomberg_id = elem.findtext(BLOOMBERG_ENTITY_ID)
+        figi = elem.findtext(SECURITY_FIGI)
+        language_id = elem.findtext(LANGUAGE_ID)
+        scores.append(StructuredScore(
+            sys.intern(entity_id.strip()),
+            int(score) if score else None,
+            float(confidence) if confidence else None,
+            sys.intern(entity_type.strip()) if entity_type else None,
+            sys.intern(bloomberg_id.strip()) if bloomberg_id else None,
+            sys.intern(figi.strip()) if figi else None,
+            int(language_id) if language_id else None,
+            analytics_type,
+        ))
+    return scores
+
+
+# Story-level fields looked up by tag: (StoryScores field, tag, conversion)
+_STORY_TEXT = (
+    ('time_of_update', TIME_OF_UPDATE, epoch_ms),
+    ('headline_cluster_id', HEADLINE_CLUSTER_ID, str),
+    ('topic_cluster_id', TOPIC_CLUSTER_ID, str),
+)
+# XmlScoresDecoder actions besides (field, conversion) leaves
+_ASSIGNED, _DERIVED, _SCORE_LIST, _ITEM_END = 3, 4, 5, 6
+
+
+class XmlScoresDecoder(_PullDecoder):
+    """``StoryScores`` from XML messages, materializing only ``fields``.
+
+    Same dispatch as :class:`ContentDecoder`, from a table holding just the
+    tags the requested fields live in. Handles both ``StoryContent`` (news:
+    tickers) and ``StoryAnalytics`` (sentiment, market moving news:
+    structured scores); ``suid`` is always filled in.
+    """
+
+    # Topic lists are most of an analytics message and no field needs them
+    _skipped = SKIPPED + (ASSIGNED_TOPICS, DERIVED_TOPICS)
+
+    def __init__(self, fields=SCORE_FIELDS):
+        super().__init__()
+        self.fields = _score_fields(fields)
+        actions = {SUID: ('suid', str.strip), STORY_CONTENT: _ITEM_END, STORY_ANALYTICS: _ITEM_END,
+                   CONTENT_T: _MESSAGE_END}
+        if 'time_of_arrival' in self.fields:
+            actions[TIME_OF_ARRIVAL] = ('time_of_arrival', _strip_then(epoch_ms))
+        if 'tickers' in self.fields:
+            actions.update({ASSIGNED_TICKERS: _ASSIGNED, DERIVED_TICKERS: _DERIVED})
+        if 'scores' in self.fields:
+            actions[STRUCTURED_SCORE_LIST] = _SCORE_LIST
+        if 'event' in self.fields:
+            actions[EVENT] = ('event', _strip_then(sys.intern))
+        for name, tag, convert in _STORY_TEXT:
+            if name in self.fields:
+                # A child of Story, in some feeds of its Metadata
+                actions[tag] = (name, _strip_then(convert))
+        self._actions = actions
+        self._reset()
+
+    def _reset(self):
+        self._record = {}
+        self._assigned = []
+        self._derived = []
+        self._scores = []
+
+    def _collect(self, parser):
+        stories = []
+        record = self._record
+        actions = self._actions
+        for _, elem in parser.read_events():
+            action = actions.get(elem.tag)
+            if action is None:
+                continue
+            if type(action) is tuple:
+                text = elem.text
+                if text and not text.isspace():
+                    record[action[0]] = action[1](text)
+            elif action == _ASSIGNED:
+                self._assigned.extend(_scored_entities(elem))
+            elif action == _DERIVED:
+                self._derived.extend(_scored_entities(elem))
+            elif action == _SCORE_LIST:
+                self._scores.extend(_structured_scores(elem))
+            else:
+                if action == _ITEM_END and record.get('suid'):
+                    for name in ('time_of_arrival', 'event', *(field[0] for field in _STORY_TEXT)):
+                        if name in self.fields:
+                            record.setdefault(name, None)
+                    if 'tickers' in self.fields:
+                        # Assigned first, whatever the document order
+                        record['tickers'] = tuple(self._assigned + self._derived)
+                    if 'scores' in self.fields:
+                        record['scores'] = tuple(self._scores)
+                    stories.append(StoryScores(**record))
+                self._reset()
+                record = self._record
+                if action == _MESSAGE_END:
+                    elem.clear()
+        return stories
+
+
+def _strip_then(convert):
+    return lambda text: convert(text.strip())
+
+
+def scores_from_xml(message, fields=SCORE_FIELDS):
+    """``StoryScores`` of one XML message; see :class:`XmlScoresDecoder`."""
+    return XmlScoresDecoder(fields).decode(message)
+
+
+def _items(value):
+    # JSON renders a repeated element as a list and a single one as an object
+    if value is None:
+        return ()
+    return value if isinstance(value, list) else (value,)
+
+
+def _json_text(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+class JsonScoresDecoder:
+    """Schema-aware decoder for ``?format=json`` message payloads.
+
+    The payload layout is assumed, not documented: the feed docs only say
+    that ``?format=json`` exists and show no JSON message. The decoder
+    expects the XML schema rendered key for key (one key per element, an
+    object or a list for repeated elements, text or numbers as values) and
+    has not been checked against a recorded payload; ``tests/data`` holds
+    hand transcriptions of the documented XML examples in this layout.
+    The document is parsed by the C ``json`` scanner and
+    only the paths of the requested ``fields`` are visited and converted;
+    bodies, topics and everything else are left as parsed. Returns the same
+    ``StoryScores`` as :func:`scores_from_xml`.
+    """
+
+    def __init__(self, fields=SCORE_FIELDS):
+        fields = _score_fields(fields)
+        self.time_of_arrival = 'time_of_arrival' in fields
+        self.tickers = 'tickers' in fields
+        self.scores = 'scores' in fields
+        self.event = 'event' in fields
+        self.story_text = [field for field in _STORY_TEXT if field[0] in fields]
+
+    def decode(self, payload):
+        doc = json.loads(payload)
+        content = doc.get(CONTENT_T, doc)
+        stories = []
+        for kind in (STORY_CONTENT, STORY_ANALYTICS):
+            for item in _items(content.get(kind)):
+                suid = _json_text((item.get('Id') or {}).get(SUID))
+                if not suid:
+                    continue
+                story = item.get(STORY, item)
+                record = {'suid': suid}
+                if self.time_of_arrival:
+                    arrival = (story.get(METADATA) or {}).get(TIME_OF_ARRIVAL)
+                    record['time_of_arrival'] = epoch_ms(arrival.strip()) if arrival else None
+                if self.tickers:
+                    record['tickers'] = self._tickers(story)
+                if self.scores:
+                    record['scores'] = self._scores(story)
+                if self.event:
+                    event = _json_text(item.get(EVENT))
+                    record['event'] = sys.intern(event) if event else None
+                for name, tag, convert in self.story_text:
+                    text = _json_text(story.get(tag) or (story.get(METADATA) or {}).get(tag))
+                    record[name] = convert(text) if text else None
+                stories.append(StoryScores(**record))
+        return stories
+
+    @staticmethod
+    def _tickers(story):
+        tickers = []
+        for tag in (ASSIGNED_TICKERS, DERIVED_TICKERS):
+            for container in _items(story.get(tag)):
+                for entity in _items(container.get(SCORED_ENTITY)):
+                    entity_id = _json_text(entity.get(ID))
+                    if not entity_id:
+                        continue
+                    score = entity.get(SCORE)
+                    bloomberg_id = _json_text(entity.get(BLOOMBERG_ENTITY_ID))
+                    figi = _json_text(entity.get(SECURITY_FIGI))
+                    tickers.append(ScoredEntity(
+                        sys.intern(entity_id),
+                        int(score) if score not in (None, '') else None,
+                        sys.intern(bloomberg_id) if bloomberg_id else None,
+                        sys.intern(figi) if figi else None,
+                    ))
+        return tuple(tickers)
+
+    @staticmethod
+    def _scores(story):
+        scores = []
+        for score_list in _items(story.get(STRUCTURED_SCORE_LIST)):
+            analytics_type = _json_text(score_list.get(ANALYTICS_TYPE))
+            analytics_type = sys.intern(analytics_type) if analytics_type else None
+            for elem in _items(score_list.get(STRUCTURED_SCORE)):
+                entity_id = _json_text(elem.get(ENTITY_ID))
+                if not entity_id:
+                    continue
+                score = elem.get(SCORE)
+                confidence = elem.get(CONFIDENCE)
+                entity_type = _json_text(elem.get(ENTITY_TYPE))
+                bloomberg_id = _json_text(elem.get(BLOOMBERG_ENTITY_ID))
+                figi = _json_text(elem.get(SECURITY_FIGI))
+                language_id = elem.get(LANGUAGE_ID)
+                scores.append(StructuredScore(
+                    sys.intern(entity_id),
+                    int(score) if score not in (None, '') else None,
+                    float(confidence) if confidence not in (None, '') else None,
+                    sys.intern(entity_type) if entity_type else None,
+                    sys.intern(bloomberg_id) if bloomberg_id else None,
+                    sys.intern(figi) if figi else None,
+                    int(language_id) if language_id not in (None, '') else None,
+                    analytics_type,
+                ))
+        return tuple(scores)
+
+
+def scores_from_json(payload, fields=SCORE_FIELDS):
+    """``StoryScores`` of one JSON message; see :class:`JsonScoresDecoder`."""
+    return JsonScoresDecoder(fields).decode(payload)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Decode mktnews ContentT XML')
+    parser.add_argument('path', help='XML file: one message or an <Archive> of them')
+    parser.add_argument('--body', action='store_true', help='also decode story bodies')
+    parser.add_argument('--limit', type=int, help='print at most N stories')
+    args = parser.parse_args(argv)
+
+    for count, story in enumerate(iter_file(args.path, args.body)):
+        if args.limit is not None and count >= args.limit:
+            break
+        print(story)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Time-windowed de-duplication of news stories.
+
+A story reaches us several times: ``ADD_1STPASS`` then ``ADD_STORY`` then
+``UPDATE_ATTRIBUTE`` events under one SUID, and copies of it on other wires
+under new SUIDs that share its ``HeadlineClusterId`` / ``TopicClusterId``.
+:class:`StoryIndex` sits in front of the NLP and scoring stages and sorts
+every incoming record into
+
+- ``NEW``: first sighting, pass it on;
+- ``UPDATE``: a later version of a story already passed on; it replaces the
+  stored one, downstream should upsert by SUID;
+- ``DUPLICATE``: a replay or an older version of a known SUID, or another
+  wire's copy of a known cluster; drop it.
+
+Memory is bounded by the window: stories live in a dict keyed by SUID (plus
+one dict per cluster key pointing back to the SUID that registered each
+cluster id, from any of its versions), and a time-ordered ring
+of ``(arrival, suid)`` retires them ``hours`` after their last version
+arrived, or earlier once ``max_stories`` are held.
+
+Works on ``mktnews.NewsStory`` and on ``StoryScores`` decoded with
+``DEDUP_FIELDS``; fields a record lacks are skipped::
+
+    python news_dedup.py archive.xml --hours 24
+"""
+import argparse
+import logging
+import time
+from collections import Counter, deque
+
+from mktnews import iter_file
+
+NEW, UPDATE, DUPLICATE = 'new', 'update', 'duplicate'
+CLUSTER_KEYS = ('headline_cluster_id', 'topic_cluster_id')
+# Later passes of a story outrank earlier ones at the same timestamp
+EVENT_RANK = {'ADD_1STPASS': 0, 'ADD_STORY': 1, 'UPDATE_ATTRIBUTE': 2}
+
+
+def version_key(story):
+    """Sort key of a story's versions: newest update time, then latest pass."""
+    stamp = getattr(story, 'time_of_update', None)
+    if stamp is None:
+        stamp = getattr(story, 'time_of_arrival', None) or 0
+    return stamp, EVENT_RANK.get(getattr(story, 'event', None), 1)
+
+
+class StoryIndex:
+    def __init__(self, hours=24.0, cluster_keys=CLUSTER_KEYS, max_stories=None):
+        self.window_ms = int(hours * 3600 * 1000)
+        self.cluster_keys = tuple(cluster_keys)
+        self.max_stories = max_stories
+        # suid -> (latest version, arrival ms of its ring entry)
+        self._stories = {}
+        # cluster key -> {cluster id -> suid}
+        self._clusters = {key: {} for key in self.cluster_keys}
+        # suid -> [(cluster key, cluster id)] it registered, across its versions
+        self._registered = {}
+        # (arrival ms, suid) in arrival order; superseded entries are skipped on eviction
+        self._ring = deque()
+        self._watermark = 0
+        self.counts = Counter()
+
+    def __len__(self):
+        return len(self._stories)
+
+    def __contains__(self, suid):
+        return suid in self._stories
+
+    def get(self, suid):
+        """Latest version of ``suid`` still in the window, or None."""
+        entry = self._stories.get(suid)
+        return entry[0] if entry else None
+
+    def offer(self, story, now=None):
+        """Classify ``story`` as ``NEW``, ``UPDATE`` or ``DUPLICATE`` and index it.
+
+        ``now`` (epoch ms) stands in for records without ``time_of_arrival``.
+        """
+        arrival = getattr(story, 'time_of_arrival', None)
+        if arrival is None:
+            arrival = int(time.time() * 1000) if now is None else now
+        if arrival > self._watermark:
+            self._watermark = arrival
+            self._evict(arrival - self.window_ms)
+
+        verdict = self._classify(story)
+        if verdict is not DUPLICATE:
+            self._stories[story.suid] = (story, arrival)
+            self._ring.append((arrival, story.suid))
+            # Updates too: a cluster id may first appear on a later version
+            registered = self._registered.setdefault(story.suid, [])
+            for key, clusters in self._clusters.items():
+                value = getattr(story, key, None)
+                if value and value not in clusters:
+                    clusters[value] = story.suid
+                    registered.append((key, value))
+            if self.max_stories is not None:
+                while len(self._stories) > self.max_stories:
+                    self._pop_oldest()
+        self.counts[verdict] += 1
+        return verdict
+
+    def filter(self, stories, now=None):
+        """The stories downstream should process (``NEW`` and ``UPDATE``), in order."""
+        for story in stories:
+            if self.offer(story, now) is not DUPLICATE:
+                yield story
+
+    def _classify(self, story):
+        current = self._stories.get(story.suid)
+        if current is not None:
+            return UPDATE if version_key(story) > version_key(current[0]) else DUPLICATE
+        for key, clusters in self._clusters.items():
+            value = getattr(story, key, None)
+            if value and clusters.get(value, story.suid) != story.suid:
+                return DUPLICATE
+        return NEW
+
+    def _evict(self, cutoff):
+        ring = self._ring
+        while ring and ring[0][0] < cutoff:
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        arrival, suid = self._ring.popleft()
+        entry = self._stories.get(suid)
+        # An update re-queued the story under a later arrival
+        if entry is None or entry[1] != arrival:
+            return
+        del self._stories[suid]
+        for key, value in self._registered.pop(suid, ()):
+            del self._clusters[key][value]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='De-duplicate the stories of mktnews XML archives')
+    parser.add_argument('paths', nargs='+', help='XML archives, in time order')
+    parser.add_argument('--hours', type=float, default=24.0, help='de-duplication window')
+    parser.add_argument('--max-stories', type=int, help='cap on stories held in the window')
+    parser.add_argument('--keys', nargs='*', choices=CLUSTER_KEYS, default=list(CLUSTER_KEYS),
+                        help='cluster ids that mark cross-wire copies')
+    args = parser.parse_args(argv)
+
+    index = StoryIndex(args.hours, args.keys, args.max_stories)
+    started = time.perf_counter()
+    for path in args.paths:
+        for story in iter_file(path):
+            index.offer(story)
+    total = sum(index.counts.values())
+    logging.info('%d stories in %.1fs: %d new, %d updates, %d duplicates; %d held in the window',
+                 total, time.perf_counter() - started, index.counts[NEW], index.counts[UPDATE],
+                 index.counts[DUPLICATE], len(index))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,320 @@
+"""Inverted index on the tickers and topics of news stories.
+
+Answers queries like "stories on NVDA with an ERN topic score >= 70 in the
+last hour" without scanning the stream. Every indexed story gets a doc id
+(its position in arrival order); every ``(kind, id)`` term (``ticker``/``topic``)
+is interned to a term id that owns a sorted posting list of doc ids plus the
+story's score for that term. Assigned and derived entities are merged, keeping
+the higher score.
+
+- ``NewsIndex`` is the live index: ``add`` appends a story in O(entities);
+- ``search`` intersects (``all_of``) and unions (``any_of``) posting lists,
+  smallest first, after dropping the docs outside ``start``..``end``;
+- ``write_segment`` freezes the index into a directory of flat arrays (a day
+  of history, say) that ``IndexSegment`` memory-maps and searches the same way.
+
+Segment layout::
+
+    20250205/time.i8        arrival, epoch ms, per doc (docs sorted by time)
+    20250205/suids.json     SUID per doc
+    20250205/terms.json     [kind, id] per term id
+    20250205/offsets.i8     posting list bounds per term id (CSR)
+    20250205/docs.i4        concatenated posting lists
+    20250205/scores.i1      score per posting
+
+    python news_index.py archive.xml --all ticker:NVDA topic:ERN:70 --hours 1
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from mktnews import iter_file
+
+INDEX_DIR = Path('stock_data') / 'news_index'
+KINDS = ('ticker', 'topic')
+
+
+def story_terms(story):
+    """``{(kind, id): score}`` of a story (``NewsStory`` or ``StoryScores``)."""
+    terms = {}
+    tickers = getattr(story, 'tickers', None)
+    if tickers is None:
+        tickers = story.assigned_tickers + story.derived_tickers
+    topics = getattr(story, 'assigned_topics', ()) + getattr(story, 'derived_topics', ())
+    for kind, entities in (('ticker', tickers), ('topic', topics)):
+        for entity in entities:
+            key = (kind, entity.id)
+            score = entity.score or 0
+            if terms.get(key, -1) < score:
+                terms[key] = score
+    return terms
+
+
+def intersect(postings):
+    """Doc ids present in every sorted posting list."""
+    postings = sorted(postings, key=len)
+    if not postings:
+        return np.empty(0, dtype=np.int32)
+    result = postings[0]
+    for docs in postings[1:]:
+        if not len(result):
+            break
+        result = np.intersect1d(result, docs, assume_unique=True)
+    return result
+
+
+def union(postings):
+    """Doc ids present in any of the posting lists, sorted."""
+    postings = [docs for docs in postings if len(docs)]
+    if not postings:
+        return np.empty(0, dtype=np.int32)
+    return np.unique(np.concatenate(postings))
+
+
+def parse_term(text):
+    """``ticker:NVDA`` or ``topic:ERN:70`` -> ``(kind, id, min_score)``."""
+    kind, _, rest = text.partition(':')
+    if kind not in KINDS or not rest:
+        raise ValueError(f"terms look like ticker:NVDA or topic:ERN:70, not {text!r}")
+    term, _, min_score = rest.partition(':')
+    return kind, term, int(min_score) if min_score else None
+
+
+class _Searchable:
+    """Query side shared by the live index and frozen segments.
+
+    Subclasses provide ``term_ids``, ``times`` (ms per doc), ``suids`` and
+    ``_posting(term_id) -> (docs, scores)``.
+    """
+
+    def postings(self, kind, term, min_score=None, start=None, end=None):
+        """Sorted doc ids of ``term``, optionally by score and time (epoch ms)."""
+        term_id = self.term_ids.get((kind, term))
+        if term_id is None:
+            return np.empty(0, dtype=np.int32)
+        docs, scores = self._posting(term_id)
+        lo, hi = self._doc_range(start, end)
+        # Doc ids are sorted, so the time bounds are a slice of the list
+        first, last = np.searchsorted(docs, (lo, hi))
+        docs, scores = docs[first:last], scores[first:last]
+        keep = None
+        if min_score is not None:
+            keep = scores >= min_score
+        if not self._sorted_times and (start is not None or end is not None):
+            times = self._time_bounds()[0][docs]
+            in_range = np.ones(len(docs), dtype=bool)
+            if start is not None:
+                in_range &= times >= start
+            if end is not None:
+                in_range &= times <= end
+            keep = in_range if keep is None else keep & in_range
+        return np.asarray(docs if keep is None else docs[keep], dtype=np.int32)
+
+    def search(self, all_of=(), any_of=(), start=None, end=None):
+        """Doc ids matching every ``all_of`` term and, if given, at least one ``any_of`` term.
+
+        Terms are ``(kind, id)`` or ``(kind, id, min_score)`` tuples.
+        """
+        if not all_of and not any_of:
+            raise ValueError("search needs at least one term")
+        parts = [self.postings(*term, start=start, end=end) for term in all_of]
+        if any_of:
+            parts.append(union(self.postings(*term, start=start, end=end) for term in any_of))
+        return intersect(parts)
+
+    def stories(self, docs):
+        """``(suid, time_of_arrival)`` of the given doc ids."""
+        times = self._time_bounds()[0]
+        return [(self.suids[doc], int(times[doc])) for doc in docs]
+
+    def _doc_range(self, start, end):
+        n = len(self.suids)
+        if not n:
+            return 0, 0
+        _, lo, hi = self._time_bounds()
+        first = 0 if start is None else int(np.searchsorted(lo, start, 'left'))
+        last = n if end is None else int(np.searchsorted(hi, end, 'right'))
+        return first, last
+
+    def __len__(self):
+        return len(self.suids)
+
+
+class _Column:
+    """Append-only array with amortized O(1) appends; ``values`` is a read-only view."""
+
+    def __init__(self, dtype, capacity=4):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def append(self, value):
+        if self._size == len(self._data):
+            grown = np.empty(2 * len(self._data), dtype=self._data.dtype)
+            grown[:self._size] = self._data
+            # Views handed out earlier keep the old buffer, whose rows never change
+            self._data = grown
+        self._data[self._size] = value
+        self._size += 1
+
+    @property
+    def values(self):
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self):
+        return self._size
+
+
+class NewsIndex(_Searchable):
+    """Live inverted index; ``add`` stories as they arrive."""
+
+    _sorted_times = False
+
+    def __init__(self):
+        self.term_ids = {}
+        self.terms = []
+        self.suids = []
+        self._times = _Column(np.int64, 1024)
+        # Arrivals are only roughly ordered: a running max bounds the docs
+        # that can be >= start, a running min from the end those <= end
+        self._max = _Column(np.int64, 1024)
+        self._min = _Column(np.int64, 1024)
+        self._docs = []
+        self._scores = []
+
+    @property
+    def times(self):
+        return self._times.values
+
+    def add(self, story, now=None):
+        """Index one story; returns its doc id."""
+        arrival = story.time_of_arrival
+        if arrival is None:
+            arrival = int(time.time() * 1000) if now is None else now
+        doc = len(self.suids)
+        self.suids.append(story.suid)
+        self._times.append(arrival)
+        self._max.append(max(arrival, self._max._data[doc - 1]) if doc else arrival)
+        # The running min from the end is non-decreasing; only its tail above
+        # ``arrival`` changes, which for roughly ordered arrivals is a few docs
+        self._min.append(arrival)
+        suffix_min = self._min._data
+        suffix_min[np.searchsorted(suffix_min[:doc], arrival, 'right'):doc] = arrival
+        for key, score in story_terms(story).items():
+            term_id = self.term_ids.get(key)
+            if term_id is None:
+                term_id = self.term_ids[key] = len(self.terms)
+                self.terms.append(key)
+                self._docs.append(_Column(np.int32))
+                self._scores.append(_Column(np.int8))
+            self._docs[term_id].append(doc)
+            self._scores[term_id].append(min(score, 127))
+        return doc
+
+    def _posting(self, term_id):
+        return self._docs[term_id].values, self._scores[term_id].values
+
+    def _time_bounds(self):
+        return self._times.values, self._max.values, self._min.values
+
+    def write_segment(self, directory):
+        """Freeze the index into ``directory`` (docs renumbered in time order)."""
+        directory = Path(directory)
+        tmp = directory.with_name(f'.{directory.name}.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        times = self.times
+        order = np.argsort(times, kind='stable')
+        renumber = np.empty(len(order), dtype=np.int32)
+        renumber[order] = np.arange(len(order), dtype=np.int32)
+        offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(docs) for docs in self._docs])
+        docs = np.empty(offsets[-1], dtype=np.int32)
+        scores = np.empty(offsets[-1], dtype=np.int8)
+        for term_id in range(len(self.terms)):
+            term_docs, term_scores = self._posting(term_id)
+            term_docs = renumber[term_docs]
+            sort = np.argsort(term_docs, kind='stable')
+            docs[offsets[term_id]:offsets[term_id + 1]] = term_docs[sort]
+            scores[offsets[term_id]:offsets[term_id + 1]] = term_scores[sort]
+        times[order].astype('<i8').tofile(tmp / 'time.i8')
+        offsets.astype('<i8').tofile(tmp / 'offsets.i8')
+        docs.astype('<i4').tofile(tmp / 'docs.i4')
+        scores.tofile(tmp / 'scores.i1')
+        (tmp / 'suids.json').write_text(json.dumps([self.suids[i] for i in order.tolist()]))
+        (tmp / 'terms.json').write_text(json.dumps(self.terms))
+        old = directory.with_name(f'.{directory.name}.old')
+        if directory.exists():
+            os.replace(directory, old)
+        os.replace(tmp, directory)
+        shutil.rmtree(old, ignore_errors=True)
+
+
+class IndexSegment(_Searchable):
+    """A segment written by ``NewsIndex.write_segment``, memory-mapped."""
+
+    _sorted_times = True
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        self.terms = [tuple(term) for term in json.loads((directory / 'terms.json').read_text())]
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.suids = json.loads((directory / 'suids.json').read_text())
+        self.times = self._map(directory / 'time.i8', '<i8')
+        self.offsets = self._map(directory / 'offsets.i8', '<i8')
+        self.docs = self._map(directory / 'docs.i4', '<i4')
+        self.scores = self._map(directory / 'scores.i1', 'i1')
+
+    @staticmethod
+    def _map(path, dtype):
+        if path.stat().st_size == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def _posting(self, term_id):
+        lo, hi = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.docs[lo:hi], self.scores[lo:hi]
+
+    def _time_bounds(self):
+        return self.times, self.times, self.times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Index mktnews stories by ticker and topic')
+    parser.add_argument('paths', nargs='*', help='XML archives to index')
+    parser.add_argument('--segment', help='search this segment directory instead of indexing')
+    parser.add_argument('--write', help=f'write the index as a segment, e.g. to {INDEX_DIR}/20250205')
+    parser.add_argument('--all', nargs='*', default=[], help='terms every story must have, e.g. ticker:NVDA')
+    parser.add_argument('--any', nargs='*', default=[], help='terms of which a story needs one, e.g. topic:ERN:70')
+    parser.add_argument('--hours', type=float, help='only stories of the last N hours of the index')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.segment:
+        index = IndexSegment(args.segment)
+    else:
+        index = NewsIndex()
+        for path in args.paths:
+            for story in iter_file(path):
+                index.add(story)
+        if args.write:
+            index.write_segment(args.write)
+    print(f"{len(index)} stories, {len(index.term_ids)} terms")
+    if args.all or args.any:
+        start = None
+        if args.hours is not None and len(index):
+            start = int(index.times.max()) - int(args.hours * 3600 * 1000)
+        docs = index.search([parse_term(t) for t in args.all], [parse_term(t) for t in args.any], start=start)
+        print(f"{len(docs)} matching stories")
+        for suid, arrival in index.stories(docs[-args.limit:]):
+            print(suid, arrival)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""Append-only archive of raw symbol pages, for re-extraction after markup changes.
+
+Layout under ``stock_data/archive``::
+
+    symbols.json                  interned symbol table
+    dicts/1.zdict                 trained zstd dictionaries (id = file name)
+    pages/20250205.zst            concatenated zstd frames, one per page
+    index/20250205/ts.i8          fetch time, epoch seconds
+    index/20250205/sym.i4         symbol id
+    index/20250205/offset.i8      frame offset in the day's pages file
+    index/20250205/length.i4      frame length
+    index/20250205/dict.i2        dictionary id, 0 for none
+
+Pages are nearly identical boilerplate, so each one is compressed on its own
+(for random access) against a dictionary trained on earlier pages; that is
+roughly ten times smaller than plain zstd. The first dictionary is trained
+automatically once ``train_after`` pages exist, and ``python page_archive.py
+train`` trains a fresh one after a redesign; older pages keep theirs.
+
+``python page_archive.py replay`` (or ``stocktwits.py --replay``) re-runs
+extraction over the archive in a process pool, without any network.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import zstandard
+
+from extractors import extract_symbol_stats
+from watcher_store import PartitionedTable, SymbolTable, day_bounds, day_of
+
+ARCHIVE_DIR = Path('stock_data') / 'archive'
+INDEX_COLUMNS = {'ts': np.int64, 'sym': np.int32, 'offset': np.int64, 'length': np.int32, 'dict': np.int16}
+
+
+class PageArchive:
+    def __init__(self, root=ARCHIVE_DIR, level=3, dict_size=112 * 1024, train_after=64):
+        self.root = Path(root)
+        self.level = level
+        self.dict_size = dict_size
+        self.train_after = train_after
+        self.symbols = SymbolTable(self.root / 'symbols.json')
+        self.index = PartitionedTable(self.root / 'index', INDEX_COLUMNS)
+        self._dicts = {}
+        self._compressors = {}
+        self._decompressors = {}
+        # Newest dictionary id, looked up on first use; 0 means none yet
+        self._dict_id = None
+        # Pages written without a dictionary by this process
+        self._untrained = 0
+        # The Chrome pool archives from several threads
+        self._lock = threading.Lock()
+
+    # Dictionaries
+
+    def _dict_path(self, dict_id):
+        return self.root / 'dicts' / f'{dict_id}.zdict'
+
+    def dict_ids(self):
+        folder = self.root / 'dicts'
+        if not folder.exists():
+            return []
+        return sorted(int(p.stem) for p in folder.glob('*.zdict'))
+
+    def dictionary(self, dict_id):
+        if dict_id not in self._dicts:
+            self._dicts[dict_id] = zstandard.ZstdCompressionDict(self._dict_path(dict_id).read_bytes())
+        return self._dicts[dict_id]
+
+    def _compressor(self):
+        if self._dict_id is None:
+            ids = self.dict_ids()
+            self._dict_id = ids[-1] if ids else 0
+        dict_id = self._dict_id
+        if dict_id not in self._compressors:
+            kwargs = {'dict_data': self.dictionary(dict_id)} if dict_id else {}
+            self._compressors[dict_id] = zstandard.ZstdCompressor(level=self.level, **kwargs)
+        return dict_id, self._compressors[dict_id]
+
+    def _decompressor(self, dict_id):
+        if dict_id not in self._decompressors:
+            kwargs = {'dict_data': self.dictionary(dict_id)} if dict_id else {}
+            self._decompressors[dict_id] = zstandard.ZstdDecompressor(**kwargs)
+        return self._decompressors[dict_id]
+
+    def train(self, samples=None, sample_count=256):
+        """Train a new dictionary (from the newest pages by default); returns its id."""
+        if samples is None:
+            index = self.query()
+            samples = [self._read(day, offset, length, dict_id)
+                       for day, offset, length, dict_id in index[-sample_count:]]
+        dictionary = zstandard.train_dictionary(self.dict_size, samples)
+        ids = self.dict_ids()
+        dict_id = (ids[-1] if ids else 0) + 1
+        path = self._dict_path(dict_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_bytes(dictionary.as_bytes())
+        os.replace(tmp, path)
+        self._dict_id = dict_id
+        logging.info('Trained page dictionary %d from %d pages', dict_id, len(samples))
+        return dict_id
+
+    # Writing
+
+    def append(self, symbol, page, ts=None):
+        """Archive one fetched page (``str`` or ``bytes``)."""
+        if isinstance(page, str):
+            page = page.encode('utf-8')
+        ts = int(time.time() if ts is None else ts)
+        day = day_of(ts)
+        with self._lock:
+            dict_id, compressor = self._compressor()
+            frame = compressor.compress(page)
+            pages = self.root / 'pages' / f'{day}.zst'
+            pages.parent.mkdir(parents=True, exist_ok=True)
+            # Frame first, index row second: a crash in between only leaves
+            # unreferenced bytes behind
+            with open(pages, 'ab') as f:
+                offset = f.tell()
+                f.write(frame)
+            self.index.append(day, ts=[ts], sym=self.symbols.intern([symbol]), offset=[offset],
+                              length=[len(frame)], dict=[dict_id])
+            if dict_id == 0:
+                self._untrained += 1
+                if self._untrained >= self.train_after:
+                    self._untrained = 0
+                    try:
+                        self.train()
+                    except zstandard.ZstdError as e:
+                        logging.warning('Could not train a page dictionary yet: %s', e)
+
+    # Reading
+
+    def query(self, symbols=None, start=None, end=None):
+        """``[(day, offset, length, dict_id)]`` for matching pages, oldest first."""
+        return [(day, offset, length, dict_id)
+                for day, rows in self._index_rows(symbols, start, end)
+                for offset, length, dict_id in zip(rows['offset'].tolist(), rows['length'].tolist(),
+                                                   rows['dict'].tolist())]
+
+    def _index_rows(self, symbols=None, start=None, end=None):
+        ids = self.symbols.lookup(symbols) if symbols is not None else None
+        for day in self.index.days(*day_bounds(start, end)):
+            cols = self.index.read(day)
+            mask = np.ones(len(cols['ts']), dtype=bool)
+            if start is not None:
+                mask &= cols['ts'] >= start
+            if end is not None:
+                mask &= cols['ts'] <= end
+            if ids is not None:
+                mask &= np.isin(cols['sym'], ids)
+            yield day, {name: values[mask] for name, values in cols.items()}
+
+    def _read(self, day, offset, length, dict_id):
+        with open(self.root / 'pages' / f'{day}.zst', 'rb') as f:
+            f.seek(offset)
+            frame = f.read(length)
+        return self._decompressor(dict_id).decompress(frame)
+
+    def get(self, symbol, ts=None):
+        """The last page archived for ``symbol`` at or before ``ts``, or ``None``."""
+        found = None
+        for day, rows in self._index_rows([symbol], end=ts):
+            if len(rows['ts']):
+                last = int(np.argmax(rows['ts']))
+                found = (day, int(rows['offset'][last]), int(rows['length'][last]), int(rows['dict'][last]))
+        return self._read(*found) if found else None
+
+
+# Replay
+
+_worker_archive = None
+
+
+def _init_worker(root):
+    global _worker_archive
+    _worker_archive = PageArchive(root)
+
+
+def _replay_chunk(task):
+    day, ts, sym, offset, length, dict_id = task
+    archive = _worker_archive
+    names = archive.symbols.names(sym)
+    rows = []
+    with open(archive.root / 'pages' / f'{day}.zst', 'rb') as f:
+        for i in range(len(ts)):
+            f.seek(offset[i])
+            page = archive._decompressor(int(dict_id[i])).decompress(f.read(int(length[i])))
+            stats = extract_symbol_stats(page, names[i]).as_dict()
+            stats['ts'] = int(ts[i])
+            rows.append(stats)
+    return rows
+
+
+def replay(archive=None, symbols=None, start=None, end=None, workers=None, chunk_size=2000):
+    """Re-extract every matching archived page; returns one row per page."""
+    archive = archive or PageArchive()
+    tasks = []
+    for day, rows in archive._index_rows(symbols, start, end):
+        for first in range(0, len(rows['ts']), chunk_size):
+            part = slice(first, first + chunk_size)
+            tasks.append((day, *(np.asarray(rows[name][part]) for name in
+                                 ('ts', 'sym', 'offset', 'length', 'dict'))))
+    total = sum(len(task[1]) for task in tasks)
+    logging.info('Replaying %d archived pages in %d chunks', total, len(tasks))
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(archive.root),)) as pool:
+        for rows in pool.map(_replay_chunk, tasks):
+            results.extend(rows)
+    elapsed = time.perf_counter() - started
+    logging.info('Replayed %d pages in %.1fs (%.0f pages/s)', total, elapsed, total / max(elapsed, 1e-9))
+
+    df = pd.DataFrame(results)
+    if not df.empty:
+        df.insert(0, 'Timestamp', pd.to_datetime(df.pop('ts'), unit='s', utc=True))
+    return df
+
+
+def write_replay(df, output_dir=Path('stock_data')):
+    path = Path(output_dir) / f"stocktwits_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    found = df['watchers'].notna().sum() if not df.empty else 0
+    logging.info('Replay found watchers in %d/%d pages: %s', found, len(df), path)
+    return path
+
+
+def _epoch(day):
+    # Partitions are UTC days
+    return datetime.strptime(day, '%Y%m%d').replace(tzinfo=timezone.utc).timestamp() if day else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Raw page archive')
+    sub = parser.add_subparsers(dest='command', required=True)
+    train = sub.add_parser('train', help='train a new compression dictionary from recent pages')
+    rep = sub.add_parser('replay', help='re-run extraction over archived pages')
+    rep.add_argument('symbols', nargs='*')
+    rep.add_argument('--start', metavar='YYYYmmdd')
+    rep.add_argument('--end', metavar='YYYYmmdd')
+    rep.add_argument('--workers', type=int)
+    for p in (train, rep):
+        p.add_argument('--archive', default=str(ARCHIVE_DIR))
+    args = parser.parse_args(argv)
+
+    archive = PageArchive(args.archive)
+    if args.command == 'train':
+        archive.train()
+    else:
+        end = _epoch(args.end) + 86399 if args.end else None
+        write_replay(replay(archive, args.symbols or None, _epoch(args.start), end, args.workers))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
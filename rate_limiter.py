@@ -0,0 +1,166 @@
+"""Adaptive rate control for the scrapers.
+
+- ``TokenBucket`` caps requests per second (with bursts up to its capacity).
+- ``AIMDLimiter`` grows the allowed concurrency by one per window of good
+  responses and halves it when the server pushes back (429, 5xx, timeouts or
+  latency over target).
+- ``Backoff`` gives jittered exponential retry delays per symbol.
+- ``RateController`` bundles the three for the asyncio engine.
+"""
+import asyncio
+import contextlib
+import logging
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Take one token now (the balance may go negative) and return how long
+        # the caller has to wait before that token is actually earned.
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def try_acquire(self, tokens=1):
+        """Take ``tokens`` only if they are available right now."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now < self._paused_until or self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def pause(self, seconds):
+        """Hold every caller back for ``seconds`` (e.g. a server Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AIMDLimiter:
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1.0, decrease=0.5,
+                 latency_target=None, cooldown=1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        # Several requests usually fail together; only back off once per cooldown
+        self.cooldown = cooldown
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def on_success(self, latency=None):
+        if self.latency_target is not None and latency is not None and latency > self.latency_target:
+            self.on_congestion()
+            return
+        with self._lock:
+            # +increase per full window of successes, like TCP congestion avoidance
+            self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+
+    def on_congestion(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            previous = self.limit
+            self._limit = max(self.minimum, self._limit * self.decrease)
+        if self.limit != previous:
+            logging.warning('Server pushback, concurrency %d -> %d', previous, self.limit)
+
+
+class Backoff:
+    def __init__(self, base=1.0, cap=60.0, factor=2.0):
+        self.base = base
+        self.cap = cap
+        self.factor = factor
+
+    def delay(self, attempt, retry_after=None):
+        """Full-jitter delay before retry number ``attempt`` (0-based)."""
+        ceiling = min(self.cap, self.base * self.factor ** attempt)
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form; not worth parsing, fall back to our own backoff
+        return None
+
+
+class RateController:
+    def __init__(self, rate=10.0, burst=None, initial_concurrency=4, max_concurrency=32,
+                 min_concurrency=1, latency_target=None, backoff_base=1.0, backoff_cap=60.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.aimd = AIMDLimiter(initial_concurrency, min_concurrency, max_concurrency,
+                                latency_target=latency_target)
+        self.backoff = Backoff(backoff_base, backoff_cap)
+        self._in_flight = 0
+        self._condition = None
+        self._loop = None
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Wait for a free concurrency slot and a token, then hold the slot."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A Condition binds to one event loop; each asyncio.run() of a
+            # shared controller gets a fresh one (the old loop's slots are gone)
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self._in_flight = 0
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.aimd.limit)
+            self._in_flight += 1
+        try:
+            await self.bucket.acquire_async()
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self, latency=None):
+        self.aimd.on_success(latency)
+
+    def on_congestion(self, retry_after=None):
+        self.aimd.on_congestion()
+        if retry_after:
+            self.bucket.pause(retry_after)
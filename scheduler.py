@@ -0,0 +1,150 @@
+"""Long-running refresh scheduler for watcher counts.
+
+Each symbol gets its own refresh interval: important symbols and symbols
+whose watcher count moves a lot are refreshed often, quiet ones rarely.
+Due symbols sit in a heap ordered by next-due time, and a global hourly
+request budget (a token bucket) caps the total load. When more symbols are
+due than the budget allows, the most important ones go first and the rest
+wait for the next tokens.
+"""
+import heapq
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics import load_matrix
+from rate_limiter import TokenBucket
+from watcher_store import WatcherStore
+
+HOUR = 3600
+
+
+def load_importance(path):
+    """Read ``{symbol: weight}`` from a JSON file; missing symbols weigh 1."""
+    if path is None:
+        return {}
+    return {symbol.upper(): float(weight) for symbol, weight in json.loads(Path(path).read_text()).items()}
+
+
+def watcher_volatility(store, symbols, lookback_days=30, now=None):
+    """Std of daily log changes over the last ``lookback_days``, per symbol (0 without history).
+
+    Counts are resampled to one per UTC day and carried forward over days
+    without a new row, so the flat stretches that ``changes_only`` leaves out
+    of the store count as no change, and a move weighs by how long it took.
+    """
+    matrix = load_matrix(store, symbols, days=lookback_days + 1, end=now)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(np.where(matrix.counts > 0, matrix.counts, np.nan))
+    changes = np.diff(logs, axis=1)
+    valid = ~np.isnan(changes)
+    n = valid.sum(axis=1)
+    mean = np.where(valid, changes, 0.0).sum(axis=1) / np.maximum(n, 1)
+    var = (np.where(valid, changes - mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(n - 1, 1)
+    volatility = pd.Series(np.where(n >= 2, np.sqrt(var), 0.0), index=store.symbols.names(matrix.sym_ids))
+    return volatility.reindex(symbols).fillna(0.0)
+
+
+def refresh_intervals(symbols, importance, volatility, min_interval=HOUR, max_interval=24 * HOUR):
+    """Seconds between refreshes for each symbol.
+
+    The interval shrinks with importance and with volatility relative to the
+    universe median, and is clamped to ``[min_interval, max_interval]``.
+    """
+    weights = np.array([importance.get(symbol, 1.0) for symbol in symbols])
+    vol = volatility.reindex(symbols).to_numpy(dtype=float)
+    median = np.median(vol[vol > 0]) if (vol > 0).any() else 1.0
+    intervals = max_interval / (weights * (1.0 + vol / median))
+    return dict(zip(symbols, np.clip(intervals, min_interval, max_interval).tolist()))
+
+
+class RefreshScheduler:
+    def __init__(self, symbols, fetch, store=None, budget_per_hour=600, importance=None,
+                 min_interval=HOUR, max_interval=24 * HOUR, recompute_every=6 * HOUR):
+        self.symbols = list(dict.fromkeys(symbols))
+        # fetch(list_of_symbols) -> {symbol: watchers}
+        self.fetch = fetch
+        self.store = store or WatcherStore()
+        self.importance = importance or {}
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.recompute_every = recompute_every
+        # Allow at most a tenth of the hourly budget in one burst
+        self.budget = TokenBucket(budget_per_hour / HOUR, capacity=max(1, budget_per_hour // 10))
+        self.intervals = {}
+        self._computed_at = None
+        self._heap = []
+        self._seq = 0
+
+    def recompute(self, now=None):
+        volatility = watcher_volatility(self.store, self.symbols, now=now)
+        self.intervals = refresh_intervals(self.symbols, self.importance, volatility,
+                                           self.min_interval, self.max_interval)
+        self._computed_at = time.time() if now is None else now
+        demand = sum(HOUR / interval for interval in self.intervals.values())
+        logging.info('Refresh plan: %.0f requests/hour wanted, %.0f allowed', demand,
+                     self.budget.rate * HOUR)
+
+    def _push(self, due, symbol):
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, symbol))
+
+    def start(self, now=None):
+        now = time.time() if now is None else now
+        self.recompute(now)
+        # Seed from the store so a restart does not refresh everything at once
+        last_seen = self.store.last_seen(self.symbols)
+        for symbol in self.symbols:
+            last = last_seen.get(symbol)
+            due = now if last is None else last + self.intervals[symbol]
+            self._push(min(due, now + self.intervals[symbol]), symbol)
+
+    def step(self, now=None):
+        """Refresh whatever is due and affordable; returns seconds until the next due symbol."""
+        now = time.time() if now is None else now
+        if self._computed_at is not None and now - self._computed_at >= self.recompute_every:
+            self.recompute(now)
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        # Most important first when the budget cannot cover everything due
+        due.sort(key=lambda entry: (-self.importance.get(entry[2], 1.0), entry[0]))
+
+        batch = []
+        for entry in due:
+            if self.budget.try_acquire():
+                batch.append(entry[2])
+            else:
+                heapq.heappush(self._heap, entry)
+
+        if batch:
+            results = self.fetch(batch)
+            if results:
+                self.store.append_snapshot(results, ts=now, changes_only=True)
+            for symbol in batch:
+                # Failed symbols come back at the normal cadence too, so one
+                # broken page cannot eat the budget
+                self._push(now + self.intervals[symbol], symbol)
+            logging.info('Refreshed %d/%d symbols, %d queued', len(results), len(batch), len(self._heap))
+
+        if not self._heap:
+            return self.max_interval
+        wait = self._heap[0][0] - now
+        if not batch and due:
+            # Due but over budget: wait for the next token
+            wait = 1.0 / self.budget.rate
+        return max(0.0, wait)
+
+    def run(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        self.start()
+        logging.info('Scheduler started for %d symbols', len(self.symbols))
+        while not stop_event.is_set():
+            wait = self.step()
+            stop_event.wait(min(wait, 60.0))
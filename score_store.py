@@ -0,0 +1,235 @@
+"""Columnar, day-partitioned store for ``StructuredScore`` sentiment records.
+
+Company Sentiment and Market Moving News deliver one ``StructuredScore`` per
+entity of a story. Held as parsed records they cost hundreds of bytes each;
+here a score is one row of fixed-width columns, 29 bytes::
+
+    scores/20250205/ts.i8           TimeOfArrival, epoch ms
+    scores/20250205/entity.i4       EntityId (entities.json)
+    scores/20250205/bbg.i4          BloombergEntityId (figis.json, -1 if none)
+    scores/20250205/figi.i4         SecurityFigi (figis.json, -1 if none)
+    scores/20250205/score.i1        -1, 0, 1
+    scores/20250205/confidence.f4   0-100 (sentiment) or a probability (MMN)
+    scores/20250205/language.i2     LanguageId (-1 if none)
+    scores/20250205/analytics.i2    AnalyticsType (analytics.json)
+
+Strings are dictionary-encoded through :class:`watcher_store.SymbolTable`.
+Rows are buffered in ``array`` columns and appended to the day partitions a
+chunk at a time; reads memory-map a day, so filters run over NumPy arrays
+without parsing anything. Load the output of ``news_feed.py`` with::
+
+    python score_store.py import stock_data/news_scores.jsonl
+    python score_store.py query AAPL NVDA --days 1 --analytics-type SENTIMENT
+"""
+import argparse
+import json
+import logging
+import time
+from array import array
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from asof_join import normalize_tickers
+from mktnews import StructuredScore
+from watcher_store import PartitionedTable, SymbolTable, day_bounds, day_of
+
+SCORES_DIR = Path('stock_data') / 'scores'
+DAY = 86400
+SCORE_COLUMNS = {
+    'ts': np.int64, 'entity': np.int32, 'bbg': np.int32, 'figi': np.int32, 'score': np.int8,
+    'confidence': np.float32, 'language': np.int16, 'analytics': np.int16,
+}
+# array typecodes of the append buffer, per column
+_BUFFER_TYPES = {'ts': 'q', 'score': 'b', 'confidence': 'f', 'language': 'h'}
+# Dictionary-encoded columns: buffered as strings, interned per chunk
+_ENCODED = {'entity': 'entities', 'bbg': 'figis', 'figi': 'figis', 'analytics': 'analytics'}
+
+
+class ScoreStore:
+    def __init__(self, root=SCORES_DIR, chunk_rows=1 << 16):
+        self.root = Path(root)
+        self.table = PartitionedTable(self.root / 'scores', SCORE_COLUMNS)
+        self.tables = {name: SymbolTable(self.root / f'{name}.json')
+                       for name in dict.fromkeys(_ENCODED.values())}
+        self.chunk_rows = chunk_rows
+        # Rows this instance wrote, per day partition
+        self.written = {}
+        self._reset()
+
+    def _reset(self):
+        self._buffer = {name: array(code) for name, code in _BUFFER_TYPES.items()}
+        self._buffer.update({name: [] for name in _ENCODED})
+
+    def __len__(self):
+        """Rows buffered but not yet written."""
+        return len(self._buffer['ts'])
+
+    def append(self, time_of_arrival, scores):
+        """Buffer the ``StructuredScore`` entries of one story (epoch ms)."""
+        buffer = self._buffer
+        for s in scores:
+            buffer['ts'].append(time_of_arrival)
+            buffer['entity'].append(s.entity_id)
+            buffer['bbg'].append(s.bloomberg_entity_id)
+            buffer['figi'].append(s.security_figi)
+            buffer['score'].append(0 if s.score is None else s.score)
+            buffer['confidence'].append(np.nan if s.confidence is None else s.confidence)
+            buffer['language'].append(-1 if s.language_id is None else s.language_id)
+            buffer['analytics'].append(s.analytics_type or '')
+        if len(self) >= self.chunk_rows:
+            self.flush()
+
+    def append_story(self, story):
+        """Buffer the scores of a ``mktnews.StoryScores``."""
+        if story.scores and story.time_of_arrival is not None:
+            self.append(story.time_of_arrival, story.scores)
+
+    def flush(self):
+        """Write the buffered rows to their day partitions."""
+        if not len(self):
+            return 0
+        columns = {name: np.frombuffer(self._buffer[name], dtype=SCORE_COLUMNS[name]).copy()
+                   for name in _BUFFER_TYPES}
+        for name, table in _ENCODED.items():
+            columns[name] = self._encode(self.tables[table], self._buffer[name])
+        self._reset()
+        # Usually one day per chunk; split at midnight otherwise
+        day_numbers = columns['ts'] // (DAY * 1000)
+        for number in np.unique(day_numbers).tolist():
+            rows = day_numbers == number
+            day = day_of(number * DAY)
+            self.table.append(day, **{name: values[rows] for name, values in columns.items()})
+            self.written[day] = self.written.get(day, 0) + int(rows.sum())
+        return len(day_numbers)
+
+    @staticmethod
+    def _encode(table, values):
+        ids = np.full(len(values), -1, dtype=np.int32)
+        present = [i for i, value in enumerate(values) if value]
+        if present:
+            ids[present] = table.intern([values[i] for i in present])
+        return ids
+
+    def ids(self, table, names):
+        """Dictionary ids of the known ``names`` in ``entities``/``figis``/``analytics``."""
+        return self.tables[table].lookup(names)
+
+    def scan(self, start=None, end=None, entities=None, analytics_type=None, min_confidence=None):
+        """Yield ``{column: array}`` per day partition, filtered.
+
+        ``start``/``end`` are inclusive epoch ms; ``entities`` are EntityIds.
+        """
+        entity_ids = self.ids('entities', entities) if entities is not None else None
+        analytics_id = None
+        if analytics_type is not None:
+            known = self.ids('analytics', [analytics_type])
+            if not len(known):
+                return
+            analytics_id = known[0]
+        bounds = day_bounds(None if start is None else start // 1000, None if end is None else end // 1000)
+        for day in self.table.days(*bounds):
+            cols = self.table.read(day)
+            mask = np.ones(len(cols['ts']), dtype=bool)
+            if start is not None:
+                mask &= cols['ts'] >= start
+            if end is not None:
+                mask &= cols['ts'] <= end
+            if entity_ids is not None:
+                mask &= np.isin(cols['entity'], entity_ids)
+            if analytics_id is not None:
+                mask &= cols['analytics'] == analytics_id
+            if min_confidence is not None:
+                mask &= cols['confidence'] >= min_confidence
+            if mask.any():
+                yield {name: np.asarray(values[mask]) for name, values in cols.items()}
+
+    def query(self, **filters):
+        """All rows matching ``scan`` filters as one ``{column: array}``, in time order."""
+        parts = list(self.scan(**filters))
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in SCORE_COLUMNS.items()}
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in SCORE_COLUMNS}
+        order = np.argsort(columns['ts'], kind='stable')
+        return {name: values[order] for name, values in columns.items()}
+
+    def frame(self, columns):
+        """Decode a ``{column: array}`` into a DataFrame of names and values."""
+        def names(table, ids):
+            symbols = np.asarray(self.tables[table].symbols + [None], dtype=object)
+            return symbols[np.where(ids < 0, len(symbols) - 1, ids)]
+
+        return pd.DataFrame({
+            'Timestamp': pd.to_datetime(columns['ts'], unit='ms', utc=True),
+            'EntityId': names('entities', columns['entity']),
+            'BloombergEntityId': names('figis', columns['bbg']),
+            'SecurityFigi': names('figis', columns['figi']),
+            'Score': columns['score'],
+            'Confidence': columns['confidence'],
+            'LanguageId': columns['language'],
+            'AnalyticsType': names('analytics', columns['analytics']),
+        })
+
+
+def score_chunks(store, start=None, end=None, analytics_type='SENTIMENT'):
+    """Stored scores one day at a time, shaped like ``asof_join.sentiment_csv_chunks``.
+
+    ``start``/``end`` are epoch ms. Feed the result through
+    ``asof_join.with_symbol_ids`` to join it with watcher counts.
+    """
+    for columns in store.scan(start, end, analytics_type=analytics_type):
+        order = np.argsort(columns['ts'], kind='stable')
+        frame = store.frame({name: values[order] for name, values in columns.items()})
+        yield pd.DataFrame({
+            'Timestamp': frame['Timestamp'],
+            'Ticker': frame['EntityId'],
+            'Symbol': normalize_tickers(frame['EntityId']).to_numpy(),
+            'Score': frame['Score'].astype('Int8'),
+            'Confidence': frame['Confidence'],
+        })
+
+
+def import_jsonl(store, paths):
+    """Load ``news_feed.py`` output (``StoryScores`` as JSON lines)."""
+    rows = 0
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('scores') and record.get('time_of_arrival') is not None:
+                    scores = [StructuredScore(*score) for score in record['scores']]
+                    store.append(record['time_of_arrival'], scores)
+                    rows += len(scores)
+    store.flush()
+    logging.info('Imported %d scores into %s', rows, store.root)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='StructuredScore sentiment store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help='load news_feed.py JSON lines')
+    imp.add_argument('paths', nargs='+')
+    qry = sub.add_parser('query', help='print the scores of some entities')
+    qry.add_argument('entities', nargs='*')
+    qry.add_argument('--days', type=float, help='only the last N days')
+    qry.add_argument('--analytics-type', help='e.g. SENTIMENT, SENTIMENT_SMEDIA, MMN')
+    qry.add_argument('--min-confidence', type=float)
+    for p in (imp, qry):
+        p.add_argument('--store', default=str(SCORES_DIR))
+    args = parser.parse_args(argv)
+
+    store = ScoreStore(args.store)
+    if args.command == 'import':
+        import_jsonl(store, args.paths)
+    else:
+        start = int((time.time() - args.days * 86400) * 1000) if args.days else None
+        columns = store.query(start=start, entities=args.entities or None,
+                              analytics_type=args.analytics_type, min_confidence=args.min_confidence)
+        print(store.frame(columns).to_string(index=False))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,100 @@
+"""Append-only journal of per-symbol scrape results.
+
+Each run writes one JSON line per finished symbol to
+``stock_data/journal/<run_id>.jsonl``. Writes are buffered and fsynced in
+batches, so a crash loses at most the last unsynced batch. A restarted run
+loads the journal and skips the symbols that are already done and fresh.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+JOURNAL_DIR = Path('stock_data') / 'journal'
+
+
+def new_run_id():
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+def latest_run_id(journal_dir=JOURNAL_DIR):
+    runs = sorted(Path(journal_dir).glob('*.jsonl'))
+    return runs[-1].stem if runs else None
+
+
+class ScrapeJournal:
+    def __init__(self, run_id=None, journal_dir=JOURNAL_DIR, batch_size=16, flush_interval=5.0):
+        self.run_id = run_id or new_run_id()
+        self.path = Path(journal_dir) / f'{self.run_id}.jsonl'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def completed(self, max_age=None):
+        """Return ``{symbol: watchers}`` already journaled for this run.
+
+        Entries older than ``max_age`` seconds are ignored so a stale run is
+        re-scraped rather than resumed.
+        """
+        done = {}
+        if not self.path.exists():
+            return done
+        cutoff = time.time() - max_age if max_age is not None else None
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from a crash mid-write
+                    continue
+                if cutoff is not None and entry['ts'] < cutoff:
+                    continue
+                done[entry['symbol']] = entry['watchers']
+        return done
+
+    def record(self, symbol, watchers):
+        line = json.dumps({'run_id': self.run_id, 'symbol': symbol,
+                           'watchers': watchers, 'ts': time.time()})
+        with self._lock:
+            self._pending.append(line + '\n')
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+            if len(self._pending) >= self.batch_size or due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(''.join(self._pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = []
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush_locked()
+            except OSError as e:
+                logging.error('Could not flush scrape journal %s: %s', self.path, e)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
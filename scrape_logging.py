@@ -0,0 +1,98 @@
+"""Non-blocking log setup for the scrapers.
+
+Workers only put records on a bounded in-memory queue; one background thread
+formats them and does the file and console I/O, so a slow disk or terminal no
+longer serializes the fetch loop. Records are formatted in that thread too,
+and hot-path calls pass ``%``-style arguments so nothing is formatted for
+levels that are switched off. When the queue is full new records are dropped
+(and counted) rather than blocking a worker.
+
+``stocktwits_scraper.log`` is rotated by size and can be written as JSON
+lines, one object per record.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+LOG_FILE = 'stocktwits_scraper.log'
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks and leaves formatting to the listener."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener lives in this process, so the record can travel as is
+        # and be formatted on the writer thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level=logging.INFO, log_file=LOG_FILE, json_lines=False, blocking=False,
+                      queue_size=10000, max_bytes=10 * 1024 * 1024, backups=5):
+    """Install the scraper's handlers on the root logger.
+
+    ``blocking`` keeps the old synchronous handlers (useful when debugging a
+    crash, since nothing is lost in the queue). Returns the queue handler, or
+    ``None`` in blocking mode.
+    """
+    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                                        backupCount=backups, encoding='utf-8')
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if blocking:
+        root.addHandler(file_handler)
+        root.addHandler(console_handler)
+        return None
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    listener = logging.handlers.QueueListener(handler.queue, file_handler, console_handler,
+                                              respect_handler_level=True)
+    root.addHandler(handler)
+    listener.start()
+
+    def stop():
+        # Drains whatever is still queued before the process exits
+        listener.stop()
+        if handler.dropped:
+            print(f"Logging queue was full, {handler.dropped} records dropped", file=sys.stderr)
+
+    atexit.register(stop)
+    return handler
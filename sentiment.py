@@ -0,0 +1,336 @@
+"""Incremental, time-decayed company sentiment per entity.
+
+Every ``StructuredScore`` from the sentiment feeds (EID 80047 / 80179) moves
+its entity's running sentiment. For each half-life ``h`` the aggregator keeps
+two exponentially decayed sums per entity,
+
+    S = sum(w * score * 2 ** (-(t - t_i) / h)),   W = sum(w * 2 ** (-(t - t_i) / h))
+
+with ``w`` the score's confidence (scaled to 0-1), so a new score only
+decays and bumps one row of flat arrays: O(1) per score, all half-lives at
+once. ``S / W`` is the confidence-weighted mean sentiment (-1..1), ``W``
+decayed to now says how much recent evidence there is behind it.
+
+State lives in ``(entities, half_lives)`` float64 arrays indexed by interned
+entity id and is checkpointed to ``stock_data/sentiment/state.npz`` together
+with how many rows of each score store day it has applied; a restart loads the
+checkpoint and only replays the rows written after those, late ones included.
+
+    python sentiment.py replay --days 30
+    python sentiment.py live --checkpoint-every 60
+    python sentiment.py show --top 20 --half-life 24
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from score_store import SCORES_DIR, ScoreStore
+from watcher_store import SymbolTable, day_bounds
+
+SENTIMENT_DIR = Path('stock_data') / 'sentiment'
+SENTIMENT_TOPICS = (
+    '//blp/mktnews-content/analytics/eid/80047',
+    '//blp/mktnews-content/analytics/eid/80179',
+)
+HALF_LIVES = (1.0, 6.0, 24.0, 168.0)  # hours
+LN2 = np.log(2.0)
+
+
+@dataclass
+class SentimentSnapshot:
+    entity_ids: np.ndarray
+    half_lives: tuple
+    # (entities, half_lives): weighted mean score, and evidence weight decayed to ``ts``
+    sentiment: np.ndarray
+    weight: np.ndarray
+    count: np.ndarray
+    ts: int
+
+
+class SentimentAggregator:
+    def __init__(self, root=SENTIMENT_DIR, half_lives=HALF_LIVES, confidence_scale=100.0,
+                 analytics_types=None):
+        self.root = Path(root)
+        self.half_lives = tuple(float(h) for h in half_lives)
+        # Decay rate per millisecond, per half-life
+        self.rates = LN2 / (np.asarray(self.half_lives) * 3600 * 1000)
+        self.confidence_scale = confidence_scale
+        self.analytics_types = set(analytics_types) if analytics_types else None
+        self.entities = SymbolTable(self.root / 'entities.json')
+        self.state_path = self.root / 'state.npz'
+        self._sums = np.zeros((0, len(self.half_lives)))
+        self._weights = np.zeros((0, len(self.half_lives)))
+        self._last = np.zeros(0, dtype=np.int64)
+        self._count = np.zeros(0, dtype=np.int64)
+        # Newest score time applied
+        self.watermark = -1
+        # Score store rows applied per day partition; replays resume after them
+        self.covered = {}
+        self._load()
+        # Entities interned after the checkpoint start out empty
+        self._size = len(self.entities.symbols)
+        self._reserve(self._size)
+
+    def __len__(self):
+        return self._size
+
+    def _load(self):
+        if not self.state_path.exists():
+            return
+        with np.load(self.state_path) as state:
+            if tuple(state['half_lives'].tolist()) != self.half_lives:
+                logging.warning('Ignoring %s: written for half-lives %s', self.state_path,
+                                state['half_lives'].tolist())
+                return
+            self._sums, self._weights = state['sums'], state['weights']
+            self._last, self._count = state['last'], state['count']
+            self.watermark = int(state['watermark'])
+            self.covered = json.loads(str(state['covered']))
+
+    def checkpoint(self):
+        """Write the state atomically; entity names are already in ``entities.json``."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix('.tmp.npz')
+        n = self._size
+        np.savez(tmp, half_lives=np.asarray(self.half_lives), sums=self._sums[:n],
+                 weights=self._weights[:n], last=self._last[:n], count=self._count[:n],
+                 watermark=np.int64(self.watermark), covered=np.asarray(json.dumps(self.covered)))
+        os.replace(tmp, self.state_path)
+
+    def _reserve(self, size):
+        if size <= len(self._last):
+            return
+        capacity = max(size, 2 * len(self._last), 1024)
+        grow = capacity - len(self._last)
+        self._sums = np.vstack([self._sums, np.zeros((grow, len(self.half_lives)))])
+        self._weights = np.vstack([self._weights, np.zeros((grow, len(self.half_lives)))])
+        self._last = np.concatenate([self._last, np.full(grow, -1, dtype=np.int64)])
+        self._count = np.concatenate([self._count, np.zeros(grow, dtype=np.int64)])
+
+    def _intern(self, names):
+        ids = self.entities.intern(names)
+        if len(ids):
+            self._size = max(self._size, int(ids.max()) + 1)
+            self._reserve(self._size)
+        return ids
+
+    def _weight(self, confidence):
+        return confidence / self.confidence_scale
+
+    def update(self, entity, ts, score, confidence):
+        """Apply one score of ``entity`` at ``ts`` (epoch ms)."""
+        i = self.entities.ids.get(entity)
+        if i is None:
+            i = int(self._intern([entity])[0])
+        w = self._weight(confidence)
+        last = self._last[i]
+        if last < 0:
+            self._sums[i] = w * score
+            self._weights[i] = w
+            self._last[i] = ts
+        elif ts >= last:
+            decay = np.exp(-self.rates * (ts - last))
+            self._sums[i] = self._sums[i] * decay + w * score
+            self._weights[i] = self._weights[i] * decay + w
+            self._last[i] = ts
+        else:
+            # Late score: decay it to the entity's clock instead
+            decay = np.exp(-self.rates * (last - ts))
+            self._sums[i] += w * score * decay
+            self._weights[i] += w * decay
+        self._count[i] += 1
+        self.watermark = max(self.watermark, ts)
+
+    def update_story(self, story):
+        """Apply the structured scores of a ``mktnews.StoryScores``."""
+        if story.time_of_arrival is None:
+            return
+        for s in story.scores:
+            if s.score is None or s.confidence is None:
+                continue
+            if self.analytics_types is not None and s.analytics_type not in self.analytics_types:
+                continue
+            self.update(s.entity_id, story.time_of_arrival, s.score, s.confidence)
+
+    def update_many(self, entity_ids, ts, scores, confidences):
+        """Vectorized ``update`` for a batch of rows; ``entity_ids`` are interned ids.
+
+        Each entity's contributions are decayed to the later of its clock and
+        its newest row, so the result equals applying the rows one by one.
+        """
+        entity_ids = np.asarray(entity_ids, dtype=np.intp)
+        if not len(entity_ids):
+            return
+        ts = np.asarray(ts, dtype=np.int64)
+        weights = self._weight(np.asarray(confidences, dtype=np.float64))
+        target = self._last.copy()
+        np.maximum.at(target, entity_ids, ts)
+        touched = np.unique(entity_ids)
+        seen = self._last[touched] >= 0
+        old = touched[seen]
+        decay = np.exp(-np.outer(target[old] - self._last[old], self.rates))
+        self._sums[old] *= decay
+        self._weights[old] *= decay
+        fresh = touched[~seen]
+        self._sums[fresh] = 0.0
+        self._weights[fresh] = 0.0
+        row_decay = np.exp(-np.outer(target[entity_ids] - ts, self.rates))
+        np.add.at(self._sums, entity_ids, row_decay * (weights * np.asarray(scores, dtype=np.float64))[:, None])
+        np.add.at(self._weights, entity_ids, row_decay * weights[:, None])
+        self._last[touched] = target[touched]
+        np.add.at(self._count, entity_ids, 1)
+        self.watermark = max(self.watermark, int(ts.max()))
+
+    def replay(self, store, start=None):
+        """Apply the store rows written since the checkpoint; returns how many applied.
+
+        Rows are tracked by position in each day partition, so scores that
+        arrive late or are imported into an old day are still picked up.
+        Without a checkpoint, ``start`` (epoch ms) skips older scores.
+        """
+        resumed = bool(self.covered)
+        start_day = None
+        if not resumed and start is not None:
+            start_day = day_bounds(start // 1000)[0]
+        types = None
+        if self.analytics_types is not None:
+            types = store.ids('analytics', sorted(self.analytics_types))
+        entity_names = None
+        rows = 0
+        # Every day, old ones too: an import may append to any partition
+        for day in store.table.days():
+            if start_day is not None and day < start_day:
+                # Before the first replay's window: skipped for good
+                self.covered[day] = len(store.table.read(day, ['ts'])['ts'])
+                continue
+            cols = store.table.read(day)
+            first, n = self.covered.get(day, 0), len(cols['ts'])
+            if n <= first:
+                continue
+            cols = {name: np.asarray(values[first:n]) for name, values in cols.items()}
+            valid = (cols['entity'] >= 0) & ~np.isnan(cols['confidence'])
+            if start is not None and not resumed:
+                valid &= cols['ts'] >= start
+            if types is not None:
+                valid &= np.isin(cols['analytics'], types)
+            self.covered[day] = n
+            if not valid.any():
+                continue
+            if entity_names is None:
+                entity_names = np.asarray(store.tables['entities'].symbols, dtype=object)
+            # Store entity ids -> ours, via the names
+            ids = self._intern(entity_names[cols['entity'][valid]].tolist())
+            order = np.argsort(cols['ts'][valid], kind='stable')
+            self.update_many(ids[order], cols['ts'][valid][order], cols['score'][valid][order],
+                             cols['confidence'][valid][order])
+            rows += int(valid.sum())
+        return rows
+
+    def cover(self, written):
+        """Mark ``{day: rows}`` the aggregator wrote to the store itself as applied."""
+        for day, rows in written.items():
+            self.covered[day] = self.covered.get(day, 0) + rows
+
+    def snapshot(self, ts=None):
+        """Sentiment of every entity as vectors; weights decayed to ``ts`` (epoch ms)."""
+        n = self._size
+        ts = int(time.time() * 1000) if ts is None else ts
+        sums, weights, last = self._sums[:n], self._weights[:n], self._last[:n]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sentiment = np.where(weights > 0, sums / weights, np.nan)
+        age = np.maximum(ts - last, 0)
+        decayed = weights * np.exp(-np.outer(age, self.rates))
+        return SentimentSnapshot(np.arange(n, dtype=np.int32), self.half_lives, sentiment, decayed,
+                                 self._count[:n].copy(), ts)
+
+    def frame(self, snapshot):
+        """A snapshot as a DataFrame indexed by EntityId."""
+        data = {'Scores': snapshot.count}
+        for j, half_life in enumerate(snapshot.half_lives):
+            data[f'Sentiment_{half_life:g}h'] = snapshot.sentiment[:, j]
+            data[f'Weight_{half_life:g}h'] = snapshot.weight[:, j]
+        return pd.DataFrame(data, index=pd.Index(self.entities.names(snapshot.entity_ids), name='EntityId'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time-decayed sentiment per entity')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rep = sub.add_parser('replay', help='catch up from the score store')
+    rep.add_argument('--days', type=float, help='without a checkpoint, start N days back')
+    live = sub.add_parser('live', help='follow the sentiment subscriptions')
+    live.add_argument('topics', nargs='*', default=list(SENTIMENT_TOPICS))
+    live.add_argument('--checkpoint-every', type=float, default=60.0, help='seconds')
+    live.add_argument('--host', default='localhost')
+    live.add_argument('--port', type=int, default=8194)
+    live.add_argument('--app')
+    show = sub.add_parser('show', help='print the current sentiment')
+    show.add_argument('--top', type=int, default=20)
+    show.add_argument('--half-life', type=float, default=24.0, help='rank by this half-life (hours)')
+    for p in (rep, live, show):
+        p.add_argument('--half-lives', type=float, nargs='+', default=list(HALF_LIVES), help='hours')
+        p.add_argument('--analytics-type', nargs='*', help='e.g. SENTIMENT SENTIMENT_SMEDIA (default: all)')
+        p.add_argument('--root', default=str(SENTIMENT_DIR))
+        p.add_argument('--store', default=str(SCORES_DIR))
+    args = parser.parse_args(argv)
+
+    aggregator = SentimentAggregator(args.root, args.half_lives, analytics_types=args.analytics_type)
+    store = ScoreStore(args.store)
+    if args.command == 'replay':
+        start = None
+        if not aggregator.covered and args.days:
+            start = int((time.time() - args.days * 86400) * 1000)
+        started = time.perf_counter()
+        rows = aggregator.replay(store, start=start)
+        aggregator.checkpoint()
+        logging.info('Replayed %d scores for %d entities in %.1fs', rows, len(aggregator),
+                     time.perf_counter() - started)
+    elif args.command == 'live':
+        # Only this mode needs BLPAPI
+        from news_feed import NewsFeed
+
+        rows = aggregator.replay(store)
+        logging.info('Caught up %d stored scores', rows)
+        feed = NewsFeed(args.topics, fields=('suid', 'time_of_arrival', 'scores'),
+                        host=args.host, port=args.port, app=args.app)
+        feed.start()
+        saved = time.monotonic()
+        try:
+            for _, story in feed.stories():
+                aggregator.update_story(story)
+                store.append_story(story)
+                if time.monotonic() - saved >= args.checkpoint_every:
+                    # Scores first, so a restart never replays past what was saved
+                    store.flush()
+                    aggregator.cover(store.written)
+                    store.written.clear()
+                    aggregator.checkpoint()
+                    saved = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            feed.stop()
+            store.flush()
+            aggregator.cover(store.written)
+            aggregator.checkpoint()
+    else:
+        if args.half_life not in aggregator.half_lives:
+            parser.error(f'--half-life must be one of {aggregator.half_lives}')
+        frame = aggregator.frame(aggregator.snapshot())
+        column = f'Sentiment_{args.half_life:g}h'
+        weight = f'Weight_{args.half_life:g}h'
+        # Rank by weighted evidence so one stale score does not top the list
+        ranked = frame.assign(Signal=frame[column] * frame[weight]).sort_values('Signal', ascending=False)
+        print(ranked.head(args.top).to_string())
+        print(json.dumps({'entities': len(frame), 'watermark': aggregator.watermark}))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
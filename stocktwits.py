@@ -12,37 +12,23 @@ import sys
 import re
 import requests
 import json
+import argparse
 from datetime import datetime
 from pathlib import Path
 import logging
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('stocktwits_scraper.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-# Create a sample CSV file with some stock symbols first
-stock_data = {
-    'Symbol': ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META']
-}
-df = pd.DataFrame(stock_data)
-df.to_csv('Stock_indices_NASDAQ.csv', index=False)
-
-# Now read the CSV file
-csvfile = pd.read_csv('Stock_indices_NASDAQ.csv')
-listOfStocks = csvfile["Symbol"]
-listOfStocks_A = listOfStocks[0:5]
-listOfStocks_B = listOfStocks[21:41]
-
-# Initiating the dictionary with its column names
-dict_stocks = {}
-dict_stocks['Symbol'] = []
-dict_stocks['Watchers'] = []
+from browser_pool import ChromeWorkerPool
+from deltas import DeltaStage
+from exporters import EXPORTERS, default_formats, run_exporters, snapshot_frame
+from http_cache import DEFAULT_TTLS, HttpCache
+from metrics import METRICS
+from page_archive import PageArchive, replay, write_replay
+from scheduler import RefreshScheduler, load_importance
+from scrape_logging import configure_logging
+from scrape_journal import ScrapeJournal, latest_run_id
+from universe import load_universe, parse_shard, select_shard, shard_suffix
+from watcher_engine import BASE_URL, find_n_watchers_http
+
 
 def setup_chrome():
     chrome_options = webdriver.ChromeOptions()
@@ -52,101 +38,224 @@ def setup_chrome():
     chrome_options.add_argument('--log-level=3')  # Suppress console messages
     return webdriver.Chrome(options=chrome_options)
 
-def find_n_watchers():
-    stocks_list = [
-        'MSFT', 'AAPL', 'CRM', 'CRWD', 'GOOGL', 'CYBR', 'NVDA', 'LMT', 'SHLD', 
-        'WWD', 'LYB', 'HON', 'HTHIY', 'WM', 'V', 'FISI', 'JPM', 'MA', 'AXP', 
-        'EW', 'XLV', 'NVO', 'WMT', 'COKE', 'DIS', 'AMZN', 'GM', 'DAL', 'TSLA',
-        'DFH', 'DLR', 'STAG', 'AMT', 'NTSX', 'CPK', 'GEV', 'NETZ', 'GLD'
-    ]
-    
+DEFAULT_STOCKS = [
+    'MSFT', 'AAPL', 'CRM', 'CRWD', 'GOOGL', 'CYBR', 'NVDA', 'LMT', 'SHLD', 
+    'WWD', 'LYB', 'HON', 'HTHIY', 'WM', 'V', 'FISI', 'JPM', 'MA', 'AXP', 
+    'EW', 'XLV', 'NVO', 'WMT', 'COKE', 'DIS', 'AMZN', 'GM', 'DAL', 'TSLA',
+    'DFH', 'DLR', 'STAG', 'AMT', 'NTSX', 'CPK', 'GEV', 'NETZ', 'GLD'
+]
+
+def find_n_watchers(stocks_list=None, mode='auto', base_url=BASE_URL, concurrency=16,
+                    rate=10.0, browsers=4, recycle_after=50, journal=None, max_age=None,
+                    archive=None, cache=None):
+    # 'http' fetches pages concurrently without a browser, 'selenium' is the
+    # original headless Chrome loop, and 'auto' runs http first and only
+    # sends the symbols it could not resolve through Chrome.
+    if stocks_list is None:
+        stocks_list = DEFAULT_STOCKS
+
+    # Symbols a previous attempt of this run already journaled are reused
     dict_stocks = {}
-    driver = setup_chrome()
-    retry_delay = 60  # Initial retry delay in seconds
-    max_retries = 3
-    
-    try:
-        for stock in stocks_list:
-            retries = 0
-            while retries < max_retries:
-                try:
-                    logging.info(f"Processing {stock}...")
-                    url = f"https://stocktwits.com/symbol/{stock}"
-                    driver.get(url)
-                    time.sleep(3)  # Reduced initial wait time
-                    
-                    page_source = driver.page_source
-                    json_match = re.search(r'"watchlistCount":(\d+)', page_source)
-                    
-                    if json_match:
-                        watchers = int(json_match.group(1))
-                        dict_stocks[stock] = watchers
-                        logging.info(f"Found {watchers:,} watchers for {stock}")
-                        break  # Success, move to next stock
-                    else:
-                        raise ValueError("Watchers count not found in page source")
-                    
-                except Exception as e:
-                    retries += 1
-                    if retries < max_retries:
-                        wait_time = retry_delay * retries
-                        logging.warning(f"Attempt {retries} failed for {stock}: {str(e)}")
-                        logging.info(f"Waiting {wait_time} seconds before retry...")
-                        time.sleep(wait_time)
-                    else:
-                        logging.error(f"Failed to get data for {stock} after {max_retries} attempts")
-                
-            time.sleep(2)  # Delay between stocks
-            
-    finally:
-        driver.quit()
-    
-    return dict_stocks
+    on_result = None
+    if journal is not None:
+        done = journal.completed(max_age)
+        dict_stocks = {stock: done[stock] for stock in stocks_list if stock in done}
+        if dict_stocks:
+            logging.info('Resuming run %s: %d symbols already done', journal.run_id, len(dict_stocks))
+        on_result = journal.record
+    todo = [stock for stock in stocks_list if stock not in dict_stocks]
+
+    if mode == 'selenium':
+        dict_stocks.update(find_n_watchers_selenium(todo, base_url, browsers, recycle_after, on_result,
+                                                    archive))
+    elif todo:
+        dict_stocks.update(find_n_watchers_http(todo, base_url=base_url, concurrency=concurrency,
+                                                rate=rate, on_result=on_result, archive=archive,
+                                                cache=cache))
 
-def export_data(dict_stocks):
+        missing = [stock for stock in todo if stock not in dict_stocks]
+        if mode == 'auto' and missing:
+            logging.info('Falling back to Selenium for %d symbols: %s', len(missing), ', '.join(missing))
+            dict_stocks.update(find_n_watchers_selenium(missing, base_url, browsers, recycle_after,
+                                                        on_result, archive))
+
+    return {stock: dict_stocks[stock] for stock in stocks_list if stock in dict_stocks}
+
+def find_n_watchers_selenium(stocks_list, base_url=BASE_URL, browsers=4, recycle_after=50,
+                             on_result=None, archive=None):
+    # Each browser worker owns a Chrome instance and pulls symbols from a
+    # shared queue; crashed drivers are replaced and their symbol requeued.
+    if not stocks_list:
+        return {}
+    pool = ChromeWorkerPool(setup_chrome, workers=browsers, pages_per_driver=recycle_after,
+                            base_url=base_url, on_result=on_result, archive=archive)
+    return pool.run(stocks_list)
+
+def export_data(dict_stocks, formats=None, shard=None, delta_abs=50, delta_rel=0.01):
     if not dict_stocks:
         logging.error("No data to export")
         return
     
-    # Create output directory if it doesn't exist
-    output_dir = Path('stock_data')
-    output_dir.mkdir(exist_ok=True)
-    
     # Create DataFrame
-    df = pd.DataFrame.from_dict(dict_stocks, orient='index', columns=['Watchers'])
-    df.index.name = 'Symbol'
+    df = snapshot_frame(dict_stocks)
     
-    # Get current timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Get current timestamp; the store and the file names share it
+    now = datetime.now()
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
     
-    # Export to multiple formats
+    # Append the changed counts to the columnar history first (it is the
+    # canonical record) and write the delta file of symbols that moved
     try:
-        # CSV export
-        csv_path = output_dir / f'stocktwits_watchers_{timestamp}.csv'
-        df.to_csv(csv_path)
-        logging.info(f"Data exported to CSV: {csv_path}")
-        
-        # Excel export
-        excel_path = output_dir / f'stocktwits_watchers_{timestamp}.xlsx'
-        df.to_excel(excel_path)
-        logging.info(f"Data exported to Excel: {excel_path}")
-        
-        # JSON export
-        json_path = output_dir / f'stocktwits_watchers_{timestamp}.json'
-        df.to_json(json_path, indent=4, orient='index')
-        logging.info(f"Data exported to JSON: {json_path}")
+        DeltaStage(abs_threshold=delta_abs, rel_threshold=delta_rel).run(dict_stocks, ts=now.timestamp())
+    except Exception as e:
+        logging.error('Error writing watcher store: %s', e)
+
+    # Export to the selected formats, written concurrently. Shard runs get a
+    # suffix so `python universe.py merge` can combine them afterwards.
+    try:
+        suffix = shard_suffix(*shard) if shard is not None and shard[1] > 1 else ''
+        run_exporters(df, formats, timestamp=timestamp, suffix=suffix)
         
         # Display results
         print("\nFinal Results:")
         print(df.sort_values('Watchers', ascending=False))
         
     except Exception as e:
-        logging.error(f"Error exporting data: {str(e)}")
+        logging.error('Error exporting data: %s', e)
+
+def parse_ttl(value):
+    prefix, _, seconds = value.partition('=')
+    try:
+        return prefix, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PREFIX=SECONDS, got {value!r}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Scrape StockTwits watcher counts')
+    parser.add_argument('--mode', choices=['auto', 'http', 'selenium'], default='auto',
+                        help='fetch engine; auto uses http and falls back to Selenium')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='upper bound for the adaptive number of pages fetched at once')
+    parser.add_argument('--rate', type=float, default=10.0,
+                        help='maximum requests per second')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help='site root, e.g. a local stub server for testing')
+    parser.add_argument('--browsers', type=int, default=4,
+                        help='number of parallel Chrome workers for the Selenium path')
+    parser.add_argument('--recycle-after', type=int, default=50,
+                        help='restart each Chrome worker after this many pages')
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                        help='continue an interrupted run (default: the most recent one)')
+    parser.add_argument('--max-age', type=float, default=180,
+                        help='minutes a journaled result stays fresh enough to reuse')
+    parser.add_argument('--universe', metavar='PATH',
+                        help='CSV or Parquet file with a Symbol column (default: built-in list)')
+    parser.add_argument('--shard', type=parse_shard, default=(0, 1), metavar='i/N',
+                        help='only scrape shard i (0-based) of N of the universe')
+    parser.add_argument('--schedule', action='store_true',
+                        help='keep running and refresh each symbol at its own cadence')
+    parser.add_argument('--budget', type=int, default=600,
+                        help='requests per hour allowed in --schedule mode')
+    parser.add_argument('--importance', metavar='JSON',
+                        help='{"SYMBOL": weight} file; weight 24 means hourly, 1 daily')
+    parser.add_argument('--delta-abs', type=int, default=50,
+                        help='watcher change that puts a symbol in the delta file')
+    parser.add_argument('--delta-rel', type=float, default=0.01,
+                        help='relative change that puts a symbol in the delta file (0.01 = 1%%)')
+    parser.add_argument('--archive', action='store_true',
+                        help='keep every fetched page in the compressed archive (stock_data/archive)')
+    parser.add_argument('--cache', action='store_true',
+                        help='cache pages on disk and revalidate them with conditional requests')
+    parser.add_argument('--cache-size', type=int, default=512,
+                        help='HTTP cache size limit in MB; least recently used pages go first')
+    parser.add_argument('--cache-ttl', action='append', type=parse_ttl, default=[],
+                        metavar='PREFIX=SECONDS',
+                        help='serve URLs under PREFIX from the cache for this long without asking '
+                             f"(repeatable; defaults: {', '.join(f'{k}={v}' for k, v in DEFAULT_TTLS.items())})")
+    parser.add_argument('--replay', action='store_true',
+                        help='re-extract all archived pages (of --universe, if given) instead of scraping')
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help='write stage timings and retry counters here in Prometheus text format')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='serve the same metrics on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--log-json', action='store_true',
+                        help='write stocktwits_scraper.log as JSON lines')
+    parser.add_argument('--sync-logging', action='store_true',
+                        help='log synchronously from the workers instead of through a background writer')
+    parser.add_argument('--formats', type=lambda value: value.split(','),
+                        help=f"comma-separated export formats (available: {', '.join(EXPORTERS)}; "
+                             f"default: {','.join(default_formats())})")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    configure_logging(getattr(logging, args.log_level), json_lines=args.log_json,
+                      blocking=args.sync_logging)
     logging.info("Starting StockTwits scraper...")
-    dict_stocks = find_n_watchers()
-    export_data(dict_stocks)
+
+    if args.replay:
+        # Offline: no network, one process per core over the archive
+        symbols = load_universe(args.universe) if args.universe else None
+        write_replay(replay(symbols=symbols))
+        sys.exit(0)
+
+    stocks_list = load_universe(args.universe) if args.universe else DEFAULT_STOCKS
+    stocks_list = select_shard(stocks_list, *args.shard)
+    logging.info('Universe: %d symbols (shard %d/%d)', len(stocks_list), *args.shard)
+
+    if args.metrics_port is not None:
+        METRICS.serve(args.metrics_port)
+    if args.metrics_file:
+        # Rewritten periodically for long runs, and once more at the end
+        METRICS.start_textfile_writer(args.metrics_file)
+
+    archive = PageArchive() if args.archive else None
+    cache = None
+    if args.cache:
+        cache = HttpCache(max_bytes=args.cache_size * 1024 * 1024,
+                          ttls={**DEFAULT_TTLS, **dict(args.cache_ttl)})
+
+    if args.schedule:
+        def fetch(symbols):
+            return find_n_watchers(symbols, mode=args.mode, base_url=args.base_url,
+                                   concurrency=args.concurrency, rate=args.rate,
+                                   browsers=args.browsers, recycle_after=args.recycle_after,
+                                   archive=archive, cache=cache)
+
+        scheduler = RefreshScheduler(stocks_list, fetch, budget_per_hour=args.budget,
+                                     importance=load_importance(args.importance))
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            logging.info("Scheduler stopped")
+        if args.metrics_file:
+            METRICS.write_textfile(args.metrics_file)
+        sys.exit(0)
+
+    run_id = args.resume
+    if run_id == 'latest':
+        run_id = latest_run_id()
+        if run_id is None:
+            logging.warning("No previous run to resume, starting a new one")
+
+    with ScrapeJournal(run_id) as journal:
+        logging.info('Run id: %s', journal.run_id)
+        try:
+            dict_stocks = find_n_watchers(stocks_list, mode=args.mode, base_url=args.base_url,
+                                          concurrency=args.concurrency, rate=args.rate,
+                                          browsers=args.browsers,
+                                          recycle_after=args.recycle_after,
+                                          journal=journal, max_age=args.max_age * 60,
+                                          archive=archive, cache=cache)
+        except KeyboardInterrupt:
+            journal.flush()
+            logging.warning('Interrupted; continue with: python stocktwits.py --resume %s', journal.run_id)
+            sys.exit(130)
+
+    export_data(dict_stocks, args.formats, args.shard, args.delta_abs, args.delta_rel)
+    if args.metrics_file:
+        METRICS.write_textfile(args.metrics_file)
     logging.info("Scraping completed!")
 
 
@@ -0,0 +1,417 @@
+"""StockTwits message-stream ingester.
+
+Pages through ``api/2/streams/symbol/<SYMBOL>.json`` for many symbols at
+once. Each symbol remembers the newest message id it has ingested; a poll
+asks for messages ``since`` that id and walks back with ``max`` cursors
+until it meets it, so every poll only transfers what is new.
+
+Messages go to an append-only sink under ``stock_data/messages``::
+
+    20250205.jsonl                raw messages, one JSON object per line
+    columns/20250205/id.i8        message id
+    columns/20250205/ts.i8        created_at, epoch seconds
+    columns/20250205/sym.i4       stream symbol id (symbols.json)
+    columns/20250205/user.i8      author id
+    columns/20250205/sentiment.i1 1 bullish, -1 bearish, 0 unlabeled
+    cursors.json                  newest ingested id per symbol
+    gaps.json                     id ranges a poll ran out of pages for
+
+Duplicates (overlapping pages, restarts) are dropped by :class:`MessageDedup`,
+keyed by message id and stream symbol: a message that mentions several
+symbols is stored once in each of their streams, so per-symbol counts include
+it. Ids above the high-water mark are new, keys in an exact window of recent
+ones are not, and anything older is checked against a Bloom filter sized for
+tens of millions of keys.
+
+    python stream_ingester.py AAPL NVDA --poll 60
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+
+from metrics import METRICS
+from rate_limiter import RateController, parse_retry_after
+from universe import load_universe
+from watcher_engine import DEFAULT_HEADERS, is_congestion
+from watcher_store import PartitionedTable, SymbolTable, day_of
+
+API_URL = 'https://api.stocktwits.com/api/2'
+MESSAGES_DIR = Path('stock_data') / 'messages'
+MESSAGE_COLUMNS = {'id': np.int64, 'ts': np.int64, 'sym': np.int32, 'user': np.int64, 'sentiment': np.int8}
+SENTIMENT = {'Bullish': 1, 'Bearish': -1}
+# Dedup keys hold the message id above the symbol id: exact for up to 2**20
+# symbols and ids below 2**43
+SYMBOL_BITS = 20
+DEDUP_KEY = 'id,sym'
+
+
+def stream_url(symbol, api_url=API_URL):
+    return f"{api_url.rstrip('/')}/streams/symbol/{symbol}.json"
+
+
+def dedup_keys(ids, sym):
+    """One int64 per ``(message id, symbol id)`` pair; ``sym`` may be a scalar."""
+    return (np.asarray(ids, dtype=np.int64) << SYMBOL_BITS) | np.asarray(sym, dtype=np.int64)
+
+
+def _mix64(x):
+    # splitmix64 finalizer; numpy uint64 arithmetic wraps silently
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class BloomFilter:
+    def __init__(self, capacity=20_000_000, error_rate=1e-4, bits=None, hashes=None):
+        if bits is None:
+            size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+            bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+            hashes = max(1, round(size / capacity * math.log(2)))
+        self.bits = bits
+        self.size = len(bits) * 8
+        self.hashes = hashes
+
+    def _positions(self, ids):
+        x = np.asarray(ids, dtype=np.int64).astype(np.uint64)
+        h1 = _mix64(x)
+        h2 = _mix64(x ^ np.uint64(0x9E3779B97F4A7C15)) | np.uint64(1)
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.size)
+
+    def add(self, ids):
+        positions = self._positions(ids).ravel()
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.intp),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+
+    def contains(self, ids):
+        """Per id: False if certainly never added, True if probably added."""
+        positions = self._positions(ids)
+        hits = (self.bits[(positions >> np.uint64(3)).astype(np.intp)]
+                >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
+
+class MessageDedup:
+    def __init__(self, root, capacity=20_000_000, error_rate=1e-4, window=200_000):
+        self.root = Path(root)
+        self.window = window
+        bloom_path = self.root / 'bloom.npy'
+        state_path = self.root / 'state.json'
+        state = json.loads(state_path.read_text()) if state_path.exists() else {}
+        if state and state.get('key') != DEDUP_KEY:
+            # Filters of bare message ids predate per-symbol keys; catch_up
+            # rebuilds them from the sink
+            logging.info('Rebuilding the message dedup filter in %s', self.root)
+            state = {'high_water': state.get('high_water', 0)}
+        if bloom_path.exists() and 'hashes' in state:
+            self.bloom = BloomFilter(bits=np.load(bloom_path), hashes=state['hashes'])
+        else:
+            self.bloom = BloomFilter(capacity, error_rate)
+        # Highest message id seen in any stream
+        self.high_water = state.get('high_water', 0)
+        # Sink rows already reflected in the saved filter, per day partition
+        self.covered = state.get('covered', {})
+        recent_path = self.root / 'recent.npy'
+        recent = np.load(recent_path) if 'hashes' in state and recent_path.exists() else []
+        self._order = deque(int(i) for i in recent[-window:])
+        self._recent = set(self._order)
+        self.dirty = False
+
+    def filter_new(self, ids, sym):
+        """Boolean mask of the ``ids`` not seen before in the stream of symbol id ``sym``.
+
+        Also unique within ``ids``; ``sym`` is one id or one per message.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        keys = dedup_keys(ids, sym)
+        new = ids > self.high_water
+        older = ~new
+        if older.any():
+            in_window = np.fromiter((int(k) in self._recent for k in keys[older]), dtype=bool,
+                                    count=int(older.sum()))
+            candidates = np.flatnonzero(older)[~in_window]
+            if len(candidates):
+                new[candidates] = ~self.bloom.contains(keys[candidates])
+        # The same message twice in one batch counts once
+        first = np.zeros(len(ids), dtype=bool)
+        first[np.unique(keys, return_index=True)[1]] = True
+        return new & first
+
+    def add(self, ids, sym):
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        keys = dedup_keys(ids, sym)
+        self.bloom.add(keys)
+        self.dirty = True
+        self.high_water = max(self.high_water, int(ids.max()))
+        for key in keys.tolist():
+            self._order.append(key)
+            self._recent.add(key)
+        while len(self._order) > self.window:
+            self._recent.discard(self._order.popleft())
+
+    def catch_up(self, sink):
+        """Add sink rows written after the last checkpoint (e.g. before a crash)."""
+        for day in sink.columns.days(min(self.covered, default=None)):
+            cols = sink.columns.read(day, ['id', 'sym'])
+            start = self.covered.get(day, 0)
+            if len(cols['id']) > start:
+                self.add(np.asarray(cols['id'][start:]), np.asarray(cols['sym'][start:]))
+            self.covered[day] = len(cols['id'])
+
+    def save(self, sink):
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Backfills can land in old days, so recount them all (file sizes only)
+        for day in sink.columns.days():
+            self.covered[day] = len(sink.columns.read(day)['id'])
+        tmp = self.root / 'bloom.tmp.npy'
+        np.save(tmp, self.bloom.bits)
+        os.replace(tmp, self.root / 'bloom.npy')
+        tmp = self.root / 'recent.tmp.npy'
+        np.save(tmp, np.fromiter(self._order, dtype=np.int64, count=len(self._order)))
+        os.replace(tmp, self.root / 'recent.npy')
+        state = {'key': DEDUP_KEY, 'hashes': self.bloom.hashes, 'high_water': self.high_water,
+                 'covered': self.covered}
+        tmp = self.root / 'state.tmp'
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self.root / 'state.json')
+        self.dirty = False
+
+
+def _created_at(message):
+    try:
+        return int(datetime.fromisoformat(message['created_at'].replace('Z', '+00:00')).timestamp())
+    except (KeyError, TypeError, ValueError):
+        return int(time.time())
+
+
+class MessageSink:
+    def __init__(self, root=MESSAGES_DIR):
+        self.root = Path(root)
+        self.symbols = SymbolTable(self.root / 'symbols.json')
+        self.columns = PartitionedTable(self.root / 'columns', MESSAGE_COLUMNS)
+
+    def append(self, symbol, messages):
+        """Write ``messages`` (decoded API objects) under their created_at day."""
+        sym = int(self.symbols.intern([symbol])[0])
+        by_day = {}
+        for message in messages:
+            ts = _created_at(message)
+            by_day.setdefault(day_of(ts), []).append((ts, message))
+        for day, rows in by_day.items():
+            self.root.mkdir(parents=True, exist_ok=True)
+            # Raw lines first, columns second; the columns are what dedup trusts
+            with open(self.root / f'{day}.jsonl', 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(message, separators=(',', ':')) + '\n' for _, message in rows)
+            self.columns.append(
+                day,
+                id=[int(message['id']) for _, message in rows],
+                ts=[ts for ts, _ in rows],
+                sym=[sym] * len(rows),
+                user=[int((message.get('user') or {}).get('id') or 0) for _, message in rows],
+                sentiment=[SENTIMENT.get((((message.get('entities') or {}).get('sentiment')) or {})
+                                         .get('basic'), 0) for _, message in rows],
+            )
+
+
+class StreamIngester:
+    def __init__(self, sink=None, dedup=None, api_url=API_URL, controller=None, max_pages=10,
+                 max_retries=3, save_interval=300.0):
+        self.sink = sink or MessageSink()
+        self.dedup = dedup or MessageDedup(self.sink.root / 'dedup')
+        self.dedup.catch_up(self.sink)
+        self.api_url = api_url
+        # The public API allows a few hundred requests an hour
+        self.controller = controller or RateController(rate=0.5, burst=5, initial_concurrency=2,
+                                                       max_concurrency=8)
+        # Pages walked back per symbol and poll; bounds the first backfill
+        self.max_pages = max_pages
+        self.max_retries = max_retries
+        self.cursors_path = self.sink.root / 'cursors.json'
+        self.cursors = json.loads(self.cursors_path.read_text()) if self.cursors_path.exists() else {}
+        # Unfetched id ranges per symbol, [since, max], newest first
+        self.gaps_path = self.sink.root / 'gaps.json'
+        self.gaps = json.loads(self.gaps_path.read_text()) if self.gaps_path.exists() else {}
+        self.save_interval = save_interval
+        self._dedup_saved = time.monotonic()
+
+    async def _get(self, session, symbol, params):
+        for attempt in range(self.max_retries):
+            retry_after = None
+            try:
+                async with self.controller.slot():
+                    start = time.monotonic()
+                    try:
+                        async with session.get(stream_url(symbol, self.api_url), params=params) as response:
+                            if response.status == 429 or response.status >= 500:
+                                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                            response.raise_for_status()
+                            payload = await response.json(content_type=None)
+                    except Exception as e:
+                        if is_congestion(e):
+                            self.controller.on_congestion(retry_after)
+                            METRICS.inc('throttled', symbol)
+                        raise
+                    finally:
+                        METRICS.observe('stream_fetch', time.monotonic() - start, symbol)
+                    self.controller.on_success(time.monotonic() - start)
+                return payload
+            except Exception as e:
+                if attempt + 1 < self.max_retries:
+                    METRICS.inc('retries', symbol)
+                    logging.warning('Stream page for %s failed: %s', symbol, e, extra={'symbol': symbol})
+                    await asyncio.sleep(self.controller.backoff.delay(attempt, retry_after))
+                else:
+                    METRICS.inc('failures', symbol)
+                    raise
+
+    async def poll_symbol(self, session, symbol):
+        """Ingest everything newer than the symbol's cursor; returns messages written.
+
+        A walk that runs out of pages before reaching the previous cursor
+        leaves a gap ``[since, max]`` that later polls keep filling, oldest
+        pages last, so nothing between polls is skipped.
+        """
+        since = self.cursors.get(symbol)
+        written, newest, pages, resume = await self._walk(session, symbol, since, None, self.max_pages)
+        gaps = self.gaps.get(symbol, [])
+        if resume is not None and since:
+            gaps.insert(0, [since, resume])
+        if newest:
+            self.cursors[symbol] = max(newest, since or 0)
+        while gaps and pages < self.max_pages:
+            gap_since, gap_max = gaps[0]
+            count, _, used, resume = await self._walk(session, symbol, gap_since, gap_max,
+                                                      self.max_pages - pages)
+            written += count
+            pages += used
+            if resume is None:
+                gaps.pop(0)
+            else:
+                gaps[0][1] = resume
+        if gaps:
+            self.gaps[symbol] = gaps
+        else:
+            self.gaps.pop(symbol, None)
+        return written
+
+    async def _walk(self, session, symbol, since, max_id, budget):
+        """Page back from ``max_id`` (or the newest message) towards ``since``.
+
+        Returns ``(written, newest id seen, pages, resume)``; ``resume`` is the
+        ``max`` to continue from when the budget ran out first, else None.
+        """
+        params = {}
+        if since:
+            params['since'] = since
+        if max_id:
+            params['max'] = max_id
+        sym = int(self.sink.symbols.intern([symbol])[0])
+        newest = written = pages = 0
+        while pages < budget:
+            payload = await self._get(session, symbol, params)
+            pages += 1
+            messages = payload.get('messages') or []
+            if not messages:
+                return written, newest, pages, None
+            ids = np.fromiter((int(m['id']) for m in messages), dtype=np.int64, count=len(messages))
+            new = self.dedup.filter_new(ids, sym)
+            if new.any():
+                self.sink.append(symbol, [m for m, keep in zip(messages, new) if keep])
+                self.dedup.add(ids[new], sym)
+                written += int(new.sum())
+            newest = max(newest, int(ids.max()))
+
+            cursor = payload.get('cursor') or {}
+            oldest = int(ids.min())
+            # Stop once the page reaches what the previous poll already had
+            if not cursor.get('more') or (since and oldest <= since):
+                return written, newest, pages, None
+            params['max'] = cursor.get('max') or oldest - 1
+        return written, newest, pages, params.get('max')
+
+    def _save(self, force=False):
+        for path, state in ((self.cursors_path, self.cursors), (self.gaps_path, self.gaps)):
+            tmp = path.with_suffix('.tmp')
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(state))
+            os.replace(tmp, path)
+        # The Bloom filter is megabytes; catch_up covers sink rows written since
+        # the last save, so it only needs writing now and then
+        if force or (self.dedup.dirty and time.monotonic() - self._dedup_saved >= self.save_interval):
+            self.dedup.save(self.sink)
+            self._dedup_saved = time.monotonic()
+
+    async def poll(self, symbols, timeout=30):
+        """One pass over ``symbols``, concurrently; returns ``{symbol: messages written}``."""
+        connector = aiohttp.TCPConnector(limit=self.controller.aimd.maximum, keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS,
+                                         timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            results = await asyncio.gather(*(self.poll_symbol(session, s) for s in symbols),
+                                           return_exceptions=True)
+        self._save()
+
+        written = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logging.error('Could not poll the stream for %s: %s', symbol, result, extra={'symbol': symbol})
+            else:
+                written[symbol] = result
+        logging.info('Ingested %d new messages from %d/%d streams', sum(written.values()), len(written),
+                     len(symbols))
+        return written
+
+    async def run(self, symbols, interval=60.0):
+        """Poll every ``interval`` seconds on one event loop, until cancelled."""
+        try:
+            while True:
+                started = time.monotonic()
+                await self.poll(symbols)
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            self._save(force=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingest StockTwits symbol message streams')
+    parser.add_argument('symbols', nargs='*')
+    parser.add_argument('--universe', metavar='PATH', help='CSV or Parquet file with a Symbol column')
+    parser.add_argument('--api-url', default=API_URL)
+    parser.add_argument('--rate', type=float, default=0.5, help='maximum requests per second')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--max-pages', type=int, default=10, help='pages walked back per symbol and poll')
+    parser.add_argument('--poll', type=float, metavar='SECONDS', help='keep polling at this interval')
+    args = parser.parse_args(argv)
+
+    symbols = [s.upper() for s in args.symbols] + (load_universe(args.universe) if args.universe else [])
+    if not symbols:
+        parser.error('give some symbols or --universe')
+    controller = RateController(rate=args.rate, burst=max(1, int(args.rate * 10)),
+                                initial_concurrency=min(2, args.concurrency),
+                                max_concurrency=args.concurrency)
+    ingester = StreamIngester(api_url=args.api_url, controller=controller, max_pages=args.max_pages)
+    if args.poll:
+        try:
+            asyncio.run(ingester.run(symbols, args.poll))
+        except KeyboardInterrupt:
+            logging.info("Ingester stopped")
+    else:
+        asyncio.run(ingester.poll(symbols))
+        ingester._save(force=True)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import WatcherMatrix, analyze, load_matrix, read_analytics, write_analytics
+from watcher_store import WatcherStore, day_of
+
+DAY = 86400
+T = 1_738_000_000
+
+
+def test_load_matrix_carries_counts_forward(tmp_path):
+    store = WatcherStore(tmp_path)
+    store.append_snapshot({'AAPL': 100, 'NVDA': 50}, ts=T - 10 * DAY)
+    store.append_snapshot({'AAPL': 110}, ts=T)
+    store.append_snapshot({'AAPL': 120}, ts=T + 3600)
+    store.append_snapshot({'NVDA': 70, 'TSLA': 5}, ts=T + 2 * DAY)
+    matrix = load_matrix(store, days=3, end=T + 2 * DAY)
+    assert matrix.days == [day_of(T), day_of(T + DAY), day_of(T + 2 * DAY)]
+    by_symbol = dict(zip(store.symbols.names(matrix.sym_ids), matrix.counts.tolist()))
+    # The last count of a day, carried over empty days and from before the window
+    assert by_symbol['AAPL'] == [120, 120, 120]
+    assert by_symbol['NVDA'] == [50, 50, 70]
+    assert np.isnan(by_symbol['TSLA'][:2]).all() and by_symbol['TSLA'][2] == 5
+    only = load_matrix(store, ['NVDA', 'MSFT'], days=3, end=T + 2 * DAY)
+    assert store.symbols.names(only.sym_ids).tolist() == ['NVDA']
+
+
+def test_growth_and_ranks():
+    counts = np.array([[100.0] * 7 + [110.0, 121.0], [300.0] * 8 + [90.0], [np.nan] * 8 + [200.0]])
+    result = analyze(WatcherMatrix(np.arange(3, dtype=np.int32), list('abcdefghi'), counts))
+    assert result.dod[0, -1] == pytest.approx(0.1)
+    assert result.wow[0, -1] == pytest.approx(0.21)
+    assert result.dod[1, -1] == pytest.approx(-0.7)
+    assert np.isnan(result.dod[2, -1])
+    assert result.rank[:, -2].tolist() == [2, 1, 3]
+    assert result.rank[:, -1].tolist() == [2, 3, 1]
+    assert result.rank_change[:, -1].tolist() == [0, -2, 2]
+
+
+def test_zscore_matches_a_rolling_reference():
+    rng = np.random.default_rng(5)
+    counts = np.exp(np.cumsum(rng.normal(0, 0.02, (20, 90)), axis=1)) * 1000
+    counts[3, 40:50] = np.nan
+    result = analyze(WatcherMatrix(np.arange(20, dtype=np.int32), list(range(90)), counts), window=30)
+    changes = pd.DataFrame(np.log(counts)).diff(axis=1).T
+    previous = changes.shift(1).rolling(30, min_periods=10)
+    expected = ((changes - previous.mean()) / previous.std(ddof=0)).T.to_numpy()
+    np.testing.assert_allclose(result.zscore[:, 40:], expected[:, 40:], rtol=1e-6, atol=1e-8)
+
+
+def test_breakout_needs_a_jump_and_weekly_growth():
+    counts = np.full((2, 40), 1000.0)
+    counts[:, :39] *= np.exp(np.linspace(0, 0.01, 39))
+    counts[0, 39] = counts[0, 38] * 1.5
+    counts[1, 39] = counts[1, 38] * 1.01
+    result = analyze(WatcherMatrix(np.arange(2, dtype=np.int32), list(range(40)), counts))
+    assert result.breakout[:, -1].tolist() == [True, False]
+
+
+def test_write_and_read_back(tmp_path):
+    store = WatcherStore(tmp_path)
+    for day in range(10):
+        store.append_snapshot({'AAPL': 1000 + 10 * day, 'NVDA': 500 + 100 * day}, ts=T + day * DAY)
+    result = analyze(load_matrix(store, days=10, end=T + 9 * DAY))
+    assert write_analytics(store, result, last_days=2) == 2
+    df = read_analytics(store, day_of(T + 9 * DAY))
+    assert df.loc['NVDA', 'count'] == 1400
+    assert df.loc['NVDA', 'rank'] == 1
+    assert df.loc['AAPL', 'dod'] == pytest.approx(1090 / 1080 - 1)
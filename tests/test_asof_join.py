@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from asof_join import asof_join, normalize_tickers, sentiment_csv_chunks, watcher_chunks, with_symbol_ids
+from watcher_store import WatcherStore
+
+T = pd.Timestamp('2025-02-05', tz='UTC')
+
+
+def frames(rng, rows, keys, span, **columns):
+    times = T + pd.to_timedelta(np.sort(rng.integers(0, span, rows)), unit='s')
+    return pd.DataFrame({'Timestamp': times, 'sym': rng.integers(0, keys, rows).astype(np.int32),
+                         **{name: rng.integers(0, 1000, rows) for name in columns}})
+
+
+def chunks(df, size):
+    return [df.iloc[i:i + size].reset_index(drop=True) for i in range(0, len(df), size)]
+
+
+@pytest.mark.parametrize('direction, tolerance', [('backward', None), ('backward', 600),
+                                                  ('forward', 600), ('nearest', 300)])
+@pytest.mark.parametrize('left_size, right_size', [(7, 5), (50, 200), (1000, 1000)])
+def test_chunked_join_matches_merge_asof(direction, tolerance, left_size, right_size):
+    rng = np.random.default_rng(11)
+    left = frames(rng, 400, 12, 86400, Score=True)
+    right = frames(rng, 900, 12, 86400, Watchers=True)
+    joined = pd.concat(asof_join(chunks(left, left_size), chunks(right, right_size), by='sym',
+                                 direction=direction, tolerance=tolerance), ignore_index=True)
+    expected = pd.merge_asof(left, right.assign(Timestamp_right=right['Timestamp']), on='Timestamp',
+                             by='sym', direction=direction,
+                             tolerance=pd.Timedelta(seconds=tolerance) if tolerance else None)
+    pd.testing.assert_frame_equal(joined, expected, check_dtype=False)
+
+
+def test_unsorted_or_unbounded_input_is_rejected():
+    rng = np.random.default_rng(1)
+    left = frames(rng, 20, 3, 3600, Score=True)
+    right = frames(rng, 20, 3, 3600, Watchers=True)
+    with pytest.raises(ValueError):
+        list(asof_join([left.iloc[::-1]], [right], by='sym'))
+    with pytest.raises(ValueError):
+        list(asof_join(chunks(left, 5), [right.iloc[10:], right.iloc[:10]], by='sym'))
+    with pytest.raises(ValueError):
+        list(asof_join([left], [right], by='sym', direction='forward'))
+
+
+def test_normalize_tickers():
+    assert list(normalize_tickers(['AAPL', 'nvda@US', 'BRK.B US Equity', 'VOD@LN', 'IBM/US'])) == \
+        ['AAPL', 'NVDA', 'BRK.B', None, 'IBM']
+
+
+def test_sentiment_csv_has_one_row_per_ticker(tmp_path):
+    path = tmp_path / 'sentiment.csv'
+    path.write_text(
+        'SUID,TimeOfArrival,AnalyticsType,WireName,DerivedTickersId,Score,Confidence,Headline\n'
+        'S2,2025-02-05T10:00:01.000+00:00,SENTIMENT,BN,AAPL@US;VOD@LN,1;-1,80;70,b\n'
+        'S1,2025-02-05T10:00:00.000+00:00,SENTIMENT_SMEDIA,TWT,NVDA,0,55,a\n'
+    )
+    df = pd.concat(sentiment_csv_chunks([path]))
+    assert df['SUID'].tolist() == ['S1', 'S2', 'S2']
+    assert df['Symbol'].tolist()[:2] == ['NVDA', 'AAPL'] and pd.isna(df['Symbol'].iloc[2])
+    assert df['Score'].tolist() == [0, 1, -1]
+    only_news = pd.concat(sentiment_csv_chunks([path], analytics_type='SENTIMENT'))
+    assert only_news['Ticker'].tolist() == ['AAPL@US', 'VOD@LN']
+
+
+def test_sentiment_joined_to_stored_watchers(tmp_path):
+    store = WatcherStore(tmp_path / 'store')
+    ts = int(T.timestamp()) + 36000
+    store.append_snapshot({'AAPL': 100, 'NVDA': 50}, ts=ts - 600)
+    store.append_snapshot({'AAPL': 110}, ts=ts + 60)
+    path = tmp_path / 'sentiment.csv'
+    path.write_text(
+        'SUID,TimeOfArrival,AnalyticsType,WireName,DerivedTickersId,Score,Confidence,Headline\n'
+        'S1,2025-02-05T10:00:00.000+00:00,SENTIMENT,BN,AAPL@US;NVDA@US,1;-1,80;70,a\n'
+        'S2,2025-02-05T10:02:00.000+00:00,SENTIMENT,BN,AAPL@US;TSLA@US,1;1,80;70,b\n'
+    )
+    left = with_symbol_ids(sentiment_csv_chunks([path]), store.symbols)
+    df = pd.concat(asof_join(left, watcher_chunks(store), by='sym'), ignore_index=True)
+    assert df['Symbol'].tolist() == ['AAPL', 'NVDA', 'AAPL', 'TSLA']
+    assert df['Watchers'].tolist()[:3] == [100, 50, 110] and pd.isna(df['Watchers'].iloc[3])
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from selenium.common.exceptions import WebDriverException
+
+from browser_pool import ChromeWorkerPool
+from rate_limiter import Backoff
+
+WATCHERS = {'AAPL': 1200, 'NVDA': 3400, 'TSLA': 560, 'AMD': 78, 'MSFT': 910}
+
+
+class FakeDriver:
+    """Serves a page per symbol URL; ``failures`` maps a symbol to errors to raise first."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.page_source = ''
+        self.quit_calls = 0
+
+    def get(self, url):
+        symbol = url.rsplit('/', 1)[-1]
+        with self.browser.lock:
+            self.browser.loads.append(symbol)
+            failures = self.browser.failures.get(symbol)
+            error = failures.pop(0) if failures else None
+        if error is not None:
+            raise error
+        self.page_source = '{"symbol":"%s","watchlistCount":%d}' % (symbol, WATCHERS[symbol])
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class FakeBrowser:
+    def __init__(self, failures=None, broken_starts=0):
+        self.lock = threading.Lock()
+        self.failures = failures or {}
+        self.broken_starts = broken_starts
+        self.drivers = []
+        self.loads = []
+
+    def __call__(self):
+        with self.lock:
+            if self.broken_starts:
+                self.broken_starts -= 1
+                raise RuntimeError('chrome failed to start')
+            driver = FakeDriver(self)
+            self.drivers.append(driver)
+            return driver
+
+
+def pool(browser, **kwargs):
+    kwargs.setdefault('backoff', Backoff(base=0.01, cap=0.01))
+    return ChromeWorkerPool(browser, page_wait=0, base_url='http://fake', **kwargs)
+
+
+def test_results_come_back_in_input_order():
+    browser = FakeBrowser()
+    seen = []
+    results = pool(browser, workers=3, on_result=lambda *item: seen.append(item)).run(
+        list(WATCHERS) + ['AAPL'])
+    assert list(results.items()) == list(WATCHERS.items())
+    assert sorted(seen) == sorted(WATCHERS.items())
+    assert all(driver.quit_calls == 1 for driver in browser.drivers)
+
+
+def test_drivers_are_recycled():
+    browser = FakeBrowser()
+    assert pool(browser, workers=1, pages_per_driver=2).run(WATCHERS) == WATCHERS
+    assert len(browser.drivers) == 3
+
+
+def test_a_browser_error_replaces_the_driver_and_retries():
+    browser = FakeBrowser({'NVDA': [WebDriverException('tab crashed')]})
+    assert pool(browser, workers=1).run(['AAPL', 'NVDA', 'TSLA']) == \
+        {'AAPL': 1200, 'NVDA': 3400, 'TSLA': 560}
+    assert browser.loads.count('NVDA') == 2
+    assert len(browser.drivers) == 2
+
+
+def test_a_symbol_is_dropped_after_max_retries():
+    browser = FakeBrowser({'AMD': [ValueError('blank page')] * 5})
+    results = pool(browser, workers=2, max_retries=3).run(['AMD', 'MSFT'])
+    assert results == {'MSFT': 910}
+    assert browser.loads.count('AMD') == 3
+
+
+def test_dead_workers_are_replaced_without_losing_symbols():
+    browser = FakeBrowser(broken_starts=2)
+    assert pool(browser, workers=2).run(WATCHERS) == WATCHERS
+
+
+def test_gives_up_when_every_restart_fails():
+    browser = FakeBrowser(broken_starts=100)
+    assert pool(browser, workers=2, max_restarts=1).run(['AAPL', 'NVDA']) == {}
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from deltas import DeltaStage, compute_delta, main, read_delta, write_delta
+from watcher_store import WatcherStore
+
+T = 1_738_000_000
+
+
+def test_cli_takes_the_store_after_the_command(tmp_path, capsys):
+    store = WatcherStore(tmp_path / 'store')
+    delta = DeltaStage(store, tmp_path / 'deltas').run({'AAPL': 100, 'NVDA': 200}, ts=T)
+    assert len(delta) == 2
+    main(['show', str(next((tmp_path / 'deltas').glob('*.bin'))), '--store', str(tmp_path / 'store')])
+    out = capsys.readouterr().out
+    assert '2 rows' in out and 'AAPL' in out and 'NVDA' in out
+
+
+def test_compute_delta_thresholds():
+    previous = {'AAPL': 10_000, 'NVDA': 10_000, 'TSLA': 100, 'ZERO': 0}
+    current = {'AAPL': 10_060, 'NVDA': 10_020, 'TSLA': 102, 'ZERO': 3, 'NEW': 7}
+    delta = compute_delta(previous, current, abs_threshold=50, rel_threshold=0.01)
+    # NVDA moved by 20 (0.2%): below both thresholds
+    assert delta['Symbol'].tolist() == ['AAPL', 'TSLA', 'ZERO', 'NEW']
+    assert delta['Change'].tolist() == [60, 2, 3, 7]
+    assert np.isnan(delta['Previous'].iloc[-1])
+
+
+def test_delta_file_round_trip(tmp_path):
+    path = write_delta(tmp_path / 'd.bin', T, [3, 1], [100, 200], [-5, 200])
+    ts, records = read_delta(path)
+    assert ts == T
+    assert records['sym'].tolist() == [3, 1]
+    assert records['watchers'].tolist() == [100, 200]
+    assert records['change'].tolist() == [-5, 200]
+    path.write_bytes(b'XXXX' + path.read_bytes()[4:])
+    with pytest.raises(ValueError):
+        read_delta(path)
+
+
+def test_slow_drift_is_reported_once_it_adds_up(tmp_path):
+    store = WatcherStore(tmp_path / 'store')
+    stage = DeltaStage(store, tmp_path / 'deltas', abs_threshold=50, rel_threshold=1.0)
+    assert stage.run({'AAPL': 1000}, ts=T)['Symbol'].tolist() == ['AAPL']
+    # +30 twice: neither step passes, but against the last emitted count the second does
+    assert stage.run({'AAPL': 1030}, ts=T + 60).empty
+    assert stage.run({'AAPL': 1060}, ts=T + 120)['Change'].tolist() == [60]
+    # Every scrape was stored (changes only), not only the emitted rows
+    assert store.query()[2].tolist() == [1000, 1030, 1060]
+    ts, records = read_delta(sorted((tmp_path / 'deltas').glob('*.bin'))[-1])
+    assert ts == T + 120
+    assert records['watchers'].tolist() == [1060]
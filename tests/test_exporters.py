@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+import pytest
+
+import exporters
+from exporters import default_formats, export_from_store, run_exporters, snapshot_frame
+from watcher_store import WatcherStore
+
+STOCKS = {'AAPL': 1200, 'NVDA': 3400}
+
+
+def test_default_formats_skip_lazy_ones():
+    assert 'csv' in default_formats()
+    assert 'json' in default_formats()
+    assert 'xlsx' not in default_formats()
+
+
+def test_run_exporters_writes_each_format(tmp_path):
+    paths = run_exporters(snapshot_frame(STOCKS), output_dir=tmp_path, timestamp='20250205_100000')
+    assert set(paths) == set(default_formats())
+    assert paths['csv'] == tmp_path / 'stocktwits_watchers_20250205_100000.csv'
+    assert pd.read_csv(paths['csv'], index_col='Symbol')['Watchers'].to_dict() == STOCKS
+    assert json.loads(paths['json'].read_text()) == {symbol: {'Watchers': count} for symbol, count in STOCKS.items()}
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        run_exporters(snapshot_frame(STOCKS), ['csv', 'parquet2'], tmp_path)
+
+
+def test_a_failing_exporter_does_not_stop_the_others(tmp_path, monkeypatch):
+    monkeypatch.setitem(exporters.EXPORTERS, 'broken', (lambda df, path: 1 / 0, 'txt', False))
+    paths = run_exporters(snapshot_frame(STOCKS), ['csv', 'broken'], tmp_path, '20250205_100000')
+    assert list(paths) == ['csv']
+    assert paths['csv'].exists()
+
+
+def test_export_from_store(tmp_path):
+    store = WatcherStore(tmp_path / 'store')
+    store.append_snapshot({'AAPL': 1000}, ts=1_738_750_000)
+    store.append_snapshot(STOCKS, ts=1_738_760_000, changes_only=True)
+    paths = export_from_store(['csv', 'xlsx'], store=store, output_dir=tmp_path / 'out')
+    assert pd.read_excel(paths['xlsx'], index_col='Symbol')['Watchers'].to_dict() == STOCKS
+    assert export_from_store(['csv'], store=WatcherStore(tmp_path / 'empty'), output_dir=tmp_path) == {}
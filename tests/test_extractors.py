@@ -0,0 +1,79 @@
+import pytest
+
+from benchmarks.pages import load_recorded_page, symbol_page
+from extractors import (NextDataStream, StreamExtractor, SymbolStats, extract_from_chunks, extract_symbol_stats,
+                        extract_watchers, find_next_data)
+
+PAGE = symbol_page('NVDA', 1234567, load_recorded_page())
+
+
+def chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_extract_watchers():
+    assert extract_watchers(PAGE) == 1234567
+    assert extract_watchers(PAGE.decode('utf-8')) == 1234567
+    assert extract_watchers(load_recorded_page()) is None
+
+
+@pytest.mark.parametrize('size', [1, 3, 7, 64, 4096])
+def test_stream_extractor_finds_matches_split_across_chunks(size):
+    extractor = extract_from_chunks(chunks(PAGE, size))
+    assert extractor.found == {'watchers': 1234567}
+    # It stopped reading once the count was complete
+    assert extractor.bytes_read < len(PAGE)
+
+
+def test_digits_split_at_a_chunk_boundary_are_not_cut_short():
+    extractor = StreamExtractor()
+    assert not extractor.feed(b'xx"watchlistCount":12')
+    assert extractor.feed(b'34,"other":1')
+    assert extractor.found == {'watchers': 1234}
+
+
+def test_match_at_the_end_of_the_page_is_taken_on_close():
+    extractor = StreamExtractor()
+    assert not extractor.feed(b'{"watchlistCount":99')
+    assert extractor.close() == {'watchers': 99}
+
+
+def test_missing_field_reads_the_whole_page():
+    extractor = extract_from_chunks(chunks(load_recorded_page(), 4096))
+    assert extractor.found == {}
+    assert extractor.bytes_read == len(load_recorded_page())
+
+
+@pytest.mark.parametrize('size', [1, 5, 1024])
+def test_next_data_stream_stops_after_the_payload(size):
+    stream = NextDataStream()
+    for chunk in chunks(PAGE, size):
+        if stream.feed(chunk):
+            break
+    assert stream.done
+    assert extract_watchers(stream.page) == 1234567
+    assert stream.page == PAGE[:len(stream.page)]
+
+
+def test_symbol_stats_from_own_record_and_quote():
+    page = symbol_page('NVDA', 1234567, load_recorded_page(), sentimentChange='2.5', messageVolume=812)
+    # A quote keyed by the symbol, and a trending list copy with a stale count
+    page = page.replace(b'"pageProps":{', b'"pageProps":{"quotes":{"NVDA":{"Symbol":"NVDA","Last":131.5,"PercentChange":-1.2,'
+                        b'"Volume":"1200"}},"trending":[{"symbol":"NVDA","watchlist_count":5}],', 1)
+    stats = extract_symbol_stats(page, 'NVDA')
+    assert stats == SymbolStats('NVDA', watchers=1234567, sentiment_change=2.5, message_volume=812,
+                                price=131.5, percent_change=-1.2, volume=1200)
+    assert stats.as_dict()['watchers'] == 1234567
+
+
+def test_symbol_stats_skip_other_symbols():
+    page = symbol_page('NVDA', 1234567, load_recorded_page())
+    page = page.replace(b'"pageProps":{', b'"pageProps":{"AMD":{"Symbol":"AMD","Last":99.0},', 1)
+    assert extract_symbol_stats(page, 'AMD').price == 99.0
+    assert extract_symbol_stats(page, 'NVDA').price is None
+
+
+def test_symbol_stats_fall_back_to_the_regex():
+    page = b'<html><script>{"watchlistCount":42}</script></html>'
+    assert find_next_data(page) is None
+    assert extract_symbol_stats(page, 'NVDA') == SymbolStats('NVDA', watchers=42)
@@ -0,0 +1,62 @@
+import time
+
+from http_cache import HttpCache
+
+URL = 'https://stocktwits.com/symbol/AAPL'
+
+
+def test_store_and_load(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.store(URL, b'<html>AAPL</html>', {'ETag': '"v1"'})
+    entry = cache.lookup(URL)
+    assert entry.etag == '"v1"'
+    assert cache.load(entry) == b'<html>AAPL</html>'
+    assert cache.is_fresh(entry)
+    assert HttpCache.conditional_headers(entry) == {'If-None-Match': '"v1"'}
+    cache.close()
+
+    reopened = HttpCache(tmp_path)
+    assert reopened.size == len(b'<html>AAPL</html>')
+    reopened.close()
+
+
+def test_ttl_by_longest_prefix(tmp_path):
+    cache = HttpCache(tmp_path, ttls={'/symbol/': 60, '/symbol/AAPL': 5})
+    assert cache.ttl_for(URL) == 5
+    assert cache.ttl_for('https://stocktwits.com/symbol/NVDA') == 60
+    assert cache.ttl_for('https://stocktwits.com/news') == 0
+    cache.store(URL, b'x', {'ETag': '"v1"'})
+    entry = cache.lookup(URL)
+    assert not cache.is_fresh(entry, now=time.time() + 10)
+    cache.refresh(URL, {'ETag': '"v2"'})
+    assert cache.lookup(URL).etag == '"v2"'
+    cache.close()
+
+
+def test_uncacheable_responses_are_skipped(tmp_path):
+    cache = HttpCache(tmp_path, ttls={})
+    cache.store(URL, b'x', {})
+    cache.store(URL + '?a', b'x', {'ETag': '"v1"', 'Cache-Control': 'no-store'})
+    assert cache.lookup(URL) is None and cache.lookup(URL + '?a') is None
+    cache.close()
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=25)
+    for i in range(3):
+        cache.store(f'{URL}{i}', b'0123456789', {'ETag': f'"{i}"'})
+        time.sleep(0.01)
+    assert cache.lookup(f'{URL}0') is None
+    assert cache.lookup(f'{URL}1') is not None and cache.lookup(f'{URL}2') is not None
+    assert cache.size == 20
+    cache.close()
+
+
+def test_missing_body_drops_the_entry(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.store(URL, b'x', {'ETag': '"v1"'})
+    entry = cache.lookup(URL)
+    cache._path(URL).unlink()
+    assert cache.load(entry) is None
+    assert cache.lookup(URL) is None
+    cache.close()
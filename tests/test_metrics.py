@@ -0,0 +1,62 @@
+import urllib.request
+
+import numpy as np
+import pytest
+
+from metrics import LatencyHistogram, Metrics
+
+
+def test_percentiles_are_within_the_precision():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(-3, 1.5, 20_000)
+    histogram = LatencyHistogram(precision=0.01)
+    for value in values:
+        histogram.record(float(value))
+    for q in (0.5, 0.9, 0.99, 0.999):
+        exact = np.quantile(values, q, method='inverted_cdf')
+        assert histogram.percentile(q) == pytest.approx(exact, rel=0.011)
+    assert histogram.percentile(1.0) == pytest.approx(values.max())
+    assert histogram.total == len(values)
+    assert histogram.sum == pytest.approx(values.sum())
+
+
+def test_values_outside_the_range_are_clamped():
+    histogram = LatencyHistogram(lowest=1e-3, highest=10.0)
+    histogram.record(0.0)
+    histogram.record(1e6)
+    assert histogram.percentile(0.5) == pytest.approx(1e-3)
+    assert histogram.total == 2
+    assert LatencyHistogram().percentile(0.99) == 0.0
+
+
+def test_render():
+    metrics = Metrics()
+    metrics.observe('fetch', 0.25, 'AAPL')
+    metrics.observe('fetch', 0.5, 'NVDA')
+    metrics.inc('retries', 'AAPL')
+    metrics.inc('retries', 'AAPL')
+    metrics.inc('failures')
+    with metrics.time('extract', 'AAPL'):
+        pass
+    text = metrics.render()
+    assert '# TYPE stocktwits_stage_seconds summary' in text
+    assert 'stocktwits_stage_seconds_count{stage="fetch"} 2' in text
+    assert 'stocktwits_stage_seconds_sum{stage="fetch"} 0.75' in text
+    assert 'stocktwits_retries_total{symbol="AAPL"} 2' in text
+    assert 'stocktwits_failures_total 1' in text
+    assert 'stocktwits_symbol_stage_seconds{symbol="NVDA",stage="fetch"} 0.5' in text
+    assert 'stocktwits_symbol_stage_seconds{symbol="AAPL",stage="extract"}' in text
+
+
+def test_textfile_and_http_endpoint(tmp_path):
+    metrics = Metrics()
+    metrics.inc('throttled', 'TSLA')
+    metrics.write_textfile(tmp_path / 'metrics.prom')
+    assert (tmp_path / 'metrics.prom').read_text() == metrics.render()
+    server = metrics.serve(0)
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        with urllib.request.urlopen(url) as response:
+            assert response.read().decode('utf-8') == metrics.render()
+    finally:
+        server.shutdown()
@@ -0,0 +1,107 @@
+import json
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_mktnews import DOCS, load_examples
+from mktnews import (ContentDecoder, JsonScoresDecoder, StoryScores, XmlScoresDecoder, decode, scores_from_json,
+                     scores_from_xml)
+
+TWEET = load_examples()[0]
+SENTIMENT = load_examples(DOCS / 'Company Sentiment Docs.txt')[0]
+MMN = load_examples(DOCS / 'Market Moving News Docs.txt')
+# Hand transcriptions of the XML examples above in the layout JsonScoresDecoder
+# assumes (the feed docs show no ?format=json payload); topic lists shortened
+JSON_PAYLOADS = json.loads((Path(__file__).parent / 'data' / 'mktnews_format_json.json').read_text())
+
+
+def archive(*messages):
+    return b'<Archive>' + b''.join(re.sub(rb'^<\?xml[^>]*\?>', b'', m) for m in messages) + b'</Archive>'
+
+
+def test_decode_tweet():
+    story, = decode(TWEET)
+    assert story.suid == 'PHQL63AIBMDC'
+    assert story.event == 'ADD_STORY'
+    assert story.wire_name == 'TWT'
+    assert story.time_of_arrival == 1541448363056
+    assert story.assigned_topics[0].id == 'BBTWTLIGHT'
+    assert story.assigned_topics[0].score == 70
+    assert len(story.derived_topics) == 9
+    assert story.body is None
+
+
+def test_body_is_kept_on_request():
+    story, = decode(TWEET, body=True)
+    assert story.body == "An ETF That's Gone To The Dogs (And Cats) https://t.co/l4DdGaxAkW"
+    assert story.body_text_type == 'STYTYPE_PLAIN_TEXT'
+    assert story._replace(body=None) == decode(TWEET)[0]
+
+
+def test_analytics_messages_hold_no_story():
+    assert decode(SENTIMENT) == []
+
+
+@pytest.mark.parametrize('size', [1, 7, 64, 1 << 16])
+def test_chunked_archive_matches_whole_messages(size):
+    data = archive(TWEET, SENTIMENT, TWEET)
+    decoder = ContentDecoder(body=True)
+    stories = []
+    for i in range(0, len(data), size):
+        stories += decoder.feed(data[i:i + size])
+    stories += decoder.close()
+    assert stories == decode(TWEET, body=True) * 2
+
+
+def test_decoder_is_reusable_across_messages():
+    decoder = ContentDecoder(body=True)
+    assert [decoder.decode(m) for m in (TWEET, SENTIMENT, TWEET)] == [decode(TWEET, body=True), [],
+                                                                      decode(TWEET, body=True)]
+
+
+def test_truncated_message_raises_and_the_decoder_recovers():
+    decoder = ContentDecoder()
+    with pytest.raises(ET.ParseError):
+        decoder.decode(TWEET[:len(TWEET) // 2])
+    assert decoder.decode(TWEET) == decode(TWEET)
+
+
+def test_scores_of_analytics_messages():
+    scores, = scores_from_xml(SENTIMENT)
+    assert scores.suid == 'Q7SW4E6K50XS'
+    assert [(s.entity_id, s.score, s.confidence, s.analytics_type) for s in scores.scores] == [
+        ('IDCC', 1, 83.0, 'SENTIMENT')]
+    first_pass, = scores_from_xml(MMN[1])
+    assert [s.entity_id for s in first_pass.scores] == ['IBM', 'RHT']
+    assert {s.analytics_type for s in first_pass.scores} == {'MMN_1STPASS'}
+
+
+def test_scores_fields_are_projected():
+    decoder = XmlScoresDecoder(('suid',))
+    assert decoder.decode(TWEET) == [StoryScores('PHQL63AIBMDC')]
+    full, = XmlScoresDecoder(StoryScores._fields).decode(TWEET)
+    assert full.event == 'ADD_STORY'
+    assert full.time_of_update == 1541448363067
+    with pytest.raises(ValueError):
+        XmlScoresDecoder(('headline',))
+
+
+@pytest.mark.parametrize('name, message', [('twitter news', TWEET), ('company sentiment', SENTIMENT),
+                                           ('market moving news first pass', MMN[1])])
+def test_json_payload_matches_the_xml_message(name, message):
+    payload = json.dumps(JSON_PAYLOADS[name])
+    fields = StoryScores._fields
+    assert JsonScoresDecoder(fields).decode(payload) == XmlScoresDecoder(fields).decode(message)
+
+
+def test_json_scores():
+    scores, = scores_from_json(json.dumps(JSON_PAYLOADS['market moving news first pass']))
+    assert scores.suid == 'Q4XVYY6K50Y8'
+    assert scores.time_of_arrival == 1580420122585
+    assert [(s.entity_id, s.score, s.confidence, s.security_figi, s.language_id, s.analytics_type)
+            for s in scores.scores] == [
+        ('IBM', 1, 0.008521183358476082, 'BBG000BLNNH6', 1, 'MMN_1STPASS'),
+        ('RHT', 1, 0.008013990187133854, 'BBG000BWXL85', 1, 'MMN_1STPASS'),
+    ]
@@ -0,0 +1,60 @@
+from mktnews import StoryScores
+from news_dedup import DUPLICATE, NEW, UPDATE, StoryIndex
+
+T = 1_738_000_000_000
+HOUR_MS = 3600 * 1000
+
+
+def story(suid, arrival, event='ADD_STORY', headline=None, topic=None, updated=None):
+    return StoryScores(suid, time_of_arrival=arrival, event=event, time_of_update=updated,
+                       headline_cluster_id=headline, topic_cluster_id=topic)
+
+
+def test_versions_of_one_story():
+    index = StoryIndex(hours=24)
+    assert index.offer(story('S1', T, 'ADD_1STPASS')) == NEW
+    assert index.offer(story('S1', T, 'ADD_STORY')) == UPDATE
+    # A replay of the version already held
+    assert index.offer(story('S1', T, 'ADD_STORY')) == DUPLICATE
+    assert index.offer(story('S1', T + 1000, 'UPDATE_ATTRIBUTE', updated=T + 1000)) == UPDATE
+    # An older pass arriving late
+    assert index.offer(story('S1', T + 2000, 'ADD_1STPASS', updated=T)) == DUPLICATE
+    assert index.get('S1').event == 'UPDATE_ATTRIBUTE'
+    assert index.counts == {NEW: 1, UPDATE: 2, DUPLICATE: 2}
+
+
+def test_copies_on_other_wires_share_a_cluster():
+    index = StoryIndex(hours=24)
+    assert index.offer(story('S1', T, headline='H1')) == NEW
+    assert index.offer(story('S2', T + 1000, headline='H1')) == DUPLICATE
+    assert index.offer(story('S3', T + 2000, topic='T1')) == NEW
+    assert index.offer(story('S4', T + 3000, headline='H9', topic='T1')) == DUPLICATE
+    assert list(index.filter([story('S5', T + 4000), story('S6', T + 4000, headline='H1')])) == \
+        [story('S5', T + 4000)]
+
+
+def test_cluster_id_first_seen_on_an_update():
+    index = StoryIndex(hours=24)
+    assert index.offer(story('S1', T, 'ADD_1STPASS')) == NEW
+    assert index.offer(story('S1', T + 1000, 'ADD_STORY', headline='H1')) == UPDATE
+    assert index.offer(story('S2', T + 2000, headline='H1')) == DUPLICATE
+
+
+def test_eviction_releases_every_registered_cluster_id():
+    index = StoryIndex(hours=1)
+    index.offer(story('S1', T, 'ADD_1STPASS', headline='H1'))
+    index.offer(story('S1', T + 1000, 'ADD_STORY', headline='H1', topic='T1'))
+    # Past the window: S1 is gone, and so are both of its cluster ids
+    assert index.offer(story('S2', T + 2 * HOUR_MS, headline='H1', topic='T1')) == NEW
+    assert 'S1' not in index
+    assert index._clusters == {'headline_cluster_id': {'H1': 'S2'}, 'topic_cluster_id': {'T1': 'S2'}}
+
+
+def test_memory_stays_bounded():
+    index = StoryIndex(hours=24, max_stories=100)
+    for i in range(1000):
+        index.offer(story(f'S{i}', T + i, 'ADD_1STPASS', headline=f'H{i}', topic=f'T{i}'))
+        index.offer(story(f'S{i}', T + i, 'ADD_STORY', headline=f'H{i}', topic=f'T{i}'))
+    assert len(index) == 100
+    assert all(len(clusters) == 100 for clusters in index._clusters.values())
+    assert len(index._registered) == 100
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip('blpapi')
+
+from news_feed import DEFAULT_TOPICS, dedup_group, service_of, subscription_string  # noqa: E402
+from sentiment import SENTIMENT_TOPICS  # noqa: E402
+
+
+def test_default_topics_cover_the_sentiment_feeds():
+    assert set(SENTIMENT_TOPICS) <= set(DEFAULT_TOPICS)
+
+
+def test_news_topics_share_a_dedup_index():
+    twitter = subscription_string('//blp/mktnews-content/news/eid/70028')
+    dow_jones = subscription_string('//blp/mktnews-dowjonesnews/eid/81347')
+    sentiment = subscription_string('//blp/mktnews-content/analytics/eid/80047')
+    moving = subscription_string('//blp/mktnews-content/analytics/eid/80048')
+    assert dedup_group(twitter) == dedup_group(dow_jones)
+    assert len({dedup_group(twitter), dedup_group(sentiment), dedup_group(moving)}) == 3
+
+
+def test_subscription_strings():
+    assert subscription_string('//blp/mktnews-dowjonesnews/eid/81347?format=xml') == \
+        '//blp/mktnews-dowjonesnews/eid/81347?format=json'
+    assert service_of('//blp/mktnews-content/news/eid/70028?format=json') == '//blp/mktnews-content'
@@ -0,0 +1,75 @@
+import numpy as np
+
+from mktnews import ScoredEntity, StoryScores
+from news_index import IndexSegment, NewsIndex
+
+T = 1_738_000_000_000
+MINUTE_MS = 60 * 1000
+
+
+def story(suid, arrival, *tickers):
+    return StoryScores(suid, time_of_arrival=arrival,
+                       tickers=tuple(ScoredEntity(ticker, score) for ticker, score in tickers))
+
+
+def sample_index():
+    index = NewsIndex()
+    index.add(story('S0', T, ('NVDA', 90), ('AMD', 40)))
+    index.add(story('S1', T + 2 * MINUTE_MS, ('AAPL', 80)))
+    # Out of order arrival
+    index.add(story('S2', T + MINUTE_MS, ('NVDA', 60), ('AAPL', 75)))
+    index.add(story('S3', T + 3 * MINUTE_MS, ('NVDA', 95), ('NVDA', 20)))
+    return index
+
+
+def test_search_live_index():
+    index = sample_index()
+    assert index.postings('ticker', 'NVDA').tolist() == [0, 2, 3]
+    # The higher of two scores for one term is kept
+    assert index.postings('ticker', 'NVDA', min_score=90).tolist() == [0, 3]
+    assert index.search(all_of=[('ticker', 'NVDA'), ('ticker', 'AAPL')]).tolist() == [2]
+    assert index.search(any_of=[('ticker', 'AMD'), ('ticker', 'AAPL', 80)]).tolist() == [0, 1]
+    assert index.search(all_of=[('ticker', 'NVDA')], start=T + MINUTE_MS,
+                        end=T + 2 * MINUTE_MS).tolist() == [2]
+    assert index.postings('ticker', 'MSFT').size == 0
+    assert index.stories([2]) == [('S2', T + MINUTE_MS)]
+
+
+def test_segment_round_trip(tmp_path):
+    index = sample_index()
+    index.write_segment(tmp_path / '20250127')
+    segment = IndexSegment(tmp_path / '20250127')
+    assert len(segment) == len(index)
+    # Docs are renumbered in time order; compare by SUID
+    for query in ({'all_of': [('ticker', 'NVDA')]},
+                  {'all_of': [('ticker', 'NVDA', 90)]},
+                  {'any_of': [('ticker', 'AMD'), ('ticker', 'AAPL')]},
+                  {'all_of': [('ticker', 'NVDA')], 'start': T + MINUTE_MS, 'end': T + 2 * MINUTE_MS}):
+        live = sorted(index.stories(index.search(**query)))
+        frozen = sorted(segment.stories(segment.search(**query)))
+        assert live == frozen, query
+    np.testing.assert_array_equal(segment.times, np.sort(index.times))
+
+
+def test_time_bounds_follow_out_of_order_arrivals():
+    rng = np.random.default_rng(3)
+    index = NewsIndex()
+    for i, jitter in enumerate(rng.integers(-5, 5, 3000)):
+        index.add(story(f'S{i}', T + (i + int(jitter)) * MINUTE_MS, ('NVDA', int(rng.integers(0, 100)))))
+        if i % 97 == 0:
+            times, running_max, running_min = index._time_bounds()
+            np.testing.assert_array_equal(running_max, np.maximum.accumulate(times))
+            np.testing.assert_array_equal(running_min, np.minimum.accumulate(times[::-1])[::-1])
+    times = index.times
+    start, end = T + 1000 * MINUTE_MS, T + 1100 * MINUTE_MS
+    expected = np.flatnonzero((times >= start) & (times <= end))
+    assert index.postings('ticker', 'NVDA', start=start, end=end).tolist() == expected.tolist()
+
+
+def test_postings_are_stable_views():
+    index = sample_index()
+    before = index.postings('ticker', 'NVDA')
+    for i in range(100):
+        index.add(story(f'N{i}', T + i, ('NVDA', 50)))
+    assert before.tolist() == [0, 2, 3]
+    assert len(index.postings('ticker', 'NVDA')) == 103
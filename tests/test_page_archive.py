@@ -0,0 +1,57 @@
+from benchmarks.pages import load_recorded_page, symbol_page
+from page_archive import PageArchive, main, replay
+
+T = 1_738_750_000
+TEMPLATE = load_recorded_page()
+SYMBOLS = [f'S{i:03d}' for i in range(80)]
+
+
+def page(symbol, watchers=None):
+    return symbol_page(symbol, watchers if watchers is not None else 1000 + int(symbol[1:]), TEMPLATE)
+
+
+def fill(archive, symbols=SYMBOLS, ts=T):
+    for i, symbol in enumerate(symbols):
+        archive.append(symbol, page(symbol), ts=ts + i)
+
+
+def test_cli_takes_the_archive_after_the_command(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main(['replay', 'AAPL', '--archive', str(tmp_path / 'archive')])
+    # replay writes its CSV under ./stock_data
+    assert len(list((tmp_path / 'stock_data').glob('stocktwits_replay_*.csv'))) == 1
+    assert not (tmp_path / 'stock_data' / 'archive').exists()
+
+
+def test_pages_round_trip_across_a_trained_dictionary(tmp_path):
+    archive = PageArchive(tmp_path, train_after=64)
+    fill(archive)
+    # The first 64 pages went in plain, then a dictionary was trained for the rest
+    assert archive.dict_ids() == [1]
+    assert [dict_id for *_, dict_id in archive.query()] == [0] * 64 + [1] * 16
+    reopened = PageArchive(tmp_path)
+    assert reopened.get('S000') == page('S000')
+    assert reopened.get('S079') == page('S079')
+    trained = [length for _, _, length, dict_id in archive.query() if dict_id]
+    plain = [length for _, _, length, dict_id in archive.query() if not dict_id]
+    assert max(trained) * 3 < min(plain)
+
+
+def test_get_returns_the_last_page_at_or_before_ts(tmp_path):
+    archive = PageArchive(tmp_path)
+    archive.append('AAPL', page('AAPL', 1), ts=T)
+    archive.append('AAPL', page('AAPL', 2), ts=T + 86400)
+    assert archive.get('AAPL') == page('AAPL', 2)
+    assert archive.get('AAPL', ts=T + 3600) == page('AAPL', 1)
+    assert archive.get('AAPL', ts=T - 1) is None
+    assert archive.get('NVDA') is None
+    assert len(archive.query(['AAPL'], start=T + 1)) == 1
+
+
+def test_replay_reextracts_every_page(tmp_path):
+    archive = PageArchive(tmp_path, train_after=64)
+    fill(archive)
+    df = replay(archive, symbols=SYMBOLS[::10], workers=1, chunk_size=3)
+    assert df['symbol'].tolist() == SYMBOLS[::10]
+    assert df['watchers'].tolist() == [1000 + i for i in range(0, 80, 10)]
+    assert df['Timestamp'].iloc[0].timestamp() == T
@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+from rate_limiter import AIMDLimiter, Backoff, RateController, TokenBucket, parse_retry_after
+
+
+def test_aimd_grows_by_one_per_window_and_halves_on_congestion():
+    aimd = AIMDLimiter(initial=4, maximum=64, cooldown=0.0)
+    successes = 0
+    while aimd.limit < 8:
+        aimd.on_success()
+        successes += 1
+    # About one window at each limit: 4 + 5 + 6 + 7
+    assert 20 <= successes <= 24
+    aimd.on_congestion()
+    assert aimd.limit == 4
+    for _ in range(10):
+        aimd.on_congestion()
+    assert aimd.limit == 1
+
+
+def test_aimd_backs_off_once_per_cooldown():
+    aimd = AIMDLimiter(initial=32, cooldown=60.0)
+    for _ in range(5):
+        aimd.on_congestion()
+    assert aimd.limit == 16
+
+
+def test_aimd_treats_slow_responses_as_congestion():
+    aimd = AIMDLimiter(initial=10, latency_target=0.5, cooldown=0.0)
+    aimd.on_success(latency=0.1)
+    assert aimd.limit == 10
+    aimd.on_success(latency=2.0)
+    assert aimd.limit == 5
+
+
+def test_aimd_respects_bounds():
+    aimd = AIMDLimiter(initial=100, minimum=2, maximum=8, cooldown=0.0)
+    assert aimd.limit == 8
+    for _ in range(100):
+        aimd.on_success()
+    assert aimd.limit == 8
+    for _ in range(10):
+        aimd.on_congestion()
+    assert aimd.limit == 2
+
+
+def test_token_bucket_bursts_then_refuses():
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=1000.0, capacity=10)
+    bucket.pause(60)
+    assert not bucket.try_acquire()
+
+
+def test_backoff_is_jittered_and_capped():
+    random.seed(0)
+    backoff = Backoff(base=1.0, cap=10.0)
+    delays = [backoff.delay(attempt) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 10.0 for delay in delays)
+    assert all(backoff.delay(0) <= 1.0 for _ in range(20))
+    assert backoff.delay(0, retry_after=5.0) >= 5.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('2.5') == 2.5
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') is None
+    assert parse_retry_after(None) is None
+
+
+def test_controller_caps_in_flight_requests():
+    controller = RateController(rate=1000.0, burst=100, initial_concurrency=3, max_concurrency=3)
+    in_flight = peak = 0
+
+    async def request():
+        nonlocal in_flight, peak
+        async with controller.slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(12)))
+
+    asyncio.run(main())
+    # A second event loop gets fresh slots
+    asyncio.run(main())
+    assert peak == 3
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scheduler import HOUR, RefreshScheduler, refresh_intervals, watcher_volatility
+from watcher_store import WatcherStore
+
+DAY = 86400
+T = 1_738_000_000
+
+
+def test_flat_stretches_count_as_no_change(tmp_path):
+    store = WatcherStore(tmp_path)
+    # AAPL moves twice in 30 days, NVDA every day, by the same amount
+    for day in range(30):
+        nvda = 1000 if day % 2 == 0 else 1100
+        aapl = 1100 if day in (1, 21) else 1000
+        store.append_snapshot({'AAPL': aapl, 'NVDA': nvda}, ts=T + day * DAY, changes_only=True)
+    now = T + 29 * DAY
+    volatility = watcher_volatility(store, ['AAPL', 'NVDA', 'TSLA'], lookback_days=29, now=now)
+    expected = np.std(np.diff(np.log([1000 if day % 2 == 0 else 1100 for day in range(30)])), ddof=1)
+    assert volatility['NVDA'] == pytest.approx(expected)
+    assert volatility['AAPL'] < volatility['NVDA'] / 2
+    assert volatility['TSLA'] == 0.0
+
+
+def test_a_slow_move_is_calmer_than_a_sudden_one(tmp_path):
+    store = WatcherStore(tmp_path)
+    for day in range(11):
+        store.append_snapshot({'SLOW': 1000 + 100 * day, 'FAST': 2000 if day >= 5 else 1000},
+                              ts=T + day * DAY, changes_only=True)
+    volatility = watcher_volatility(store, ['SLOW', 'FAST'], lookback_days=10, now=T + 10 * DAY)
+    assert volatility['SLOW'] < volatility['FAST']
+
+
+def test_refresh_intervals():
+    volatility = pd.Series({'A': 0.0, 'B': 0.1, 'C': 0.1})
+    intervals = refresh_intervals(['A', 'B', 'C'], {'C': 24}, volatility)
+    assert intervals['A'] == 24 * HOUR
+    assert intervals['B'] == 12 * HOUR
+    assert intervals['C'] == HOUR
+
+
+class FakeFetch:
+    def __init__(self, failing=()):
+        self.calls = []
+        self.failing = set(failing)
+
+    def __call__(self, symbols):
+        self.calls.append(list(symbols))
+        return {symbol: 100 for symbol in symbols if symbol not in self.failing}
+
+
+def test_step_refreshes_due_symbols_and_reschedules_them(tmp_path):
+    store = WatcherStore(tmp_path)
+    fetch = FakeFetch(failing={'BAD'})
+    scheduler = RefreshScheduler(['AAPL', 'NVDA', 'BAD'], fetch, store, budget_per_hour=36000)
+    scheduler.start(now=T)
+    assert scheduler.step(now=T) == 24 * HOUR
+    assert sorted(fetch.calls[0]) == ['AAPL', 'BAD', 'NVDA']
+    assert store.latest() == {'AAPL': 100, 'NVDA': 100}
+    # Nothing is due until the next interval, failed symbols included
+    scheduler.step(now=T + HOUR)
+    assert len(fetch.calls) == 1
+    scheduler.step(now=T + 24 * HOUR)
+    assert sorted(fetch.calls[1]) == ['AAPL', 'BAD', 'NVDA']
+
+
+def test_budget_goes_to_important_symbols_first(tmp_path):
+    fetch = FakeFetch()
+    scheduler = RefreshScheduler(['AAPL', 'NVDA', 'TSLA'], fetch, WatcherStore(tmp_path),
+                                 budget_per_hour=10, importance={'TSLA': 24})
+    scheduler.start(now=T)
+    wait = scheduler.step(now=T)
+    assert fetch.calls == [['TSLA']]
+    assert len(scheduler._heap) == 3
+    assert wait == 0.0
+
+
+def test_restart_is_seeded_from_the_store(tmp_path):
+    store = WatcherStore(tmp_path)
+    store.append_snapshot({'AAPL': 100}, ts=T)
+    fetch = FakeFetch()
+    scheduler = RefreshScheduler(['AAPL', 'NVDA'], fetch, store, budget_per_hour=36000)
+    scheduler.start(now=T + HOUR)
+    scheduler.step(now=T + HOUR)
+    assert fetch.calls == [['NVDA']]
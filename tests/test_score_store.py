@@ -0,0 +1,72 @@
+import numpy as np
+
+from mktnews import StructuredScore
+from score_store import ScoreStore, import_jsonl, main
+
+T = 1_738_000_000_000  # 2025-01-27, epoch ms
+DAY_MS = 86400 * 1000
+
+
+def scores(*entities, analytics_type='SENTIMENT'):
+    return [StructuredScore(entity, score=1, confidence=80.0, bloomberg_entity_id=f'BBG-{entity}',
+                            language_id=1, analytics_type=analytics_type) for entity in entities]
+
+
+def test_scores_round_trip(tmp_path):
+    store = ScoreStore(tmp_path)
+    store.append(T, scores('AAPL US Equity', 'NVDA US Equity'))
+    store.append(T + DAY_MS, scores('AAPL US Equity', analytics_type='MMN'))
+    assert len(store) == 3
+    assert store.flush() == 3
+    assert len(store) == 0
+    assert store.written == {'20250127': 2, '20250128': 1}
+
+    reopened = ScoreStore(tmp_path)
+    frame = reopened.frame(reopened.query())
+    assert frame['EntityId'].tolist() == ['AAPL US Equity', 'NVDA US Equity', 'AAPL US Equity']
+    assert frame['BloombergEntityId'].tolist() == ['BBG-AAPL US Equity', 'BBG-NVDA US Equity',
+                                                   'BBG-AAPL US Equity']
+    assert frame['SecurityFigi'].isna().all()
+    assert frame['AnalyticsType'].tolist() == ['SENTIMENT', 'SENTIMENT', 'MMN']
+    assert frame['Confidence'].tolist() == [80.0] * 3
+
+
+def test_query_filters(tmp_path):
+    store = ScoreStore(tmp_path)
+    for i in range(10):
+        store.append(T + i * 1000, scores('AAPL US Equity', 'NVDA US Equity'))
+    store.flush()
+    columns = store.query(start=T + 5000, entities=['NVDA US Equity'])
+    assert columns['ts'].tolist() == [T + i * 1000 for i in range(5, 10)]
+    assert store.query(analytics_type='MMN')['ts'].size == 0
+    assert store.query(entities=['MSFT US Equity'])['ts'].size == 0
+
+
+def test_chunks_are_flushed_as_they_fill(tmp_path):
+    store = ScoreStore(tmp_path, chunk_rows=4)
+    for i in range(5):
+        store.append(T + i, scores('AAPL US Equity'))
+    assert len(store) == 1
+    assert len(ScoreStore(tmp_path).query()['ts']) == 4
+
+
+def test_import_jsonl(tmp_path):
+    path = tmp_path / 'news_scores.jsonl'
+    path.write_text(
+        '{"topic": "t", "suid": "S1", "time_of_arrival": %d, "tickers": [], '
+        '"scores": [["AAPL US Equity", -1, 55.0, null, null, null, 1, "SENTIMENT"]]}\n' % T
+    )
+    store = ScoreStore(tmp_path / 'store')
+    assert import_jsonl(store, [path]) == 1
+    columns = store.query()
+    assert columns['score'].tolist() == [-1]
+    np.testing.assert_allclose(columns['confidence'], [55.0])
+
+
+def test_cli_takes_the_store_after_the_command(tmp_path, capsys):
+    store = ScoreStore(tmp_path)
+    store.append(T, scores('AAPL US Equity', 'NVDA US Equity'))
+    store.flush()
+    main(['query', 'AAPL US Equity', '--store', str(tmp_path)])
+    out = capsys.readouterr().out
+    assert 'AAPL US Equity' in out and 'NVDA' not in out
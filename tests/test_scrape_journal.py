@@ -0,0 +1,50 @@
+import json
+import os
+import time
+
+import scrape_journal
+from scrape_journal import ScrapeJournal, latest_run_id
+
+
+def test_batches_are_written_and_fsynced(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(scrape_journal.os, 'fsync', lambda fd: (synced.append(fd), real_fsync(fd)))
+    journal = ScrapeJournal('run1', tmp_path, batch_size=3, flush_interval=3600)
+    journal.record('AAPL', 1)
+    journal.record('NVDA', 2)
+    # Nothing reaches the file before a batch is full
+    assert not journal.path.exists()
+    journal.record('TSLA', 3)
+    assert len(synced) == 1
+    assert ScrapeJournal('run1', tmp_path).completed() == {'AAPL': 1, 'NVDA': 2, 'TSLA': 3}
+    journal.record('AMD', 4)
+    journal.close()
+    assert len(synced) == 2
+    assert ScrapeJournal('run1', tmp_path).completed()['AMD'] == 4
+
+
+def test_resume_skips_a_torn_last_line(tmp_path):
+    with ScrapeJournal('run1', tmp_path) as journal:
+        journal.record('AAPL', 1)
+        journal.record('NVDA', 2)
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"run_id": "run1", "symbol": "TS')
+    assert ScrapeJournal('run1', tmp_path).completed() == {'AAPL': 1, 'NVDA': 2}
+
+
+def test_stale_entries_are_not_resumed(tmp_path):
+    path = tmp_path / 'run1.jsonl'
+    now = time.time()
+    path.write_text(''.join(json.dumps({'run_id': 'run1', 'symbol': symbol, 'watchers': 1, 'ts': ts}) + '\n'
+                            for symbol, ts in (('OLD', now - 7200), ('NEW', now - 60))))
+    journal = ScrapeJournal('run1', tmp_path)
+    assert journal.completed(max_age=3600) == {'NEW': 1}
+    assert set(journal.completed()) == {'OLD', 'NEW'}
+
+
+def test_latest_run_id(tmp_path):
+    assert latest_run_id(tmp_path) is None
+    for run_id in ('20250205_100000', '20250206_090000'):
+        (tmp_path / f'{run_id}.jsonl').write_text('')
+    assert latest_run_id(tmp_path) == '20250206_090000'
@@ -0,0 +1,63 @@
+import json
+import logging
+import queue
+import time
+
+import pytest
+
+from scrape_logging import DroppingQueueHandler, JsonLinesFormatter, configure_logging
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def record(message, *args, **extra):
+    record = logging.LogRecord('scraper', logging.WARNING, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_carry_extra_fields():
+    entry = json.loads(JsonLinesFormatter().format(record('Fetch of %s failed', 'AAPL', symbol='AAPL')))
+    assert entry['message'] == 'Fetch of AAPL failed'
+    assert entry['level'] == 'WARNING'
+    assert entry['symbol'] == 'AAPL'
+    assert 'args' not in entry and 'msg' not in entry
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(record('message %d', i))
+    assert handler.dropped == 3
+    # Records travel unformatted; the writer thread formats them
+    assert handler.queue.get_nowait().args == (0,)
+
+
+def test_records_reach_the_file_from_the_writer_thread(tmp_path, root_logger):
+    log_file = tmp_path / 'scraper.log'
+    handler = configure_logging(log_file=str(log_file), json_lines=True)
+    assert isinstance(handler, DroppingQueueHandler)
+    logging.info('Got %d watchers for %s', 1200, 'AAPL', extra={'symbol': 'AAPL'})
+    logging.debug('Not written at INFO')
+    deadline = time.monotonic() + 5
+    while not log_file.read_text() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [(e['message'], e['symbol']) for e in entries] == [('Got 1200 watchers for AAPL', 'AAPL')]
+
+
+def test_blocking_mode_writes_synchronously(tmp_path, root_logger):
+    log_file = tmp_path / 'scraper.log'
+    assert configure_logging(log_file=str(log_file), blocking=True) is None
+    logging.warning('Direct')
+    assert log_file.read_text().rstrip().endswith('WARNING - Direct')
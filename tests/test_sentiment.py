@@ -0,0 +1,106 @@
+import numpy as np
+
+from mktnews import StoryScores, StructuredScore
+from score_store import ScoreStore
+from sentiment import SentimentAggregator
+
+T = 1_738_000_000_000
+HOUR_MS = 3600 * 1000
+
+
+def story(ts, entity, score, analytics_type='SENTIMENT'):
+    return StoryScores('S', time_of_arrival=ts,
+                       scores=(StructuredScore(entity, score, 80.0, analytics_type=analytics_type),))
+
+
+def test_update_many_matches_one_by_one(tmp_path):
+    rng = np.random.default_rng(1)
+    entities = rng.integers(0, 5, 200)
+    ts = np.sort(rng.integers(T, T + 48 * HOUR_MS, 200))
+    values = rng.integers(-1, 2, 200)
+    confidences = rng.uniform(0, 100, 200)
+    one = SentimentAggregator(tmp_path / 'one')
+    for entity, t, value, confidence in zip(entities, ts, values, confidences):
+        one.update(f'E{entity}', int(t), int(value), float(confidence))
+    batch = SentimentAggregator(tmp_path / 'batch')
+    batch.update_many(batch._intern([f'E{entity}' for entity in entities]), ts, values, confidences)
+    order = batch.entities.lookup(one.entities.symbols)
+    a, b = one.snapshot(T + 48 * HOUR_MS), batch.snapshot(T + 48 * HOUR_MS)
+    np.testing.assert_allclose(a.sentiment, b.sentiment[order])
+    np.testing.assert_allclose(a.weight, b.weight[order])
+
+
+def test_replay_resumes_from_the_checkpoint(tmp_path):
+    store = ScoreStore(tmp_path / 'scores')
+    for i in range(10):
+        store.append_story(story(T + i * 1000, 'AAPL', 1))
+    store.flush()
+    aggregator = SentimentAggregator(tmp_path / 'sentiment')
+    assert aggregator.replay(store) == 10
+    aggregator.checkpoint()
+
+    # A score that reached the store late, with an older timestamp
+    store.append_story(story(T - 5000, 'AAPL', -1))
+    store.append_story(story(T + 3000, 'MSFT', 1))
+    store.flush()
+    resumed = SentimentAggregator(tmp_path / 'sentiment')
+    assert resumed.replay(store) == 2
+    assert resumed.replay(store) == 0
+
+    full = SentimentAggregator(tmp_path / 'full')
+    full.replay(store)
+    ids = full.entities.lookup(resumed.entities.symbols)
+    now = T + HOUR_MS
+    np.testing.assert_allclose(resumed.snapshot(now).sentiment, full.snapshot(now).sentiment[ids])
+    assert resumed.snapshot(now).count.tolist() == [11, 1]
+
+
+def test_replay_filters_on_first_run(tmp_path):
+    store = ScoreStore(tmp_path / 'scores')
+    for i in range(10):
+        store.append_story(story(T + i * 1000, 'AAPL', 1))
+        store.append_story(story(T + i * 1000, 'NVDA', 1, analytics_type='MMN'))
+    store.flush()
+    aggregator = SentimentAggregator(tmp_path / 'sentiment', analytics_types=['SENTIMENT'])
+    assert aggregator.replay(store, start=T + 5000) == 5
+    assert aggregator.entities.symbols == ['AAPL']
+
+
+def test_rows_written_live_are_not_replayed(tmp_path):
+    store = ScoreStore(tmp_path / 'scores')
+    aggregator = SentimentAggregator(tmp_path / 'sentiment')
+    for i in range(5):
+        s = story(T + i * 1000, 'AAPL', 1)
+        aggregator.update_story(s)
+        store.append_story(s)
+    store.flush()
+    aggregator.cover(store.written)
+    aggregator.checkpoint()
+    assert SentimentAggregator(tmp_path / 'sentiment').replay(store) == 0
+
+
+def test_replay_picks_up_imports_into_days_before_the_checkpoint(tmp_path):
+    store = ScoreStore(tmp_path / 'scores')
+    store.append_story(story(T, 'AAPL', 1))
+    store.flush()
+    aggregator = SentimentAggregator(tmp_path / 'sentiment')
+    assert aggregator.replay(store) == 1
+    aggregator.checkpoint()
+
+    # A backfill two days before anything the checkpoint has seen
+    store.append_story(story(T - 48 * HOUR_MS, 'AAPL', -1))
+    store.flush()
+    resumed = SentimentAggregator(tmp_path / 'sentiment')
+    assert resumed.replay(store) == 1
+    assert resumed.snapshot(T).count.tolist() == [2]
+
+
+def test_days_before_the_first_window_stay_skipped(tmp_path):
+    store = ScoreStore(tmp_path / 'scores')
+    store.append_story(story(T - 48 * HOUR_MS, 'AAPL', -1))
+    store.append_story(story(T, 'NVDA', 1))
+    store.flush()
+    aggregator = SentimentAggregator(tmp_path / 'sentiment')
+    assert aggregator.replay(store, start=T - HOUR_MS) == 1
+    aggregator.checkpoint()
+    assert SentimentAggregator(tmp_path / 'sentiment').replay(store) == 0
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import numpy as np
+from aiohttp import web
+
+from benchmarks.fake_server import FakeStockTwits
+from rate_limiter import RateController
+from stream_ingester import MessageDedup, MessageSink, StreamIngester
+
+
+class SharedStreams(FakeStockTwits):
+    """Every symbol's stream carries the same messages, as if each mentioned them all."""
+
+    def stream(self, symbol, since=0, max_id=None, limit=30):
+        return super().stream('AAPL', since, max_id, limit)
+
+
+def poll(server, root, symbols, polls=1):
+    """``StreamIngester.poll`` ``polls`` times against ``server``; returns the results."""
+    async def main():
+        runner = web.AppRunner(server.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        api_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/api/2"
+        controller = RateController(rate=1000.0, initial_concurrency=4, max_concurrency=8)
+        ingester = StreamIngester(MessageSink(root), api_url=api_url, controller=controller)
+        try:
+            return [await ingester.poll(symbols) for _ in range(polls)]
+        finally:
+            ingester._save(force=True)
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def stored_ids(root):
+    sink = MessageSink(root)
+    rows = [sink.columns.read(day, ['id', 'sym']) for day in sink.columns.days()]
+    return sorted(zip(np.concatenate([r['id'] for r in rows]).tolist(),
+                      sink.symbols.names(np.concatenate([r['sym'] for r in rows])).tolist()))
+
+
+def test_poll_ingests_each_message_once(tmp_path):
+    server = FakeStockTwits(latency=0.0, jitter=0.0)
+    first, second = poll(server, tmp_path, ['AAPL', 'NVDA'], polls=2)
+    assert first == {'AAPL': 100, 'NVDA': 100}
+    assert second == {'AAPL': 0, 'NVDA': 0}
+    # A restart picks up the cursors and the dedup state
+    assert poll(server, tmp_path, ['AAPL', 'NVDA']) == [{'AAPL': 0, 'NVDA': 0}]
+    assert len(stored_ids(tmp_path)) == 200
+
+
+def test_messages_on_several_streams_count_for_each_symbol(tmp_path):
+    server = SharedStreams(latency=0.0, jitter=0.0)
+    assert poll(server, tmp_path, ['AAPL', 'NVDA', 'TSLA']) == [{'AAPL': 100, 'NVDA': 100, 'TSLA': 100}]
+    rows = stored_ids(tmp_path)
+    assert len(rows) == 300
+    assert len({message_id for message_id, _ in rows}) == 100
+
+
+def test_dedup_keys_on_id_and_symbol(tmp_path):
+    dedup = MessageDedup(tmp_path, capacity=10_000, window=4)
+    dedup.add([1, 2, 3, 4, 5, 6], 0)
+    # 2 has left the exact window and is found in the Bloom filter
+    assert dedup.filter_new([2, 6, 7, 7], 0).tolist() == [False, False, True, False]
+    # Seen in symbol 0's stream only
+    assert dedup.filter_new([1, 2, 6], 1).tolist() == [True, True, True]
+    assert dedup.filter_new([1, 1], [0, 1]).tolist() == [False, True]
+
+
+def test_dedup_rebuilds_filters_of_bare_ids(tmp_path):
+    sink = MessageSink(tmp_path)
+    sink.append('AAPL', [{'id': 5, 'created_at': '2025-02-05T10:00:00Z'}])
+    sink.append('NVDA', [{'id': 5, 'created_at': '2025-02-05T10:00:00Z'}])
+    root = tmp_path / 'dedup'
+    root.mkdir()
+    (root / 'state.json').write_text(json.dumps({'hashes': 3, 'high_water': 5, 'covered': {'20250205': 2}}))
+    np.save(root / 'bloom.npy', np.zeros(16, dtype=np.uint8))
+    dedup = MessageDedup(root, capacity=10_000)
+    dedup.catch_up(sink)
+    assert dedup.high_water == 5
+    aapl, nvda = sink.symbols.lookup(['AAPL', 'NVDA']).tolist()
+    assert dedup.filter_new([5, 5, 5], [aapl, nvda, nvda + 1]).tolist() == [False, False, True]
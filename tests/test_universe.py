@@ -0,0 +1,54 @@
+import argparse
+
+import pandas as pd
+import pytest
+
+from universe import load_universe, merge_shards, parse_shard, select_shard
+from watcher_store import WatcherStore
+
+SYMBOLS = [f'SYM{i}' for i in range(2000)]
+
+
+def test_load_csv_normalizes_and_deduplicates(tmp_path):
+    path = tmp_path / 'universe.csv'
+    path.write_text('Symbol,Name\n aapl ,Apple\nNVDA,Nvidia\nAAPL,Apple again\n,Blank\n')
+    assert load_universe(path) == ['AAPL', 'NVDA']
+
+
+def test_load_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'universe.parquet'
+    pd.DataFrame({'Symbol': ['tsla', 'AMD']}).to_parquet(path)
+    assert load_universe(path) == ['TSLA', 'AMD']
+
+
+def test_parse_shard():
+    assert parse_shard('1/4') == (1, 4)
+    for value in ('4/4', 'x', '1/0'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+
+
+def test_shards_partition_the_universe():
+    shards = [select_shard(SYMBOLS, i, 4) for i in range(4)]
+    assert sorted(sum(shards, [])) == sorted(SYMBOLS)
+    # Roughly even
+    assert all(300 < len(shard) < 700 for shard in shards)
+    assert select_shard(SYMBOLS, 0, 1) == SYMBOLS
+
+
+def test_adding_a_shard_moves_few_symbols():
+    before = {symbol: i for i in range(4) for symbol in select_shard(SYMBOLS, i, 4)}
+    after = {symbol: i for i in range(5) for symbol in select_shard(SYMBOLS, i, 5)}
+    moved = sum(before[symbol] != after[symbol] for symbol in SYMBOLS)
+    assert moved < len(SYMBOLS) * 0.35
+
+
+def test_merge_shards(tmp_path):
+    for i, rows in enumerate(['AAPL,100\nNVDA,200\n', 'TSLA,50\nNVDA,210\n']):
+        (tmp_path / f'stocktwits_watchers_20250127_09000{i}_shard{i}of2.csv').write_text('Symbol,Watchers\n' + rows)
+    store = WatcherStore(tmp_path / 'store')
+    merged = merge_shards(sorted(tmp_path.glob('*.csv')), tmp_path / 'out', formats=['csv'], store=store)
+    assert merged['Watchers'].to_dict() == {'AAPL': 100, 'NVDA': 210, 'TSLA': 50}
+    assert store.latest() == {'AAPL': 100, 'NVDA': 210, 'TSLA': 50}
+    assert [p.name for p in (tmp_path / 'out').iterdir()] == ['stocktwits_watchers_20250127_090001.csv']
@@ -0,0 +1,97 @@
+import asyncio
+
+from aiohttp import web
+
+from benchmarks.fake_server import FakeStockTwits, watchers_for
+from http_cache import HttpCache
+from rate_limiter import RateController
+from watcher_engine import fetch_all, symbol_url
+
+SYMBOLS = ['AAPL', 'NVDA', 'TSLA', 'MSFT', 'AMZN', 'META', 'GOOGL', 'AMD']
+
+
+def run(server, symbols, runs=1, **kwargs):
+    """``fetch_all`` ``runs`` times against ``server`` on a free local port.
+
+    Returns the results of each run and the base URL.
+    """
+    async def main():
+        runner = web.AppRunner(server.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            return [await fetch_all(symbols, base_url=base_url, **kwargs) for _ in range(runs)], base_url
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def fast_controller():
+    return RateController(rate=1000.0, initial_concurrency=4, max_concurrency=8,
+                          backoff_base=0.01, backoff_cap=0.05)
+
+
+def test_fetch_all_returns_every_count_in_order():
+    server = FakeStockTwits(latency=0.005, jitter=0.0)
+    seen = {}
+    (results,), _ = run(server, SYMBOLS, controller=fast_controller(),
+                     on_result=lambda symbol, value: seen.setdefault(symbol, value))
+    assert list(results) == SYMBOLS
+    assert results == {symbol: watchers_for(symbol) for symbol in SYMBOLS}
+    assert seen == results
+
+
+def test_fetch_all_retries_through_throttling():
+    server = FakeStockTwits(latency=0.005, jitter=0.0, rate_429=0.3, error_rate=0.1,
+                            retry_after=0.01, seed=7)
+    (results,), _ = run(server, SYMBOLS, controller=fast_controller(), max_retries=10)
+    assert results == {symbol: watchers_for(symbol) for symbol in SYMBOLS}
+    assert server.stats['throttled'] + server.stats['errors'] > 0
+
+
+def test_fetch_all_stats():
+    server = FakeStockTwits(latency=0.005, jitter=0.0)
+    (results,), _ = run(server, SYMBOLS[:3], controller=fast_controller(), stats=True)
+    assert {symbol: stats.watchers for symbol, stats in results.items()} == \
+        {symbol: watchers_for(symbol) for symbol in SYMBOLS[:3]}
+    assert all(stats.symbol == symbol for symbol, stats in results.items())
+
+
+def test_fresh_pages_come_from_the_cache(tmp_path):
+    server = FakeStockTwits(latency=0.005, jitter=0.0)
+    cache = HttpCache(tmp_path / 'cache')
+    (first, second), _ = run(server, SYMBOLS, runs=2, controller=fast_controller(), cache=cache)
+    cache.close()
+    assert first == second == {symbol: watchers_for(symbol) for symbol in SYMBOLS}
+    assert server.stats['requests'] == len(SYMBOLS)
+
+
+def test_stale_pages_are_revalidated(tmp_path):
+    server = FakeStockTwits(latency=0.005, jitter=0.0)
+    # No TTLs: every cached page is stale and sent back with If-None-Match
+    cache = HttpCache(tmp_path / 'cache', ttls={})
+    (first, second), _ = run(server, SYMBOLS, runs=2, controller=fast_controller(), cache=cache)
+    cache.close()
+    assert first == second == {symbol: watchers_for(symbol) for symbol in SYMBOLS}
+    assert server.stats['not_modified'] == len(SYMBOLS)
+
+
+class PageWithoutCount(FakeStockTwits):
+    def page(self, symbol):
+        # The recorded home page carries no watchlistCount
+        return self.template
+
+
+def test_unreadable_page_is_not_cached(tmp_path):
+    server = PageWithoutCount(latency=0.005, jitter=0.0)
+    cache = HttpCache(tmp_path / 'cache')
+    (results,), base_url = run(server, ['AAPL'], controller=fast_controller(), cache=cache, max_retries=2)
+    try:
+        assert results == {}
+        assert server.stats['ok'] == 2
+        assert cache.lookup(symbol_url('AAPL', base_url)) is None
+    finally:
+        cache.close()
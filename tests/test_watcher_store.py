@@ -0,0 +1,72 @@
+import numpy as np
+
+from watcher_store import WatcherStore, main
+
+DAY = 86400
+T = 1_738_000_000  # 2025-01-27
+
+
+def test_snapshots_round_trip(tmp_path):
+    store = WatcherStore(tmp_path)
+    store.append_snapshot({'AAPL': 100, 'NVDA': 200}, ts=T)
+    store.append_snapshot({'AAPL': 110, 'TSLA': 50}, ts=T + DAY)
+
+    reopened = WatcherStore(tmp_path)
+    ts, sym, count = reopened.query()
+    assert ts.tolist() == [T, T, T + DAY, T + DAY]
+    assert reopened.symbols.names(sym).tolist() == ['AAPL', 'NVDA', 'AAPL', 'TSLA']
+    assert count.tolist() == [100, 200, 110, 50]
+    assert reopened.latest() == {'AAPL': 110, 'NVDA': 200, 'TSLA': 50}
+    assert reopened.table.days() == ['20250127', '20250128']
+
+
+def test_query_filters_by_symbol_and_time(tmp_path):
+    store = WatcherStore(tmp_path)
+    for day in range(5):
+        store.append_snapshot({'AAPL': day, 'NVDA': 10 + day}, ts=T + day * DAY)
+    ts, sym, count = store.query(['NVDA'], start=T + DAY, end=T + 3 * DAY)
+    assert ts.tolist() == [T + DAY, T + 2 * DAY, T + 3 * DAY]
+    assert count.tolist() == [11, 12, 13]
+    frame = store.query_frame(['AAPL'], start=T + 4 * DAY)
+    assert frame['Symbol'].tolist() == ['AAPL']
+    assert frame['Watchers'].tolist() == [4]
+
+
+def test_changes_only_carries_unchanged_counts_forward(tmp_path):
+    store = WatcherStore(tmp_path)
+    assert store.append_snapshot({'AAPL': 100, 'NVDA': 200}, ts=T, changes_only=True) == 2
+    assert store.append_snapshot({'AAPL': 100, 'NVDA': 210}, ts=T + 60, changes_only=True) == 1
+    ts, counts = store.snapshot()
+    assert ts == T + 60
+    assert counts == {'AAPL': 100, 'NVDA': 210}
+    assert store.snapshot(T)[1] == {'AAPL': 100, 'NVDA': 200}
+    assert WatcherStore(tmp_path).last_seen() == {'AAPL': T + 60, 'NVDA': T + 60}
+
+
+def test_state_is_rebuilt_without_its_file(tmp_path):
+    store = WatcherStore(tmp_path)
+    store.append_snapshot({'AAPL': 1, 'NVDA': 2}, ts=T)
+    store.append_snapshot({'AAPL': 3}, ts=T + 60)
+    store.state_path.unlink()
+    state = WatcherStore(tmp_path).state()
+    np.testing.assert_array_equal(state, [[T + 60, 3], [T, 2]])
+
+
+def test_import_csv_exports(tmp_path):
+    exports = tmp_path / 'exports'
+    exports.mkdir()
+    (exports / 'stocktwits_watchers_20250127_090000.csv').write_text('Symbol,Watchers\nAAPL,100\nNVDA,200\n')
+    (exports / 'stocktwits_watchers_20250128_090000.csv').write_text('Symbol,Watchers\nAAPL,105\n')
+    (exports / 'notes.csv').write_text('Symbol,Watchers\nAAPL,1\n')
+    store = WatcherStore(tmp_path / 'store')
+    assert store.import_csv(sorted(exports.iterdir())) == 2
+    assert store.latest() == {'AAPL': 105, 'NVDA': 200}
+    assert len(store.query()[0]) == 3
+
+
+def test_cli_takes_the_store_after_the_command(tmp_path, capsys):
+    store = WatcherStore(tmp_path)
+    store.append_snapshot({'AAPL': 100, 'NVDA': 200}, ts=T)
+    main(['query', 'AAPL', '--store', str(tmp_path)])
+    out = capsys.readouterr().out
+    assert 'AAPL' in out and '100' in out and 'NVDA' not in out
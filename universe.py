@@ -0,0 +1,127 @@
+"""Symbol universe loading, sharding and shard merging.
+
+Universes are read from CSV or Parquet files with a ``Symbol`` column.
+``--shard i/N`` splits a universe across N machines with a consistent-hash
+ring, so every machine picks the same slice without coordination and growing
+N only moves about 1/N of the symbols. ``python universe.py merge`` combines
+the per-shard CSV exports into one snapshot.
+"""
+import argparse
+import bisect
+import hashlib
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from exporters import run_exporters, snapshot_frame
+from watcher_store import WatcherStore
+
+VIRTUAL_NODES = 64
+SHARD_NAME_RE = re.compile(r'stocktwits_watchers_(\d{8}_\d{6})_shard\d+of\d+\.csv$')
+
+
+def load_universe(path, column='Symbol'):
+    """Read symbols from a CSV or Parquet file, normalized and de-duplicated."""
+    path = Path(path)
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        df = pd.read_parquet(path, columns=[column])
+    else:
+        df = pd.read_csv(path, usecols=[column], dtype=str)
+    symbols = df[column].dropna().astype(str).str.strip().str.upper()
+    return list(dict.fromkeys(s for s in symbols if s))
+
+
+def _hash(key):
+    # md5 rather than hash(): it must agree across processes and machines
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, shards, virtual_nodes=VIRTUAL_NODES):
+        nodes = sorted(
+            (_hash(f'shard-{shard}-{vnode}'), shard)
+            for shard in range(shards) for vnode in range(virtual_nodes)
+        )
+        self._points = [point for point, _ in nodes]
+        self._shards = [shard for _, shard in nodes]
+
+    def shard_of(self, symbol):
+        index = bisect.bisect(self._points, _hash(symbol)) % len(self._points)
+        return self._shards[index]
+
+
+def parse_shard(value):
+    """Parse ``"i/N"`` (0-based shard i of N)."""
+    match = re.fullmatch(r'(\d+)/(\d+)', value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, got {value!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}, got {index}")
+    return index, count
+
+
+def select_shard(symbols, index, count):
+    if count == 1:
+        return list(symbols)
+    ring = HashRing(count)
+    return [symbol for symbol in symbols if ring.shard_of(symbol) == index]
+
+
+def shard_suffix(index, count):
+    return f'_shard{index}of{count}'
+
+
+def merge_shards(paths, output_dir=Path('stock_data'), formats=None, store=None):
+    """Combine per-shard CSV exports into one snapshot; returns the merged frame."""
+    frames = []
+    stamps = []
+    for path in sorted(Path(p) for p in paths):
+        match = SHARD_NAME_RE.search(path.name)
+        if match:
+            stamps.append(match.group(1))
+        frames.append(pd.read_csv(path))
+    if not frames:
+        logging.error("No shard files to merge")
+        return None
+
+    df = pd.concat(frames, ignore_index=True)
+    duplicated = df['Symbol'].duplicated(keep='last')
+    if duplicated.any():
+        logging.warning('%d symbols appear in several shards; keeping the last', duplicated.sum())
+    dict_stocks = dict(zip(df['Symbol'][~duplicated], df['Watchers'][~duplicated].astype('int64')))
+
+    # The merged snapshot is stamped with the latest shard run
+    timestamp = max(stamps) if stamps else datetime.now().strftime('%Y%m%d_%H%M%S')
+    (store or WatcherStore()).append_snapshot(
+        dict_stocks, ts=datetime.strptime(timestamp, '%Y%m%d_%H%M%S').timestamp(), changes_only=True
+    )
+    merged = snapshot_frame(dict_stocks)
+    run_exporters(merged, formats, output_dir, timestamp)
+    logging.info('Merged %d shard files into %d symbols', len(frames), len(merged))
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Symbol universe tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    show = sub.add_parser('show', help='print the symbols of one shard')
+    show.add_argument('universe')
+    show.add_argument('--shard', type=parse_shard, default=(0, 1))
+    merge = sub.add_parser('merge', help='combine shard CSV exports into one snapshot')
+    merge.add_argument('paths', nargs='+')
+    merge.add_argument('--formats', type=lambda value: value.split(','))
+    args = parser.parse_args(argv)
+
+    if args.command == 'show':
+        print('\n'.join(select_shard(load_universe(args.universe), *args.shard)))
+    else:
+        merge_shards(args.paths, formats=args.formats)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,219 @@
+"""Async HTTP engine for StockTwits watcher counts.
+
+Fetches symbol pages concurrently over a pooled keep-alive connection and
+pulls ``watchlistCount`` straight out of the server-rendered HTML, so no
+browser is needed for the common case.
+"""
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+from extractors import NextDataStream, StreamExtractor, extract_symbol_stats, extract_watchers
+from http_cache import HttpCache
+from metrics import METRICS
+from rate_limiter import RateController, parse_retry_after
+
+BASE_URL = "https://stocktwits.com"
+
+DEFAULT_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+def symbol_url(symbol, base_url=BASE_URL):
+    return f"{base_url.rstrip('/')}/symbol/{symbol}"
+
+
+async def read_watchers(response, chunk_size=16384, keep=None):
+    """Stream the body until watchlistCount shows up, then drop the connection.
+
+    Returns the ``StreamExtractor`` so callers can see the bytes read. The
+    chunks read are appended to ``keep`` if a list is given.
+    """
+    extractor = StreamExtractor()
+    async for chunk in response.content.iter_chunked(chunk_size):
+        if keep is not None:
+            keep.append(chunk)
+        if extractor.feed(chunk):
+            break
+    else:
+        extractor.close()
+
+    if not response.content.at_eof():
+        # Cheaper to open a new connection later than to download the rest
+        response.close()
+    return extractor
+
+
+async def read_next_data(response, chunk_size=16384):
+    """Stream the body up to the end of __NEXT_DATA__; returns the bytes read."""
+    stream = NextDataStream()
+    async for chunk in response.content.iter_chunked(chunk_size):
+        if stream.feed(chunk):
+            break
+
+    if not response.content.at_eof():
+        response.close()
+    return stream.page
+
+
+async def read_stats(response, symbol, chunk_size=16384):
+    """Stream the body up to the end of __NEXT_DATA__ and return a SymbolStats."""
+    return extract_symbol_stats(await read_next_data(response, chunk_size), symbol)
+
+
+def is_congestion(error):
+    """True for failures that mean the server wants us to slow down."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+def _extract(page, symbol, full):
+    if full:
+        with METRICS.time('extract', symbol):
+            return extract_symbol_stats(page, symbol)
+    return {'watchers': extract_watchers(page)}
+
+
+async def fetch_watchers(session, symbol, controller, base_url=BASE_URL, max_retries=3,
+                         stats=False, archive=None, cache=None):
+    """Fetch one symbol; returns its watcher count, or a SymbolStats if ``stats``.
+
+    With a PageArchive the body is read to the end of __NEXT_DATA__ (not just
+    up to the count) and archived, so it can be re-extracted later. With an
+    HttpCache, fresh pages are not requested at all and stale ones are
+    revalidated; both count as successes for the rate controller.
+    """
+    full = stats or archive is not None
+    url = symbol_url(symbol, base_url)
+    # Plain counts cache a shorter prefix than full reads; keep them apart
+    cache_key = url + '#next-data' if full else url
+    for attempt in range(max_retries):
+        retry_after = None
+        try:
+            logging.info('Processing %s...', symbol, extra={'symbol': symbol})
+            entry = cache.lookup(cache_key) if cache is not None else None
+            page = None
+            fetched_headers = None
+            if entry is not None and cache.is_fresh(entry):
+                page = cache.load(entry)
+                if page is not None:
+                    METRICS.inc('cache_hits', symbol)
+                    controller.on_success()
+                    record = _extract(page, symbol, full)
+
+            if page is None:
+                headers = HttpCache.conditional_headers(entry)
+                async with controller.slot():
+                    start = time.monotonic()
+                    try:
+                        # The watcher regex runs on each chunk as it arrives, so
+                        # for plain counts extraction is part of the fetch time
+                        async with session.get(url, headers=headers) as response:
+                            if response.status == 429 or response.status >= 500:
+                                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                            if response.status == 304 and entry is not None:
+                                page = cache.load(entry)
+                                if page is None:
+                                    raise ValueError("Cached page for 304 response is missing")
+                                cache.refresh(cache_key, response.headers)
+                                METRICS.inc('not_modified', symbol)
+                            else:
+                                response.raise_for_status()
+                                if full:
+                                    page = await read_next_data(response)
+                                elif cache is not None:
+                                    chunks = []
+                                    record = (await read_watchers(response, keep=chunks)).found
+                                    page = b''.join(chunks)
+                                else:
+                                    record = (await read_watchers(response)).found
+                                fetched_headers = response.headers
+                                if archive is not None:
+                                    archive.append(symbol, page)
+                    except Exception as e:
+                        if is_congestion(e):
+                            controller.on_congestion(retry_after)
+                            METRICS.inc('throttled', symbol)
+                        raise
+                    finally:
+                        METRICS.observe('fetch', time.monotonic() - start, symbol)
+                    controller.on_success(time.monotonic() - start)
+
+                if full or response.status == 304:
+                    record = _extract(page, symbol, full)
+
+            watchers = record.watchers if full else record.get('watchers')
+            if watchers is None:
+                if entry is not None:
+                    # Do not keep serving a page we cannot read
+                    cache.delete(cache_key)
+                raise ValueError("Watchers count not found in page source")
+            if fetched_headers is not None and cache is not None:
+                # Only cache pages we could read, so a bad one is fetched again
+                cache.store(cache_key, page, fetched_headers)
+            logging.info('Found %d watchers for %s', watchers, symbol,
+                         extra={'symbol': symbol, 'watchers': watchers})
+            return record if stats else watchers
+
+        except Exception as e:
+            if attempt + 1 < max_retries:
+                METRICS.inc('retries', symbol)
+                wait_time = controller.backoff.delay(attempt, retry_after)
+                logging.warning('Attempt %d failed for %s: %s', attempt + 1, symbol, e,
+                                extra={'symbol': symbol})
+                logging.info('Waiting %.1f seconds before retry...', wait_time, extra={'symbol': symbol})
+                # The slot is already released, so other symbols keep going
+                await asyncio.sleep(wait_time)
+            else:
+                METRICS.inc('failures', symbol)
+                logging.error('Failed to get data for %s after %d attempts', symbol, max_retries,
+                              extra={'symbol': symbol})
+    return None
+
+
+async def fetch_all(symbols, base_url=BASE_URL, concurrency=8, rate=10.0, max_retries=3,
+                    timeout=30, controller=None, stats=False, on_result=None, archive=None,
+                    cache=None):
+    """Fetch watcher counts for every symbol.
+
+    ``concurrency`` is the ceiling for the adaptive limiter and ``rate`` the
+    requests-per-second cap; pass a ready ``controller`` to share one across runs.
+    With ``stats`` the values are full SymbolStats records from the same request.
+    ``on_result(symbol, value)`` is called as each symbol completes, and pages
+    are kept in ``archive`` (a PageArchive) when one is given. ``cache`` (an
+    HttpCache) serves and revalidates pages from earlier runs.
+    """
+    if controller is None:
+        controller = RateController(rate=rate, initial_concurrency=min(4, concurrency),
+                                    max_concurrency=concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def fetch_one(session, symbol):
+        value = await fetch_watchers(session, symbol, controller, base_url, max_retries, stats,
+                                     archive, cache)
+        if value is not None and on_result is not None:
+            on_result(symbol, value)
+        return value
+
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=client_timeout, headers=DEFAULT_HEADERS
+    ) as session:
+        results = await asyncio.gather(*(fetch_one(session, symbol) for symbol in symbols))
+
+    # Keep the caller's symbol order, drop the ones that never resolved
+    return {symbol: watchers for symbol, watchers in zip(symbols, results) if watchers is not None}
+
+
+def find_n_watchers_http(symbols, **kwargs):
+    """Blocking wrapper around :func:`fetch_all` for synchronous callers."""
+    return asyncio.run(fetch_all(symbols, **kwargs))
@@ -0,0 +1,299 @@
+"""Columnar, day-partitioned store for watcher snapshots.
+
+Layout under ``stock_data/store``::
+
+    symbols.json                  interned symbol table (id = list index)
+    latest.npy                    last seen ts and stored count per symbol id
+    watchers/20250205/ts.i8       int64 epoch seconds
+    watchers/20250205/sym.i4      int32 symbol ids
+    watchers/20250205/count.i8    int64 watcher counts
+
+Columns are raw little-endian arrays that are only ever appended to, and are
+read back through ``numpy.memmap`` so range queries touch only the days they
+need. Snapshots may be stored sparsely (``changes_only``): a symbol's count
+holds until its next row. Run ``python watcher_store.py import`` once to load the existing
+``stocktwits_watchers_*.csv`` exports.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = Path('stock_data') / 'store'
+CSV_NAME_RE = re.compile(r'stocktwits_watchers_(\d{8}_\d{6})\.csv$')
+
+
+def day_of(ts):
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime('%Y%m%d')
+
+
+def day_bounds(start=None, end=None):
+    """Inclusive partition names covering epoch-second ``start``..``end``."""
+    return (day_of(start) if start is not None else None,
+            day_of(end) if end is not None else None)
+
+
+class SymbolTable:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.symbols = json.loads(self.path.read_text()) if self.path.exists() else []
+        self.ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def intern(self, symbols):
+        added = False
+        ids = []
+        for symbol in symbols:
+            if symbol not in self.ids:
+                self.ids[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+                added = True
+            ids.append(self.ids[symbol])
+        if added:
+            self._save()
+        return np.asarray(ids, dtype=np.int32)
+
+    def lookup(self, symbols):
+        """Ids of the known ``symbols``; unknown ones are skipped."""
+        return np.asarray([self.ids[s] for s in symbols if s in self.ids], dtype=np.int32)
+
+    def names(self, ids):
+        table = np.asarray(self.symbols, dtype=object)
+        return table[np.asarray(ids, dtype=np.intp)]
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.symbols))
+        os.replace(tmp, self.path)
+
+
+class PartitionedTable:
+    """A set of equal-length column files per day partition."""
+
+    def __init__(self, root, columns):
+        self.root = Path(root)
+        # name -> numpy dtype; the file suffix records the dtype (ts.i8, sym.i4)
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+
+    def _file(self, day, name):
+        dtype = self.columns[name]
+        return self.root / day / f'{name}.{dtype.kind}{dtype.itemsize}'
+
+    def append(self, day, **arrays):
+        lengths = {len(values) for values in arrays.values()}
+        if len(lengths) != 1 or set(arrays) != set(self.columns):
+            raise ValueError(f"append needs equal-length columns {sorted(self.columns)}")
+        (self.root / day).mkdir(parents=True, exist_ok=True)
+        for name, values in arrays.items():
+            with open(self._file(day, name), 'ab') as f:
+                np.ascontiguousarray(values, dtype=self.columns[name].newbyteorder('<')).tofile(f)
+
+    def replace(self, day, **arrays):
+        """Atomically swap in a whole new partition for ``day``."""
+        tmp = self.root / f'.{day}.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        staging = PartitionedTable(tmp.parent, self.columns)
+        staging.append(tmp.name, **arrays)
+        target = self.root / day
+        old = self.root / f'.{day}.old'
+        if target.exists():
+            os.replace(target, old)
+        os.replace(tmp, target)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def days(self, start_day=None, end_day=None):
+        if not self.root.exists():
+            return []
+        days = sorted(p.name for p in self.root.iterdir() if p.is_dir() and not p.name.startswith('.'))
+        return [d for d in days
+                if (start_day is None or d >= start_day) and (end_day is None or d <= end_day)]
+
+    def read(self, day, columns=None):
+        """Memory-map one partition (all or just ``columns``); returns ``{column: array}``."""
+        sizes = {}
+        for name, dtype in self.columns.items():
+            path = self._file(day, name)
+            sizes[name] = path.stat().st_size // dtype.itemsize if path.exists() else 0
+        # A crash between column appends leaves ragged files; trust the shortest
+        rows = min(sizes.values())
+        arrays = {}
+        for name in columns or self.columns:
+            dtype = self.columns[name]
+            if rows == 0:
+                arrays[name] = np.empty(0, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(self._file(day, name), dtype=dtype.newbyteorder('<'),
+                                         mode='r', shape=(rows,))
+        return arrays
+
+
+class WatcherStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.symbols = SymbolTable(self.root / 'symbols.json')
+        self.table = PartitionedTable(self.root / 'watchers',
+                                      {'ts': np.int64, 'sym': np.int32, 'count': np.int64})
+        # Per symbol id: last time it was seen and its last stored count (-1: never)
+        self.state_path = self.root / 'latest.npy'
+        self._state = None
+
+    def state(self):
+        """``(n_symbols, 2)`` int64 array of each symbol's last seen ts and count."""
+        if self._state is None:
+            if self.state_path.exists():
+                self._state = np.load(self.state_path)
+            else:
+                # Stores written before the state file existed: rebuild once
+                self._state = self._scan_latest()
+        missing = len(self.symbols.symbols) - len(self._state)
+        if missing > 0:
+            self._state = np.vstack([self._state, np.full((missing, 2), -1, dtype=np.int64)])
+        return self._state
+
+    def _scan_latest(self, before=None):
+        state = np.full((len(self.symbols.symbols), 2), -1, dtype=np.int64)
+        ts, sym, count = self.query(end=before)
+        if len(ts):
+            # Last occurrence of each id in time order
+            last = len(sym) - 1 - np.unique(sym[::-1], return_index=True)[1]
+            state[sym[last], 0] = ts[last]
+            state[sym[last], 1] = count[last]
+        return state
+
+    def _save_state(self):
+        tmp = self.state_path.with_suffix('.tmp.npy')
+        np.save(tmp, self._state)
+        os.replace(tmp, self.state_path)
+
+    def append_snapshot(self, dict_stocks, ts=None, changes_only=False):
+        """Store a ``{symbol: watchers}`` snapshot taken at ``ts`` (epoch seconds).
+
+        With ``changes_only`` only symbols whose count differs from their last
+        stored value are written; readers carry unchanged counts forward, so
+        nothing is lost and the store grows with change volume. Returns the
+        number of rows written.
+        """
+        if not dict_stocks:
+            return 0
+        ts = int(time.time() if ts is None else ts)
+        ids = self.symbols.intern(dict_stocks.keys())
+        counts = np.fromiter(dict_stocks.values(), dtype=np.int64, count=len(dict_stocks))
+        state = self.state()
+        newer = state[ids, 0] <= ts
+        state[ids[newer], 0] = ts
+        if changes_only:
+            changed = state[ids, 1] != counts
+            ids, counts, newer = ids[changed], counts[changed], newer[changed]
+        if len(ids):
+            self.table.append(day_of(ts), ts=np.full(len(ids), ts, dtype=np.int64), sym=ids, count=counts)
+            state[ids[newer], 1] = counts[newer]
+        self._save_state()
+        return len(ids)
+
+    def last_seen(self, symbols=None):
+        """``{symbol: epoch seconds}`` of the last snapshot that included each symbol."""
+        state = self.state()
+        ids = self.symbols.lookup(symbols) if symbols is not None else np.arange(len(state))
+        ids = ids[state[ids, 0] >= 0]
+        return dict(zip(self.symbols.names(ids), state[ids, 0].tolist()))
+
+    def query(self, symbols=None, start=None, end=None):
+        """Return ``(ts, sym_ids, counts)`` arrays, sorted by time.
+
+        ``symbols`` limits the result to those tickers; ``start``/``end`` are
+        inclusive epoch seconds. Only partitions inside the range are opened.
+        """
+        ids = self.symbols.lookup(symbols) if symbols is not None else None
+        parts = []
+        for day in self.table.days(*day_bounds(start, end)):
+            cols = self.table.read(day)
+            mask = np.ones(len(cols['ts']), dtype=bool)
+            if start is not None:
+                mask &= cols['ts'] >= start
+            if end is not None:
+                mask &= cols['ts'] <= end
+            if ids is not None:
+                mask &= np.isin(cols['sym'], ids)
+            parts.append((cols['ts'][mask], cols['sym'][mask], cols['count'][mask]))
+
+        if not parts:
+            return (np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.int64))
+        ts, sym, count = (np.concatenate(column) for column in zip(*parts))
+        order = np.argsort(ts, kind='stable')
+        return ts[order], sym[order], count[order]
+
+    def query_frame(self, symbols=None, start=None, end=None):
+        ts, sym, count = self.query(symbols, start, end)
+        return pd.DataFrame({
+            'Timestamp': pd.to_datetime(ts, unit='s', utc=True),
+            'Symbol': self.symbols.names(sym),
+            'Watchers': count,
+        })
+
+    def snapshot(self, ts=None):
+        """Return ``(ts, {symbol: watchers})`` as of ``ts`` (the latest by default).
+
+        Symbols without a row at ``ts`` itself contribute their last earlier
+        count, since unchanged counts may not have been written again.
+        """
+        if ts is None:
+            stamps = self.state()[:, 0]
+            if not (stamps >= 0).any():
+                return None, {}
+            ts = int(stamps.max())
+        return int(ts), self.latest(before=ts)
+
+    def latest(self, before=None):
+        """Most recent count per symbol, as ``{symbol: watchers}``."""
+        state = self.state() if before is None else self._scan_latest(before)
+        ids = np.flatnonzero(state[:, 0] >= 0)
+        return dict(zip(self.symbols.names(ids), state[ids, 1].tolist()))
+
+    def import_csv(self, paths):
+        """One-shot import of ``stocktwits_watchers_<timestamp>.csv`` exports."""
+        imported = 0
+        for path in sorted(Path(p) for p in paths):
+            match = CSV_NAME_RE.search(path.name)
+            if not match:
+                logging.warning('Skipping %s: no timestamp in file name', path)
+                continue
+            # Export file names carry local time
+            ts = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+            df = pd.read_csv(path)
+            self.append_snapshot(dict(zip(df['Symbol'], df['Watchers'].astype('int64'))), ts)
+            imported += 1
+        logging.info('Imported %d snapshot files into %s', imported, self.root)
+        return imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watcher snapshot store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help='load existing CSV exports')
+    imp.add_argument('paths', nargs='*', help='CSV files (default: stock_data/*.csv)')
+    qry = sub.add_parser('query', help='print the history of some symbols')
+    qry.add_argument('symbols', nargs='*')
+    qry.add_argument('--days', type=float, help='only the last N days')
+    for p in (imp, qry):
+        p.add_argument('--store', default=str(STORE_DIR))
+    args = parser.parse_args(argv)
+
+    store = WatcherStore(args.store)
+    if args.command == 'import':
+        store.import_csv(args.paths or Path('stock_data').glob('stocktwits_watchers_*.csv'))
+    else:
+        start = time.time() - args.days * 86400 if args.days else None
+        print(store.query_frame(args.symbols or None, start=start).to_string(index=False))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()